@@ -5,6 +5,7 @@ import {
   Category, 
   PaginatedResponse, 
   LessonProgress, 
+  LessonPosition,
   CourseProgress 
 } from '../types/catalog';
 
@@ -45,12 +46,34 @@ const _realCatalogApi = {
     return response.data;
   },
 
+  // Reportar la posición de reproducción de una lección de video (heartbeat)
+  sendLessonHeartbeat: async (lessonId: number, positionSeconds: number, durationSeconds?: number): Promise<void> => {
+    await api.post(`/catalog/lessons/${lessonId}/heartbeat`, {
+      position_seconds: positionSeconds,
+      duration_seconds: durationSeconds || null,
+    });
+  },
+
+  // Obtener dónde reanudar una lección de video
+  getLessonPosition: async (lessonId: number): Promise<LessonPosition> => {
+    const response = await api.get<LessonPosition>(`/catalog/lessons/${lessonId}/position`);
+    return response.data;
+  },
+
   // Obtener el progreso general de un curso para el estudiante logueado
   getCourseProgress: async (courseId: number): Promise<CourseProgress> => {
     const response = await api.get<CourseProgress>(`/catalog/courses/${courseId}/progress`);
     return response.data;
   },
 
+  // Obtener el progreso de varios cursos en una sola petición (dashboard)
+  getProgressSnapshot: async (courseIds: number[]): Promise<CourseProgress[]> => {
+    const response = await api.get<CourseProgress[]>('/catalog/progress', {
+      params: { course_ids: courseIds.join(',') },
+    });
+    return response.data;
+  },
+
   // Actualizar un curso
   updateCourse: async (courseId: number, data: { title: string; description: string; category_id: number; price: number; nivel_dificultad: string; duracion_horas: number; status: string }): Promise<Course> => {
     const response = await api.put<Course>(`/catalog/courses/${courseId}`, data);
@@ -8,7 +8,7 @@ import {
   DEMO_PROGRESS,
   DEMO_ANNOUNCEMENTS,
 } from '../../data/mockData';
-import type { Course, CourseDetail, Category, PaginatedResponse, CourseProgress, LessonProgress, Trayectoria } from '../../types/catalog';
+import type { Course, CourseDetail, Category, PaginatedResponse, CourseProgress, LessonProgress, LessonPosition, Trayectoria } from '../../types/catalog';
 
 // Simulate network delay for realism
 const delay = (ms = 300) => new Promise(r => setTimeout(r, ms));
@@ -63,6 +63,13 @@ export const mockCatalogApi = {
     return { id: lessonId, user_id: 1, lesson_id: lessonId, completed: true, completed_at: new Date().toISOString() };
   },
 
+  sendLessonHeartbeat: async (_lessonId: number, _positionSeconds: number, _durationSeconds?: number): Promise<void> => {},
+
+  getLessonPosition: async (lessonId: number): Promise<LessonPosition> => {
+    await delay(100);
+    return { lesson_id: lessonId, position_seconds: 0, completed: false };
+  },
+
   getCourseProgress: async (courseId: number): Promise<CourseProgress> => {
     await delay(150);
     return DEMO_PROGRESS[courseId] || {
@@ -70,6 +77,13 @@ export const mockCatalogApi = {
     };
   },
 
+  getProgressSnapshot: async (courseIds: number[]): Promise<CourseProgress[]> => {
+    await delay(150);
+    return courseIds.map((courseId) => DEMO_PROGRESS[courseId] || {
+      course_id: courseId, total_lessons: 12, completed_lessons: 0, percentage: 0, completed: false, completed_lesson_ids: [],
+    });
+  },
+
   updateCourse: async (courseId: number, data: any): Promise<Course> => {
     await delay();
     return { id: courseId, ...data } as Course;
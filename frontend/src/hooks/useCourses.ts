@@ -39,3 +39,15 @@ export const useCourseProgressQuery = (courseId: number, enabled: boolean = true
     enabled: enabled && !!courseId,
   });
 };
+
+// Progreso de varios cursos con una sola petición, indexado por course_id
+export const useProgressSnapshotQuery = (courseIds: number[]) => {
+  return useQuery({
+    queryKey: ['progressSnapshot', courseIds],
+    queryFn: async () => {
+      const snapshot = await catalogApi.getProgressSnapshot(courseIds);
+      return Object.fromEntries(snapshot.map((progress) => [progress.course_id, progress]));
+    },
+    enabled: courseIds.length > 0,
+  });
+};
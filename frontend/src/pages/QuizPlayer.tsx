@@ -52,6 +52,7 @@ export const QuizPlayer: React.FC = () => {
       setAttemptError(null);
       
       // Invalidate course progress to refresh it
+      queryClient.invalidateQueries({ queryKey: ['progressSnapshot'] });
       queryClient.invalidateQueries({ queryKey: ['courseProgress', Number(courseId)] }).then(() => {
         // After invalidating, fetch the new progress manually to see if it's 100%
         catalogApi.getCourseProgress(Number(courseId)).then((newProgress) => {
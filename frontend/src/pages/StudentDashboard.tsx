@@ -4,14 +4,19 @@ import { useTranslation } from 'react-i18next';
 import { useQuery } from '@tanstack/react-query';
 import { transactionsApi } from '../api/transactions';
 import { certificatesApi } from '../api/certificates';
-import { useCourseProgressQuery, useCourseDetailQuery } from '../hooks/useCourses';
+import { useProgressSnapshotQuery, useCourseDetailQuery } from '../hooks/useCourses';
 import { Enrollment } from '../types/transactions';
-
-// Componente secundario para renderizar la tarjeta con su consulta individual de progreso y detalles
-const EnrolledCourseCard: React.FC<{ enrollment: Enrollment }> = ({ enrollment }) => {
+import { CourseProgress } from '../types/catalog';
+
+// Componente secundario para renderizar la tarjeta con su consulta de detalles; el progreso
+// llega del snapshot que el dashboard pide una sola vez para todos los cursos
+const EnrolledCourseCard: React.FC<{
+  enrollment: Enrollment;
+  progress?: CourseProgress;
+  progressLoading: boolean;
+}> = ({ enrollment, progress, progressLoading }) => {
   const { t } = useTranslation();
   const { data: course, isLoading: courseLoading } = useCourseDetailQuery(enrollment.course_id);
-  const { data: progress, isLoading: progressLoading } = useCourseProgressQuery(enrollment.course_id);
 
   if (courseLoading || progressLoading) {
     return (
@@ -82,6 +87,11 @@ export const StudentDashboard: React.FC = () => {
     ? (enrollmentsData as unknown as Enrollment[])
     : [];
 
+  // Progreso de todos los cursos inscritos en una sola petición
+  const { data: progressByCourse, isLoading: progressLoading } = useProgressSnapshotQuery(
+    enrollments.map((enrollment) => enrollment.course_id)
+  );
+
   // Filtrar cursos completados para simulación de certificados
   // (En un caso real, cada certificado vendría del certificate-service)
   // Consulta de certificados reales
@@ -142,7 +152,12 @@ export const StudentDashboard: React.FC = () => {
           ) : (
             <div className="grid grid-cols-1 sm:grid-cols-2 gap-5">
               {enrollments.map((enrollment) => (
-                <EnrolledCourseCard key={enrollment.id} enrollment={enrollment} />
+                <EnrolledCourseCard
+                  key={enrollment.id}
+                  enrollment={enrollment}
+                  progress={progressByCourse?.[enrollment.course_id]}
+                  progressLoading={progressLoading}
+                />
               ))}
             </div>
           )}
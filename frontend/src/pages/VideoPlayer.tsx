@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { useCourseDetailQuery, useCourseProgressQuery } from '../hooks/useCourses';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
@@ -7,6 +7,9 @@ import { certificatesApi } from '../api/certificates';
 import { useAuth } from '../context/AuthContext';
 import { Lesson } from '../types/catalog';
 
+// Cada cuánto se reporta la posición de reproducción al servidor
+const HEARTBEAT_INTERVAL_MS = 10000;
+
 export const VideoPlayer: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const courseId = Number(id);
@@ -17,6 +20,7 @@ export const VideoPlayer: React.FC = () => {
   // Estados locales
   const [activeLesson, setActiveLesson] = useState<Lesson | null>(null);
   const [showCelebration, setShowCelebration] = useState(false);
+  const videoRef = useRef<HTMLVideoElement>(null);
 
   // Consultas de datos
   const { data: course, isLoading: courseLoading } = useCourseDetailQuery(courseId);
@@ -28,6 +32,7 @@ export const VideoPlayer: React.FC = () => {
     onSuccess: () => {
       // Invalidar caché del progreso para recargar los checks e IDs completados
       queryClient.invalidateQueries({ queryKey: ['courseProgress', courseId] });
+      queryClient.invalidateQueries({ queryKey: ['progressSnapshot'] });
       
       // Si con esta completación llegamos al total, mostrar celebración
       if (progress && progress.completed_lessons + 1 === progress.total_lessons) {
@@ -60,6 +65,56 @@ export const VideoPlayer: React.FC = () => {
     }
   }, [course, activeLesson, navigate, courseId]);
 
+  // Heartbeats de video: reanudar donde se quedó y reportar la posición mientras se reproduce.
+  // El servidor completa la lección al superar el porcentaje configurado.
+  useEffect(() => {
+    const video = videoRef.current;
+    if (!video || activeLesson?.content_type !== 'VIDEO') return;
+    const lessonId = activeLesson.id;
+    let cancelled = false;
+
+    catalogApi.getLessonPosition(lessonId)
+      .then(({ position_seconds }) => {
+        if (cancelled || !position_seconds) return;
+        const seek = () => {
+          if (!video.duration || position_seconds < video.duration - 1) video.currentTime = position_seconds;
+        };
+        if (video.readyState >= 1) seek();
+        else video.addEventListener('loadedmetadata', seek, { once: true });
+      })
+      .catch(err => console.error('Error loading watch position:', err));
+
+    const sendHeartbeat = () => {
+      if (video.currentTime <= 0) return;
+      const duration = Number.isFinite(video.duration) ? video.duration : undefined;
+      catalogApi.sendLessonHeartbeat(lessonId, video.currentTime, duration)
+        .catch(err => console.error('Error sending heartbeat:', err));
+    };
+    const interval = window.setInterval(() => {
+      if (!video.paused) sendHeartbeat();
+    }, HEARTBEAT_INTERVAL_MS);
+    let refreshTimeout: number | undefined;
+    const handleEnded = () => {
+      sendHeartbeat();
+      // La completación se escribe en el siguiente flush del servidor
+      refreshTimeout = window.setTimeout(() => {
+        queryClient.invalidateQueries({ queryKey: ['courseProgress', courseId] });
+        queryClient.invalidateQueries({ queryKey: ['progressSnapshot'] });
+      }, 3000);
+    };
+    video.addEventListener('pause', sendHeartbeat);
+    video.addEventListener('ended', handleEnded);
+
+    return () => {
+      cancelled = true;
+      sendHeartbeat();
+      window.clearInterval(interval);
+      window.clearTimeout(refreshTimeout);
+      video.removeEventListener('pause', sendHeartbeat);
+      video.removeEventListener('ended', handleEnded);
+    };
+  }, [activeLesson, queryClient, courseId, courseLoading, progressLoading]);
+
   const handleLessonSelect = (lesson: Lesson) => {
     if (lesson.content_type === 'QUIZ') {
       navigate(`/courses/${courseId}/lessons/${lesson.id}/quiz`);
@@ -190,6 +245,7 @@ export const VideoPlayer: React.FC = () => {
             <div className="relative aspect-video rounded-2xl overflow-hidden bg-black border border-zinc-850 shadow-inner">
               <video
                 key={activeLesson.id} // Forza al navegador a recargar el elemento <video> al cambiar de lección
+                ref={videoRef}
                 src={videoUrl}
                 controls
                 className="w-full h-full object-contain"
@@ -49,13 +49,19 @@ export interface PaginatedResponse<T> {
 }
 
 export interface LessonProgress {
-  id: number;
+  id: number | null;
   user_id: number;
   lesson_id: number;
   completed: boolean;
   completed_at: string | null;
 }
 
+export interface LessonPosition {
+  lesson_id: number;
+  position_seconds: number;
+  completed: boolean;
+}
+
 export interface CourseProgress {
   course_id: number;
   total_lessons: number;
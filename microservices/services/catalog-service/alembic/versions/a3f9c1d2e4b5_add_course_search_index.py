@@ -0,0 +1,48 @@
+"""add course search index
+
+Revision ID: a3f9c1d2e4b5
+Revises: ed10a10f5f8f
+Create Date: 2026-10-18 10:12:41.203118
+
+Tras aplicar la migración, ejecutar `python rebuild_search_index.py` para poblar el índice.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c1d2e4b5'
+down_revision: Union[str, Sequence[str], None] = 'ed10a10f5f8f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    op.add_column('courses', sa.Column('search_document', postgresql.TSVECTOR() if is_postgres else sa.Text(), nullable=True))
+    if is_postgres:
+        op.create_index('ix_courses_search_document', 'courses', ['search_document'], unique=False, postgresql_using='gin')
+    op.create_table('course_search_terms',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('term', sa.String(length=64), nullable=False),
+    sa.Column('weight', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_course_search_terms_course_id'), 'course_search_terms', ['course_id'], unique=False)
+    op.create_index('ix_course_search_terms_term_course', 'course_search_terms', ['term', 'course_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_course_search_terms_term_course', table_name='course_search_terms')
+    op.drop_index(op.f('ix_course_search_terms_course_id'), table_name='course_search_terms')
+    op.drop_table('course_search_terms')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_courses_search_document', table_name='courses')
+    op.drop_column('courses', 'search_document')
@@ -0,0 +1,32 @@
+"""archive quiz questions and options
+
+Revision ID: a6e4c2b8d0f3
+Revises: f1d3a7c5e9b2
+Create Date: 2026-10-18 19:05:12.447921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e4c2b8d0f3'
+down_revision: Union[str, Sequence[str], None] = 'f1d3a7c5e9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quiz_questions', sa.Column('archivada', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('quiz_options', sa.Column('archivada', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('quiz_options') as batch_op:
+        batch_op.drop_column('archivada')
+    with op.batch_alter_table('quiz_questions') as batch_op:
+        batch_op.drop_column('archivada')
@@ -0,0 +1,31 @@
+"""add lesson watch position
+
+Revision ID: b4d7e1f9a2c6
+Revises: c3f5a9d1e7b4
+Create Date: 2026-10-18 21:07:44.520913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d7e1f9a2c6'
+down_revision: Union[str, Sequence[str], None] = 'c3f5a9d1e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('lesson_progress', sa.Column('position_seconds', sa.Integer(), nullable=True))
+    op.add_column('lesson_progress', sa.Column('position_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('lesson_progress') as batch_op:
+        batch_op.drop_column('position_updated_at')
+        batch_op.drop_column('position_seconds')
@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: b7e2d4f8a1c3
+Revises: a3f9c1d2e4b5
+Create Date: 2026-10-18 11:40:03.518274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4f8a1c3'
+down_revision: Union[str, Sequence[str], None] = 'a3f9c1d2e4b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_modules_course_sort', 'modules', ['course_id', 'sort_order', 'id'], unique=False)
+    op.create_index('ix_lessons_module_sort', 'lessons', ['module_id', 'sort_order', 'id'], unique=False)
+    op.create_index('ix_ratings_course_created', 'ratings', ['course_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_wishlist_items_user_added', 'wishlist_items', ['user_id', 'added_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_wishlist_items_user_added', table_name='wishlist_items')
+    op.drop_index('ix_ratings_course_created', table_name='ratings')
+    op.drop_index('ix_lessons_module_sort', table_name='lessons')
+    op.drop_index('ix_modules_course_sort', table_name='modules')
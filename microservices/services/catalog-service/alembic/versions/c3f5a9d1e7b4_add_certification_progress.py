@@ -0,0 +1,44 @@
+"""add certification progress
+
+Revision ID: c3f5a9d1e7b4
+Revises: a6e4c2b8d0f3
+Create Date: 2026-10-18 19:48:03.112584
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f5a9d1e7b4'
+down_revision: Union[str, Sequence[str], None] = 'a6e4c2b8d0f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las filas se crean al primer acceso; `python -m app.services.certification_progress` las precalcula
+    op.create_table(
+        'certification_progress',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('completed_module_ids', sa.JSON(), nullable=False),
+        sa.Column('locked_module_ids', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'course_id', name='_user_course_cert_uc'),
+    )
+    op.create_index(op.f('ix_certification_progress_id'), 'certification_progress', ['id'], unique=False)
+    op.create_index(op.f('ix_certification_progress_course_id'), 'certification_progress', ['course_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_certification_progress_course_id'), table_name='certification_progress')
+    op.drop_index(op.f('ix_certification_progress_id'), table_name='certification_progress')
+    op.drop_table('certification_progress')
@@ -0,0 +1,48 @@
+"""add course rating aggregates
+
+Revision ID: d5a8b3c7e2f1
+Revises: b7e2d4f8a1c3
+Create Date: 2026-10-18 13:05:48.771902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8b3c7e2f1'
+down_revision: Union[str, Sequence[str], None] = 'b7e2d4f8a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ['rating_count', 'rating_sum', 'rating_hist_1', 'rating_hist_2', 'rating_hist_3', 'rating_hist_4', 'rating_hist_5']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name in COLUMNS:
+        op.add_column('courses', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('courses', sa.Column('rating_avg', sa.Float(), nullable=False, server_default='0'))
+    op.create_index('ix_courses_status_rating', 'courses', ['status', 'rating_avg', 'id'], unique=False)
+
+    # Backfill desde la tabla ratings
+    op.execute(
+        "UPDATE courses SET "
+        "rating_count = (SELECT COUNT(*) FROM ratings r WHERE r.course_id = courses.id), "
+        "rating_sum = (SELECT COALESCE(SUM(r.score), 0) FROM ratings r WHERE r.course_id = courses.id), "
+        + ", ".join(
+            f"rating_hist_{s} = (SELECT COUNT(*) FROM ratings r WHERE r.course_id = courses.id AND r.score = {s})"
+            for s in range(1, 6)
+        )
+    )
+    op.execute("UPDATE courses SET rating_avg = rating_sum * 1.0 / rating_count WHERE rating_count > 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_courses_status_rating', table_name='courses')
+    op.drop_column('courses', 'rating_avg')
+    for name in reversed(COLUMNS):
+        op.drop_column('courses', name)
@@ -0,0 +1,58 @@
+"""store quiz embeddings as float32
+
+Revision ID: e8c2f6a4b9d1
+Revises: d5a8b3c7e2f1
+Create Date: 2026-10-18 16:42:10.318457
+
+"""
+import array
+import json
+import math
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2f6a4b9d1'
+down_revision: Union[str, Sequence[str], None] = 'd5a8b3c7e2f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = 'quiz_questions'
+COLUMN = 'respuesta_esperada_embedding'
+TMP_COLUMN = 'respuesta_esperada_embedding_tmp'
+
+
+def _to_float32(value) -> bytes:
+    # Los vectores viejos no estaban normalizados; se normalizan al convertir
+    values = json.loads(value) if isinstance(value, str) else value
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return array.array('f', [v / norm for v in values]).tobytes()
+
+
+def _from_float32(value) -> list:
+    return array.array('f', bytes(value)).tolist()
+
+
+def _convert(source_type, target_type, convert) -> None:
+    op.add_column(TABLE, sa.Column(TMP_COLUMN, target_type, nullable=True))
+    bind = op.get_bind()
+    table = sa.table(TABLE, sa.column('id', sa.Integer), sa.column(COLUMN, source_type), sa.column(TMP_COLUMN, target_type))
+    rows = bind.execute(sa.select(table.c.id, table.c[COLUMN]).where(table.c[COLUMN].isnot(None))).all()
+    for row_id, value in rows:
+        bind.execute(table.update().where(table.c.id == row_id).values({TMP_COLUMN: convert(value)}))
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_column(COLUMN)
+        batch_op.alter_column(TMP_COLUMN, new_column_name=COLUMN, existing_type=target_type, existing_nullable=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _convert(sa.JSON(), sa.LargeBinary(), _to_float32)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _convert(sa.LargeBinary(), sa.JSON(), _from_float32)
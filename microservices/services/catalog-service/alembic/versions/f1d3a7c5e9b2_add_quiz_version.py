@@ -0,0 +1,28 @@
+"""add quiz version
+
+Revision ID: f1d3a7c5e9b2
+Revises: e8c2f6a4b9d1
+Create Date: 2026-10-18 18:20:37.604115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d3a7c5e9b2'
+down_revision: Union[str, Sequence[str], None] = 'e8c2f6a4b9d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quizzes', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('quizzes', 'version')
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Paquete `shared` de la raíz del repositorio (en la imagen Docker ya está junto a app/)
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../"))
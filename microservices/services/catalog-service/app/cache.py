@@ -0,0 +1,262 @@
+"""
+Caché de respuestas para los GET públicos del catálogo.
+
+Dos niveles: un LRU en memoria por proceso (L1) y Redis compartido (L2). Cada ruta
+pertenece a uno o más namespaces ("courses", "categories", ...) con un número de
+versión guardado en Redis; la clave de caché incluye esas versiones, de modo que
+invalidar un namespace es un INCR y las entradas viejas simplemente expiran.
+
+Las versiones leídas de Redis se guardan en el proceso durante versions_ttl segundos,
+así que un hit en L1 no consulta Redis. Las invalidaciones hechas mientras Redis no
+responde se recuerdan y se aplican (INCR) en cuanto vuelve, antes de leer versiones,
+para no servir desde L2 respuestas invalidadas durante la caída.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import Request
+from starlette.responses import Response
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "catalog:cache"
+REDIS_RETRY_SECONDS = 30
+
+# (ruta sin prefijo, namespaces de los que depende la respuesta)
+CACHEABLE_ROUTES = [
+    (re.compile(r"^/courses$"), ("courses",)),
+    (re.compile(r"^/courses/\d+$"), ("courses",)),
+    (re.compile(r"^/courses/\d+/modules$"), ("courses",)),
+    (re.compile(r"^/categories$"), ("categories",)),
+    (re.compile(r"^/announcements$"), ("announcements",)),
+    (re.compile(r"^/trayectorias$"), ("trayectorias",)),
+    (re.compile(r"^/trayectorias/\d+$"), ("trayectorias", "courses")),
+]
+ROUTE_PREFIXES = ("/api/catalog", "/api")
+
+
+def match_namespaces(path: str) -> Optional[tuple]:
+    for prefix in ROUTE_PREFIXES:
+        if path.startswith(prefix + "/"):
+            route = path[len(prefix):]
+            for pattern, namespaces in CACHEABLE_ROUTES:
+                if pattern.match(route):
+                    return namespaces
+    return None
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "media_type", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, media_type: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.media_type = media_type
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    def __init__(self, redis_url: str, ttl: int, l1_ttl: int, l1_max_entries: int, versions_ttl: float = 1.0):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.l1_ttl = l1_ttl
+        self.l1_max_entries = l1_max_entries
+        self.versions_ttl = versions_ttl
+        self._l1: OrderedDict = OrderedDict()
+        self._local_versions: dict = {}
+        # namespace -> (versión en Redis, instante en que se leyó)
+        self._remote_versions: dict = {}
+        # Namespaces invalidados sin poder hacer el INCR en Redis
+        self._unsynced: set = set()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._aioredis = None
+        self._redis_down_until = 0.0
+
+    # ── Redis ──────────────────────────────────────────────────────────────
+
+    def _redis_available(self) -> bool:
+        return bool(self.redis_url) and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning(f"Response cache: Redis unavailable ({exc}); using in-process cache only.")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _sync_client(self):
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._redis
+
+    def _async_client(self):
+        if self._aioredis is None:
+            self._aioredis = aioredis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._aioredis
+
+    # ── Versiones de namespace ────────────────────────────────────────────
+
+    def _remember_versions(self, namespaces, values) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for ns, value in zip(namespaces, values):
+                self._remote_versions[ns] = (str(int(value or 0)), now)
+
+    def _mark_unsynced(self, namespaces) -> None:
+        with self._lock:
+            self._unsynced.update(namespaces)
+            for ns in namespaces:
+                self._remote_versions.pop(ns, None)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Invalida todas las respuestas cacheadas de los namespaces dados."""
+        with self._lock:
+            for ns in namespaces:
+                self._local_versions[ns] = self._local_versions.get(ns, 0) + 1
+        if not self._redis_available():
+            self._mark_unsynced(namespaces)
+            return
+        pending = list(set(namespaces) | self._unsynced)
+        try:
+            pipe = self._sync_client().pipeline(transaction=False)
+            for ns in pending:
+                pipe.incr(f"{KEY_PREFIX}:v:{ns}")
+            self._remember_versions(pending, pipe.execute())
+            with self._lock:
+                self._unsynced.difference_update(pending)
+        except redis.RedisError as exc:
+            self._mark_unsynced(namespaces)
+            self._redis_failed(exc)
+
+    async def _resync(self) -> None:
+        pending = list(self._unsynced)
+        pipe = self._async_client().pipeline(transaction=False)
+        for ns in pending:
+            pipe.incr(f"{KEY_PREFIX}:v:{ns}")
+        self._remember_versions(pending, await pipe.execute())
+        with self._lock:
+            self._unsynced.difference_update(pending)
+        logger.info(f"Response cache: Redis back; bumped versions for {sorted(pending)}.")
+
+    async def _versions(self, namespaces: tuple) -> str:
+        # Con Redis las versiones son compartidas por todos los workers; sin Redis
+        # sólo se conocen las invalidaciones hechas en este proceso (acotado por l1_ttl).
+        if self._redis_available():
+            try:
+                if self._unsynced:
+                    await self._resync()
+                now = time.monotonic()
+                versions = {}
+                for ns in namespaces:
+                    entry = self._remote_versions.get(ns)
+                    if entry is not None and now - entry[1] <= self.versions_ttl:
+                        versions[ns] = entry[0]
+                stale = [ns for ns in namespaces if ns not in versions]
+                if stale:
+                    remote = await self._async_client().mget([f"{KEY_PREFIX}:v:{ns}" for ns in stale])
+                    self._remember_versions(stale, remote)
+                    versions.update((ns, str(int(value or 0))) for ns, value in zip(stale, remote))
+                return ".".join(versions[ns] for ns in namespaces)
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+        return "local." + ".".join(str(self._local_versions.get(ns, 0)) for ns in namespaces)
+
+    # ── Lectura / escritura ───────────────────────────────────────────────
+
+    def _l1_get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+            return entry
+
+    def _l1_set(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._l1[key] = entry
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)
+
+    async def get(self, key: str) -> tuple:
+        entry = self._l1_get(key)
+        if entry is not None:
+            return entry, "HIT-L1"
+        if self._redis_available():
+            try:
+                data = await self._async_client().hgetall(key)
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+                data = None
+            if data:
+                entry = CachedResponse(
+                    data[b"body"], data[b"etag"].decode(), data[b"media_type"].decode(),
+                    time.monotonic() + self.l1_ttl,
+                )
+                self._l1_set(key, entry)
+                return entry, "HIT-L2"
+        return None, "MISS"
+
+    async def set(self, key: str, body: bytes, media_type: str) -> CachedResponse:
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CachedResponse(body, etag, media_type, time.monotonic() + self.l1_ttl)
+        self._l1_set(key, entry)
+        if self._redis_available():
+            try:
+                pipe = self._async_client().pipeline(transaction=False)
+                pipe.hset(key, mapping={"body": body, "etag": etag, "media_type": media_type})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+        return entry
+
+    async def build_key(self, request: Request, namespaces: tuple) -> str:
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()
+        return f"{KEY_PREFIX}:{digest}:{await self._versions(namespaces)}"
+
+
+response_cache = ResponseCache(
+    redis_url=settings.REDIS_URL,
+    ttl=settings.CACHE_TTL_SECONDS,
+    l1_ttl=settings.CACHE_L1_TTL_SECONDS,
+    l1_max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    versions_ttl=settings.CACHE_VERSIONS_TTL_SECONDS,
+)
+
+
+def _cached_response(entry: CachedResponse, request: Request, status_header: str) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": status_header}
+    if request.headers.get("if-none-match") == entry.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
+async def response_cache_middleware(request: Request, call_next):
+    """Sirve los GET cacheables desde la caché (con soporte de If-None-Match / 304)."""
+    namespaces = match_namespaces(request.url.path) if request.method == "GET" else None
+    if not namespaces or not settings.CACHE_ENABLED:
+        return await call_next(request)
+
+    key = await response_cache.build_key(request, namespaces)
+    entry, status_header = await response_cache.get(key)
+    if entry is not None:
+        return _cached_response(entry, request, status_header)
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    entry = await response_cache.set(key, body, response.headers.get("content-type", "application/json"))
+    return _cached_response(entry, request, "MISS")
@@ -2,8 +2,46 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./catalog.db"
+    # Pool del engine async (app/database.py) de los routers de lectura
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 20
     JWT_SECRET: str = "dev-secret-change-in-production"
     JWT_ALGORITHM: str = "HS256"
+    # Header X-Internal-Token de las tareas de Celery Beat para /internal/*; vacío = rutas cerradas
+    INTERNAL_API_TOKEN: str = ""
+
+    # Caché de respuestas públicas (app/cache.py). Sin REDIS_URL sólo se usa el LRU en memoria.
+    REDIS_URL: str = ""
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_L1_TTL_SECONDS: int = 30
+    CACHE_L1_MAX_ENTRIES: int = 1024
+    CACHE_VERSIONS_TTL_SECONDS: float = 1.0
+
+    # Inferencia de embeddings (app/services/embeddings.py). Con una ventana > 0 los
+    # textos de requests concurrentes se agrupan en una sola llamada al modelo.
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MICROBATCH_WINDOW_MS: int = 0
+    # Procesos dedicados a la inferencia (0 = en el mismo proceso) y máximo de lotes
+    # en cola; por encima de ese límite se responde 503 en vez de encolar sin fin.
+    EMBEDDING_WORKERS: int = 2
+    EMBEDDING_MAX_PENDING: int = 32
+    # Cargar el modelo en segundo plano al arrancar. Los workers que no califican
+    # quizzes pueden desactivarlo y el modelo se carga en la primera petición.
+    EMBEDDING_WARMUP: bool = True
+    # Caché de embeddings por texto normalizado (LRU local + Redis en REDIS_URL)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+
+    # Escritura diferida de lecciones completadas (app/services/progress_buffer.py).
+    # Requiere REDIS_URL; los pings se coalescen en Redis y se escriben en lotes.
+    PROGRESS_WRITE_BEHIND: bool = False
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = 2.0
+    PROGRESS_FLUSH_BATCH_SIZE: int = 500
+    # Heartbeats de reproducción: con REDIS_URL la posición se guarda en Redis y se
+    # escribe con el mismo flush; la lección VIDEO se completa al llegar a este ratio.
+    VIDEO_COMPLETION_RATIO: float = 0.9
 
     class Config:
         env_file = ".env"
@@ -1,14 +1,50 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from app.config import settings
 
+# Driver async equivalente para cada backend de DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(hide_password=False)
+
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Los routers de lectura (async def) usan este engine y no ocupan hilos del threadpool
+_async_url = async_database_url(settings.DATABASE_URL)
+_in_memory = make_url(_async_url).get_backend_name() == "sqlite" and make_url(_async_url).database in (None, "", ":memory:")
+async_engine = create_async_engine(
+    _async_url,
+    # SQLite en memoria usa StaticPool, que no acepta tamaño de pool
+    **({} if _in_memory else {"pool_size": settings.ASYNC_DB_POOL_SIZE, "max_overflow": settings.ASYNC_DB_MAX_OVERFLOW}),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def bulk_insert_ids(db, model, rows: list) -> list:
+    """
+    INSERT en bloque que retorna los ids en el orden de `rows`. En PostgreSQL lo
+    garantiza sort_by_parameter_order; SQLite no lo soporta sin caer a un INSERT por
+    fila, pero asigna rowids crecientes en el orden de VALUES mientras la transacción
+    tiene el lock de escritura, así que basta con ordenar los ids devueltos.
+    """
+    if not rows:
+        return []
+    if db.get_bind().dialect.name == "sqlite":
+        return sorted(db.scalars(insert(model).returning(model.id), rows).all())
+    return db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
@@ -0,0 +1,17 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException, status
+from app.config import settings
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """
+    Rutas /internal/* que invocan las tareas periódicas de Celery (shared/tasks/periodic.py).
+    nginx expone /api/catalog/ completo, así que exigen el header X-Internal-Token con el
+    valor de INTERNAL_API_TOKEN; si no está configurado, quedan cerradas.
+    """
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected or not x_internal_token or not hmac.compare_digest(x_internal_token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token."
+        )
@@ -1,95 +1,83 @@
-from fastapi import FastAPI
-from app.database import engine, Base, SessionLocal
-from app.models.category import Category
-from app.models.course import Course
-from app.models.module import Module
-from app.models.lesson import Lesson
+import logging
+import math
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.database import async_engine
+from app.seed import init_database
+from app.cache import response_cache_middleware
+from app.services import embeddings
 from app.routers import courses, categories, modules, lessons, progress, wishlist, reviews, trayectorias, quizzes, certification, announcements
 
-# Generate database tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-def seed_data():
-    db = SessionLocal()
+# Estado de arranque para /ready. /health sólo indica que el proceso está vivo.
+_startup = {"database": False, "error": None}
+
+def _initialize():
     try:
-        if db.query(Category).count() == 0:
-            backend = Category(name="Backend")
-            architecture = Category(name="Architecture")
-            db.add_all([backend, architecture])
-            db.flush()
-            
-            db.add_all([
-                Course(
-                    title="Python Fundamentals",
-                    description="From zero to backend basics",
-                    category_id=backend.id,
-                    price=100.0,
-                    status="PUBLISHED",
-                    nivel_dificultad="PRINCIPIANTE",
-                    duracion_horas=20,
-                    instructor_id=2
-                ),
-                Course(
-                    title="Flask for APIs",
-                    description="Design and build production APIs",
-                    category_id=backend.id,
-                    price=120.0,
-                    status="PUBLISHED",
-                    nivel_dificultad="INTERMEDIO",
-                    duracion_horas=25,
-                    instructor_id=2
-                ),
-                Course(
-                    title="Arquitectura de Microservicios",
-                    description="Patterns for scalable systems",
-                    category_id=architecture.id,
-                    price=150.0,
-                    status="PUBLISHED",
-                    nivel_dificultad="AVANZADO",
-                    duracion_horas=30,
-                    instructor_id=2
-                ),
-            ])
-            db.flush()
-            
-            all_courses = db.query(Course).all()
-            for course in all_courses:
-                m1 = Module(course_id=course.id, title=f"{course.title} - Module 1", sort_order=1)
-                m2 = Module(course_id=course.id, title=f"{course.title} - Module 2", sort_order=2)
-                db.add_all([m1, m2])
-                db.flush()
-                
-                # Seed lessons for each module
-                db.add_all([
-                    Lesson(module_id=m1.id, title="Introducción", content_type="TEXTO", content="Texto de introducción", sort_order=1, duration_minutes=10),
-                    Lesson(module_id=m1.id, title="Conceptos Clave", content_type="VIDEO", content="https://example.com/video1.mp4", sort_order=2, duration_minutes=20),
-                    Lesson(module_id=m2.id, title="Práctica Guiada", content_type="PRACTICA", content="Instrucciones del laboratorio", sort_order=1, duration_minutes=30),
-                    Lesson(module_id=m2.id, title="Quiz Final", content_type="QUIZ", content="Cuestionario de prueba", sort_order=2, duration_minutes=15),
-                ])
-            db.commit()
-        else:
-            # If categories exist, but lessons are missing, seed them for existing modules
-            if db.query(Lesson).count() == 0:
-                modules = db.query(Module).all()
-                for mod in modules:
-                    db.add_all([
-                        Lesson(module_id=mod.id, title="Introducción", content_type="TEXTO", content="Texto de introducción", sort_order=1, duration_minutes=10),
-                        Lesson(module_id=mod.id, title="Conceptos Clave", content_type="VIDEO", content="https://example.com/video1.mp4", sort_order=2, duration_minutes=20),
-                        Lesson(module_id=mod.id, title="Práctica Guiada", content_type="PRACTICA", content="Instrucciones del laboratorio", sort_order=1, duration_minutes=30),
-                        Lesson(module_id=mod.id, title="Quiz Final", content_type="QUIZ", content="Cuestionario de prueba", sort_order=2, duration_minutes=15),
-                    ])
-                db.commit()
-    finally:
-        db.close()
+        init_database()
+        _startup["database"] = True
+        if settings.EMBEDDING_WARMUP:
+            embeddings.warm_up()
+    except Exception as e:
+        _startup["error"] = str(e)
+        logger.error(f"Catalog startup failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # La BD y el modelo se preparan en segundo plano para no retrasar el arranque;
+    # el balanceador debe esperar a /ready antes de enviar tráfico.
+    threading.Thread(target=_initialize, daemon=True).start()
+    stop_flusher = threading.Event()
+    flusher = None
+    if settings.REDIS_URL:
+        # Vacía las lecciones completadas (con PROGRESS_WRITE_BEHIND) y los heartbeats de video
+        from app.services.progress_buffer import run_flusher
+        flusher = threading.Thread(target=run_flusher, args=(stop_flusher,), daemon=True)
+        flusher.start()
+    yield
+    # Vaciar el buffer de progreso, terminar los procesos de inferencia de embeddings y cerrar el pool async
+    if flusher is not None:
+        stop_flusher.set()
+        flusher.join(timeout=10)
+    embeddings.shutdown_pool()
+    await async_engine.dispose()
 
-seed_data()
+app = FastAPI(title="SkillForge Catalog Service", lifespan=lifespan)
+app.middleware("http")(response_cache_middleware)
 
-app = FastAPI(title="SkillForge Catalog Service")
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    # Un número como 1e999 llega como inf y no se puede devolver en el JSON del 422
+    errors = [
+        {k: v for k, v in error.items() if not (k == "input" and isinstance(v, float) and not math.isfinite(v))}
+        for error in exc.errors()
+    ]
+    return JSONResponse({"detail": jsonable_encoder(errors)}, status_code=422)
 
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "catalog-service"}
 
+@app.get("/ready")
+def ready():
+    checks = {
+        "database": _startup["database"],
+        "embeddings": embeddings.is_ready() if settings.EMBEDDING_WARMUP else "lazy",
+    }
+    if _startup["error"]:
+        # La inicialización no se reintenta: el orquestador debe reiniciar el contenedor
+        body = {"status": "error", "service": "catalog-service", "checks": checks, "error": _startup["error"]}
+        return JSONResponse(body, status_code=503)
+    is_ready = checks["database"] and checks["embeddings"] is not False
+    body = {"status": "ready" if is_ready else "starting", "service": "catalog-service", "checks": checks}
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
 # Standard API catalog endpoints (with prefix)
 app.include_router(courses.router, prefix="/api/catalog", tags=["courses"])
 app.include_router(categories.router, prefix="/api/catalog", tags=["categories"])
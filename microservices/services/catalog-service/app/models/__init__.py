@@ -3,12 +3,13 @@ from app.models.category import Category
 from app.models.course import Course
 from app.models.module import Module
 from app.models.lesson import Lesson
-from app.models.progress import LessonProgress
+from app.models.progress import LessonProgress, CertificationProgress
 from app.models.rating import Rating
 from app.models.wishlist import WishlistItem
 from app.models.trayectoria import Trayectoria, TrayectoriaCurso
 from app.models.announcement import Announcement
+from app.models.search import CourseSearchTerm
 
-__all__ = ["Base", "Category", "Course", "Module", "Lesson", "LessonProgress", "Rating", "WishlistItem", "Trayectoria", "TrayectoriaCurso", "Announcement"]
+__all__ = ["Base", "Category", "Course", "Module", "Lesson", "LessonProgress", "CertificationProgress", "Rating", "WishlistItem", "Trayectoria", "TrayectoriaCurso", "Announcement", "CourseSearchTerm"]
 
 from app.models.quiz import Quiz, QuizQuestion, QuizOption, QuizAttempt, QuizAttemptAnswer
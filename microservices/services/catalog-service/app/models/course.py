@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, Boolean, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.database import Base
 
 class Course(Base):
@@ -15,8 +16,24 @@ class Course(Base):
     instructor_id = Column(Integer, nullable=False)
     es_certificacion = Column(Boolean, nullable=False, default=False)
     imagen_url = Column(String(500), nullable=True)
+    # Agregados de ratings mantenidos en escritura (app/services/ratings.py)
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_avg = Column(Float, nullable=False, default=0.0, server_default="0")
+    rating_hist_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_hist_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_hist_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_hist_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_hist_5 = Column(Integer, nullable=False, default=0, server_default="0")
+    # Documento de búsqueda (tsvector en PostgreSQL); ver app/services/search.py
+    search_document = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), nullable=True))
 
     category = relationship("Category", back_populates="courses")
-    modules = relationship("Module", back_populates="course", cascade="all, delete-orphan")
+    modules = relationship("Module", back_populates="course", cascade="all, delete-orphan", order_by="[Module.sort_order, Module.id]")
     ratings = relationship("Rating", back_populates="course", cascade="all, delete-orphan")
     wishlist_items = relationship("WishlistItem", back_populates="course", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_courses_search_document", "search_document", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_courses_status_rating", "status", "rating_avg", "id"),
+    )
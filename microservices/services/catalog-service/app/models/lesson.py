@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -14,3 +14,5 @@ class Lesson(Base):
 
     module = relationship("Module", back_populates="lessons")
     progress_items = relationship("LessonProgress", back_populates="lesson", cascade="all, delete-orphan")
+
+    __table_args__ = (Index("ix_lessons_module_sort", "module_id", "sort_order", "id"),)
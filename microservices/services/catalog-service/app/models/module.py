@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -12,4 +12,6 @@ class Module(Base):
     es_examen_final = Column(Boolean, nullable=False, default=False)
 
     course = relationship("Course", back_populates="modules")
-    lessons = relationship("Lesson", back_populates="module", cascade="all, delete-orphan")
+    lessons = relationship("Lesson", back_populates="module", cascade="all, delete-orphan", order_by="[Lesson.sort_order, Lesson.id]")
+
+    __table_args__ = (Index("ix_modules_course_sort", "course_id", "sort_order", "id"),)
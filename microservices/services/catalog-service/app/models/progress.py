@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, UniqueConstraint, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -10,7 +10,26 @@ class LessonProgress(Base):
     lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False, index=True)
     completed = Column(Boolean, default=False)
     completed_at = Column(DateTime, nullable=True)
+    # Última posición de reproducción de las lecciones VIDEO (reanudar donde se quedó)
+    position_seconds = Column(Integer, nullable=True)
+    position_updated_at = Column(DateTime, nullable=True)
 
     lesson = relationship("Lesson", back_populates="progress_items")
 
     __table_args__ = (UniqueConstraint('user_id', 'lesson_id', name='_user_lesson_uc'),)
+
+class CertificationProgress(Base):
+    """
+    Estado de avance de un usuario en un curso de certificación, mantenido de forma
+    incremental al completar lecciones. Se descarta cuando cambia la estructura del
+    curso y se reconstruye en la siguiente lectura.
+    """
+    __tablename__ = "certification_progress"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+    completed_module_ids = Column(JSON, nullable=False, default=list)
+    locked_module_ids = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint('user_id', 'course_id', name='_user_course_cert_uc'),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey, DateTime, LargeBinary, false
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -9,7 +9,13 @@ class Quiz(Base):
     lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False, unique=True, index=True)
     titulo = Column(String(200), nullable=False)
     puntaje_minimo_aprobacion = Column(Float, nullable=False, default=60.0)
-    questions = relationship("QuizQuestion", back_populates="quiz", cascade="all, delete-orphan", order_by="QuizQuestion.sort_order")
+    # Se incrementa en cada edición; invalida el quiz compilado cacheado en cada worker
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Sólo preguntas vigentes; las archivadas se conservan por el historial de intentos
+    questions = relationship(
+        "QuizQuestion", back_populates="quiz", cascade="all, delete-orphan", order_by="QuizQuestion.sort_order",
+        primaryjoin="and_(Quiz.id == QuizQuestion.quiz_id, QuizQuestion.archivada == False)",
+    )
     # Para acceder al lesson original si lo necesitamos
     # lesson = relationship("Lesson", back_populates="quiz") # Asumiendo que no tocamos Lesson, lo dejamos sin back_populates
 
@@ -22,10 +28,15 @@ class QuizQuestion(Base):
     puntaje = Column(Float, nullable=False, default=1.0)
     sort_order = Column(Integer, nullable=False, default=1)
     respuesta_esperada = Column(Text, nullable=True)  # solo ABIERTA
-    respuesta_esperada_embedding = Column(JSON, nullable=True)  # solo ABIERTA
-    
+    respuesta_esperada_embedding = Column(LargeBinary, nullable=True)  # solo ABIERTA, float32 normalizado
+    # Quitada del quiz pero referenciada por respuestas de intentos anteriores
+    archivada = Column(Boolean, nullable=False, default=False, server_default=false())
+
     quiz = relationship("Quiz", back_populates="questions")
-    options = relationship("QuizOption", back_populates="question", cascade="all, delete-orphan")
+    options = relationship(
+        "QuizOption", back_populates="question", cascade="all, delete-orphan",
+        primaryjoin="and_(QuizQuestion.id == QuizOption.question_id, QuizOption.archivada == False)",
+    )
 
 class QuizOption(Base):
     __tablename__ = "quiz_options"
@@ -33,6 +44,7 @@ class QuizOption(Base):
     question_id = Column(Integer, ForeignKey("quiz_questions.id"), nullable=False, index=True)
     texto = Column(String(500), nullable=False)
     es_correcta = Column(Boolean, nullable=False, default=False)
+    archivada = Column(Boolean, nullable=False, default=False, server_default=false())
     
     question = relationship("QuizQuestion", back_populates="options")
 
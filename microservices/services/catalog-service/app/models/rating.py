@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -14,4 +14,7 @@ class Rating(Base):
 
     course = relationship("Course", back_populates="ratings")
 
-    __table_args__ = (UniqueConstraint('user_id', 'course_id', name='_user_course_rating_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'course_id', name='_user_course_rating_uc'),
+        Index('ix_ratings_course_created', 'course_id', 'created_at', 'id'),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from app.database import Base
+
+class CourseSearchTerm(Base):
+    """Índice invertido (término -> curso) usado cuando la BD no es PostgreSQL."""
+    __tablename__ = "course_search_terms"
+    id = Column(Integer, primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+    term = Column(String(64), nullable=False)
+    weight = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (Index("ix_course_search_terms_term_course", "term", "course_id"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -12,4 +12,7 @@ class WishlistItem(Base):
 
     course = relationship("Course", back_populates="wishlist_items")
 
-    __table_args__ = (UniqueConstraint('user_id', 'course_id', name='_user_course_wishlist_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'course_id', name='_user_course_wishlist_uc'),
+        Index('ix_wishlist_items_user_added', 'user_id', 'added_at', 'id'),
+    )
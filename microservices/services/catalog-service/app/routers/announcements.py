@@ -5,6 +5,7 @@ from app.database import get_db
 from app.models.announcement import Announcement
 from app.schemas.catalog import AnnouncementCreate, AnnouncementOut
 from app.dependencies.auth import get_current_user, UserPayload
+from app.cache import response_cache
 
 router = APIRouter()
 
@@ -31,6 +32,7 @@ def create_announcement(
     announcement = Announcement(**payload.model_dump())
     db.add(announcement)
     db.commit()
+    response_cache.invalidate("announcements")
     db.refresh(announcement)
     return announcement
 
@@ -50,6 +52,7 @@ def update_announcement(
     for key, value in payload.model_dump().items():
         setattr(announcement, key, value)
     db.commit()
+    response_cache.invalidate("announcements")
     db.refresh(announcement)
     return announcement
 
@@ -67,3 +70,4 @@ def delete_announcement(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anuncio no encontrado.")
     db.delete(announcement)
     db.commit()
+    response_cache.invalidate("announcements")
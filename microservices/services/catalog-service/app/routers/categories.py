@@ -1,26 +1,17 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.category import Category
 from app.schemas.catalog import CategoryOut
+from shared.pagination import PageParams, paginate_async
 
 router = APIRouter()
 
 @router.get("/categories")
-def list_categories(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+async def list_categories(
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Category).order_by(Category.id.asc())
-    total = query.count()
-    start = (page - 1) * page_size
-    results = query.offset(start).limit(page_size).all()
-    
-    end = start + page_size
-    return {
-        "count": total,
-        "next": page + 1 if end < total else None,
-        "previous": page - 1 if page > 1 else None,
-        "results": [CategoryOut.from_orm(r) for r in results]
-    }
+    query = select(Category)
+    return await paginate_async(db, query, params, [(Category.id, False)], CategoryOut.from_orm)
@@ -27,6 +27,8 @@ def get_certification_progress(
         )
         
     module_status = get_module_status(db, current_user.id, course)
+    # Guarda el estado si get_module_status tuvo que reconstruirlo
+    db.commit()
     
     # Determinar si el certificado está disponible
     certificado_disponible = False
@@ -1,56 +1,59 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional, List
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.course import Course
 from app.models.module import Module
 from app.models.lesson import Lesson
-from app.models.rating import Rating
 from app.schemas.catalog import CourseOut, CourseDetailOut, ModuleOut, ModuleWithLessons, CourseCreate, ModuleCreate, LessonCreate, LessonOut
 from app.dependencies.auth import get_current_user, UserPayload
+from app.services import search, ratings, certification_progress
+from app.services.course_events import publish_course_event, COURSE_CREATED, COURSE_UPDATED
+from app.cache import response_cache
+from shared.pagination import PageParams, paginate_async
 
 router = APIRouter()
 
 @router.get("/courses")
-def list_courses(
+async def list_courses(
   q: Optional[str] = Query(None),
   categoria: Optional[int] = Query(None),
-  page: int = Query(1, ge=1),
-  page_size: int = Query(20, ge=1, le=100),
-  db: Session = Depends(get_db)
+  sort: Optional[str] = Query(None, pattern="^rating$"),
+  params: PageParams = Depends(),
+  db: AsyncSession = Depends(get_async_db)
 ):
-  query = db.query(Course).filter(Course.status == "PUBLISHED")
+  query = select(Course).filter(Course.status == "PUBLISHED")
   
-  if q:
-    query = query.filter(Course.title.ilike(f"%{q}%"))
   if categoria:
     query = query.filter(Course.category_id == categoria)
     
-  query = query.order_by(Course.id.asc())
-  total = query.count()
-  start = (page - 1) * page_size
-  results = query.offset(start).limit(page_size).all()
+  keys = [(Course.id, False)]
+  if q:
+    query, rank = search.apply_search(db, query, q)
+    if rank is not None:
+      keys = [(rank, True), (Course.id, False)]
+  if sort == "rating":
+    keys = [(Course.rating_avg, True), (Course.id, False)]
   
-  end = start + page_size
-  return {
-    "count": total,
-    "next": page + 1 if end < total else None,
-    "previous": page - 1 if page > 1 else None,
-    "results": [
-      {
-        "id": r.id,
-        "title": r.title,
-        "description": r.description,
-        "category_id": r.category_id,
-        "price": r.price,
-        "status": r.status,
-        "nivel_dificultad": r.nivel_dificultad,
-        "duracion_horas": r.duracion_horas,
-        "instructor_id": r.instructor_id
-      } for r in results
-    ]
-  }
+  return await paginate_async(db, query, params, keys, lambda r: {
+    "id": r.id,
+    "title": r.title,
+    "description": r.description,
+    "category_id": r.category_id,
+    "price": r.price,
+    "status": r.status,
+    "nivel_dificultad": r.nivel_dificultad,
+    "duracion_horas": r.duracion_horas,
+    "instructor_id": r.instructor_id,
+    "rating_count": r.rating_count,
+    "average_rating": r.rating_avg,
+    **({"highlight": {
+      "title": search.highlight(r.title, q),
+      "description": search.highlight(r.description, q)
+    }} if q else {})
+  })
 
 @router.post("/courses", response_model=CourseOut, status_code=status.HTTP_201_CREATED)
 def create_course(
@@ -85,35 +88,35 @@ def create_course(
         es_certificacion=course_in.es_certificacion
     )
     db.add(new_course)
+    search.index_course(db, new_course)
     db.commit()
+    response_cache.invalidate("courses")
     db.refresh(new_course)
+    publish_course_event(COURSE_CREATED, new_course)
     return new_course
 
 @router.get("/my-courses", response_model=List[CourseOut])
-def get_my_courses(current_user: UserPayload = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_my_courses(current_user: UserPayload = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     if current_user.role not in ["instructor", "admin", "INSTRUCTOR", "ADMINISTRADOR"]:
         raise HTTPException(status_code=403, detail="Not authorized")
-    return db.query(Course).filter(Course.instructor_id == current_user.id).all()
+    return (await db.scalars(select(Course).filter(Course.instructor_id == current_user.id))).all()
 
 @router.get("/courses/{course_id}", response_model=CourseDetailOut)
-def get_course_detail(course_id: int, db: Session = Depends(get_db)):
-  course = db.query(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").first()
+async def get_course_detail(course_id: int, db: AsyncSession = Depends(get_async_db)):
+  # Los agregados de rating viven en la fila del curso; módulos y lecciones con selectinload
+  # (una consulta IN por nivel), así el número de consultas no depende de los módulos.
+  course = await db.scalar(
+    select(Course)
+    .options(selectinload(Course.modules).selectinload(Module.lessons))
+    .filter(Course.id == course_id, Course.status == "PUBLISHED")
+    .limit(1)
+  )
   if not course:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="Course not found."
     )
   
-  modules = db.query(Module).filter(Module.course_id == course.id).order_by(Module.sort_order.asc()).all()
-  
-  rating_stats = db.query(
-    func.count(Rating.id).label("count"),
-    func.avg(Rating.score).label("average")
-  ).filter(Rating.course_id == course.id).first()
-  
-  rating_count = rating_stats.count or 0
-  average_rating = float(rating_stats.average or 0.0)
-  
   return CourseDetailOut(
     id=course.id,
     title=course.title,
@@ -124,37 +127,27 @@ def get_course_detail(course_id: int, db: Session = Depends(get_db)):
     nivel_dificultad=course.nivel_dificultad,
     duracion_horas=course.duracion_horas,
     instructor_id=course.instructor_id,
-    modules=[ModuleWithLessons.from_orm(m) for m in modules],
-    rating_count=rating_count,
-    average_rating=average_rating
+    modules=[ModuleWithLessons.from_orm(m) for m in course.modules],
+    rating_count=course.rating_count,
+    average_rating=course.rating_avg,
+    rating_histogram=ratings.histogram(course)
   )
 
 @router.get("/courses/{course_id}/modules")
-def get_course_modules(
+async def get_course_modules(
   course_id: int,
-  page: int = Query(1, ge=1),
-  page_size: int = Query(20, ge=1, le=100),
-  db: Session = Depends(get_db)
+  params: PageParams = Depends(),
+  db: AsyncSession = Depends(get_async_db)
 ):
-  course = db.query(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").first()
+  course = await db.scalar(select(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").limit(1))
   if not course:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="Course not found."
     )
     
-  query = db.query(Module).filter(Module.course_id == course.id).order_by(Module.sort_order.asc())
-  total = query.count()
-  start = (page - 1) * page_size
-  results = query.offset(start).limit(page_size).all()
-  
-  end = start + page_size
-  return {
-    "count": total,
-    "next": page + 1 if end < total else None,
-    "previous": page - 1 if page > 1 else None,
-    "results": [ModuleOut.from_orm(m) for m in results]
-  }
+  query = select(Module).filter(Module.course_id == course.id)
+  return await paginate_async(db, query, params, [(Module.sort_order, False), (Module.id, False)], ModuleOut.from_orm)
 
 @router.put("/courses/{course_id}", response_model=CourseOut)
 def update_course(
@@ -172,8 +165,12 @@ def update_course(
     for var, value in vars(course_in).items():
         setattr(course, var, value) if value is not None else None
         
+    certification_progress.invalidate_course(db, course.id)
+    search.index_course(db, course)
     db.commit()
+    response_cache.invalidate("courses")
     db.refresh(course)
+    publish_course_event(COURSE_UPDATED, course)
     return course
 
 @router.post("/courses/{course_id}/modules", response_model=ModuleOut, status_code=status.HTTP_201_CREATED)
@@ -197,7 +194,9 @@ def create_module(
         es_examen_final=module_in.es_examen_final
     )
     db.add(new_module)
+    certification_progress.invalidate_course(db, course_id)
     db.commit()
+    response_cache.invalidate("courses")
     db.refresh(new_module)
     return new_module
 
@@ -224,7 +223,10 @@ def create_lesson(
         duration_minutes=lesson_in.duration_minutes
     )
     db.add(new_lesson)
+    certification_progress.invalidate_course(db, course.id)
+    search.index_course(db, course)
     db.commit()
+    response_cache.invalidate("courses")
     db.refresh(new_lesson)
     return new_lesson
 
@@ -244,7 +246,10 @@ def delete_module(
         raise HTTPException(status_code=404, detail="Module not found")
         
     db.delete(module)
+    certification_progress.invalidate_course(db, course_id)
+    search.index_course(db, course)
     db.commit()
+    response_cache.invalidate("courses")
 
 @router.delete("/modules/{module_id}/lessons/{lesson_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_lesson(
@@ -265,4 +270,7 @@ def delete_lesson(
         raise HTTPException(status_code=404, detail="Lesson not found")
         
     db.delete(lesson)
+    certification_progress.invalidate_course(db, course.id)
+    search.index_course(db, course)
     db.commit()
+    response_cache.invalidate("courses")
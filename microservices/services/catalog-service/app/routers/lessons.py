@@ -1,13 +1,15 @@
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+from app.config import settings
 from app.database import get_db
 from app.models.lesson import Lesson
 from app.models.progress import LessonProgress
 from app.models.course import Course
 from app.models.module import Module
 from app.dependencies.auth import get_current_user, UserPayload
-from app.schemas.catalog import LessonProgressOut
+from app.schemas.catalog import LessonHeartbeatIn, LessonPositionOut, LessonProgressOut
+from app.services.progress import record_watch_positions, upsert_lesson_completion
 
 router = APIRouter()
 
@@ -17,6 +19,10 @@ def complete_lesson(
     db: Session = Depends(get_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
+    """
+    Idempotente: repetir la llamada (doble clic, reproductor que reintenta) no crea
+    filas nuevas ni cambia la fecha de la primera vez que se completó.
+    """
     lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
     if not lesson:
         raise HTTPException(
@@ -26,32 +32,73 @@ def complete_lesson(
         
     course = db.query(Course).join(Module).filter(Module.id == lesson.module_id).first()
     if course and course.es_certificacion:
-        from app.services.certification_progress import get_module_status
-        module_status = get_module_status(db, current_user.id, course)
-        modulo_actual = next((m for m in module_status if m["module_id"] == lesson.module_id), None)
-        if modulo_actual and modulo_actual.get("bloqueado"):
+        from app.services.certification_progress import is_module_locked
+        locked = is_module_locked(db, current_user.id, course, lesson.module_id)
+        # Guarda el estado de certificación si hubo que reconstruirlo
+        db.commit()
+        if locked:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Debes aprobar el examen del módulo anterior para acceder a esta lección."
             )
-            
+    elif settings.PROGRESS_WRITE_BEHIND:
+        # Los cursos de certificación escriben directo: sus bloqueos dependen del estado en BD
+        from app.services.progress_buffer import progress_buffer
+        completed_at = progress_buffer.add(current_user.id, lesson_id)
+        if completed_at is not None:
+            return LessonProgressOut(user_id=current_user.id, lesson_id=lesson_id, completed=True, completed_at=completed_at)
+
+    upsert_lesson_completion(db, current_user.id, lesson_id)
+    db.commit()
+    return db.query(LessonProgress).filter(
+        LessonProgress.user_id == current_user.id,
+        LessonProgress.lesson_id == lesson_id
+    ).one()
+
+@router.post("/lessons/{lesson_id}/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+def lesson_heartbeat(
+    lesson_id: int,
+    payload: LessonHeartbeatIn,
+    db: Session = Depends(get_db),
+    current_user: UserPayload = Depends(get_current_user)
+):
+    """
+    Posición de reproducción de una lección VIDEO, enviada periódicamente por el
+    reproductor. Con Redis es un solo HSET y no toca la BD: el flush en segundo plano
+    escribe la última posición y completa la lección al llegar a VIDEO_COMPLETION_RATIO.
+    Los heartbeats de lecciones que no son VIDEO se descartan en el flush.
+    """
+    from app.services.progress_buffer import progress_buffer
+    if not progress_buffer.add_position(current_user.id, lesson_id, payload.position_seconds, payload.duration_seconds):
+        record_watch_positions(db, [{
+            "user_id": current_user.id,
+            "lesson_id": lesson_id,
+            "position_seconds": payload.position_seconds,
+            "duration_seconds": payload.duration_seconds,
+            "updated_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        }])
+        db.commit()
+    return None
+
+@router.get("/lessons/{lesson_id}/position", response_model=LessonPositionOut)
+def get_lesson_position(
+    lesson_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserPayload = Depends(get_current_user)
+):
+    """Dónde reanudar la lección: la posición pendiente en Redis o la guardada en BD."""
+    from app.services.progress_buffer import progress_buffer
     progress = db.query(LessonProgress).filter(
         LessonProgress.user_id == current_user.id,
         LessonProgress.lesson_id == lesson_id
     ).first()
-    
-    if progress:
-        progress.completed = True
-        progress.completed_at = datetime.now(timezone.utc)
+    pending = progress_buffer.pending_position(current_user.id, lesson_id)
+    if pending is not None:
+        position = int(pending)
     else:
-        progress = LessonProgress(
-            user_id=current_user.id,
-            lesson_id=lesson_id,
-            completed=True,
-            completed_at=datetime.now(timezone.utc)
-        )
-        db.add(progress)
-        
-    db.commit()
-    db.refresh(progress)
-    return progress
+        position = (progress.position_seconds if progress else None) or 0
+    return LessonPositionOut(
+        lesson_id=lesson_id,
+        position_seconds=position,
+        completed=bool(progress and progress.completed)
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.module import Module
@@ -6,14 +6,16 @@ from app.models.lesson import Lesson
 from app.models.course import Course
 from app.schemas.catalog import LessonOut, ModuleCreate, ModuleOut
 from app.dependencies.auth import get_current_user, UserPayload
+from shared.pagination import PageParams, paginate
+from app.cache import response_cache
+from app.services import certification_progress
 
 router = APIRouter()
 
 @router.get("/modules/{module_id}/lessons")
 def get_module_lessons(
     module_id: int,
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+    params: PageParams = Depends(),
     db: Session = Depends(get_db)
 ):
     module = db.query(Module).filter(Module.id == module_id).first()
@@ -23,18 +25,8 @@ def get_module_lessons(
             detail="Module not found."
         )
         
-    query = db.query(Lesson).filter(Lesson.module_id == module.id).order_by(Lesson.sort_order.asc())
-    total = query.count()
-    start = (page - 1) * page_size
-    results = query.offset(start).limit(page_size).all()
-    
-    end = start + page_size
-    return {
-        "count": total,
-        "next": page + 1 if end < total else None,
-        "previous": page - 1 if page > 1 else None,
-        "results": [LessonOut.from_orm(l) for l in results]
-    }
+    query = db.query(Lesson).filter(Lesson.module_id == module.id)
+    return paginate(query, params, [(Lesson.sort_order, False), (Lesson.id, False)], LessonOut.from_orm)
 
 @router.put("/courses/{course_id}/modules/{module_id}", response_model=ModuleOut)
 def update_module(
@@ -59,7 +51,9 @@ def update_module(
     module.sort_order = payload.sort_order
     module.es_examen_modulo = payload.es_examen_modulo
     module.es_examen_final = payload.es_examen_final
+    certification_progress.invalidate_course(db, course.id)
     
     db.commit()
+    response_cache.invalidate("courses")
     db.refresh(module)
     return module
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
 from app.models.course import Course
 from app.models.module import Module
 from app.models.lesson import Lesson
@@ -10,57 +14,141 @@ from app.schemas.catalog import CourseProgressOut
 
 router = APIRouter()
 
+MAX_SNAPSHOT_COURSES = 200
+
+async def _add_buffered_completions(db: AsyncSession, user_id: int, completed_by_course: dict) -> None:
+    """Suma las lecciones completadas que siguen en el buffer de escritura diferida."""
+    if not settings.PROGRESS_WRITE_BEHIND:
+        return
+    from app.services.progress_buffer import progress_buffer
+    pending = await run_in_threadpool(progress_buffer.pending_lessons, user_id)
+    if not pending:
+        return
+    rows = await db.execute(select(Module.course_id, Lesson.id).join(Lesson, Lesson.module_id == Module.id).filter(
+        Lesson.id.in_(pending), Module.course_id.in_(list(completed_by_course))
+    ))
+    for course_id, lesson_id in rows:
+        if lesson_id not in completed_by_course[course_id]:
+            completed_by_course[course_id].append(lesson_id)
+    for completed_ids in completed_by_course.values():
+        completed_ids.sort()
+
+async def _course_progress(db: AsyncSession, user_id: int, courses: list) -> list[CourseProgressOut]:
+    """
+    Progreso del usuario en varios cursos con un número fijo de consultas agrupadas:
+    total de lecciones por curso (COUNT ... GROUP BY), lecciones completadas y, para
+    los cursos de certificación, el estado persistido del examen final.
+    """
+    course_ids = [c.id for c in courses]
+    if not course_ids:
+        return []
+
+    totals = dict((await db.execute(
+        select(Module.course_id, func.count(Lesson.id))
+        .join(Lesson, Lesson.module_id == Module.id)
+        .filter(Module.course_id.in_(course_ids))
+        .group_by(Module.course_id)
+    )).all())
+    completed_by_course = {course_id: [] for course_id in course_ids}
+    completed_rows = await db.execute(
+        select(Module.course_id, LessonProgress.lesson_id)
+        .join(Lesson, Lesson.module_id == Module.id)
+        .join(LessonProgress, LessonProgress.lesson_id == Lesson.id)
+        .filter(
+            Module.course_id.in_(course_ids),
+            LessonProgress.user_id == user_id,
+            LessonProgress.completed == True
+        )
+        .order_by(LessonProgress.lesson_id)
+    )
+    for course_id, lesson_id in completed_rows:
+        completed_by_course[course_id].append(lesson_id)
+    await _add_buffered_completions(db, user_id, completed_by_course)
+
+    final_approved = {}
+    certification_ids = [c.id for c in courses if c.es_certificacion]
+    if certification_ids:
+        # El estado de certificación es código sync; si hubo que reconstruirlo se guarda aquí
+        from app.services.certification_progress import final_exam_approved
+        final_approved = await db.run_sync(final_exam_approved, user_id, certification_ids)
+        await db.commit()
+
+    result = []
+    for course_id in course_ids:
+        total_lessons = totals.get(course_id, 0)
+        completed_ids = completed_by_course[course_id]
+        if total_lessons == 0:
+            result.append(CourseProgressOut(
+                course_id=course_id,
+                total_lessons=0,
+                completed_lessons=0,
+                percentage=0.0,
+                completed=False,
+                completed_lesson_ids=[]
+            ))
+            continue
+
+        completed_progress_count = len(completed_ids)
+        completed = completed_progress_count == total_lessons
+        if final_approved.get(course_id) is not None:
+            completed = completed and final_approved[course_id]
+        result.append(CourseProgressOut(
+            course_id=course_id,
+            total_lessons=total_lessons,
+            completed_lessons=completed_progress_count,
+            percentage=round((completed_progress_count / total_lessons) * 100, 2),
+            completed=completed,
+            completed_lesson_ids=completed_ids
+        ))
+    return result
+
+@router.get("/progress", response_model=List[CourseProgressOut])
+async def get_progress_snapshot(
+    course_ids: Optional[str] = Query(None, description="Ids separados por coma; si se omite, los cursos con actividad del usuario"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPayload = Depends(get_current_user)
+):
+    """
+    Progreso de varios cursos en una sola petición (p. ej. el dashboard del estudiante).
+    Los cursos inexistentes o no publicados se omiten.
+    """
+    if course_ids is None:
+        # Las inscripciones viven en transactions-service; aquí sólo se conoce la actividad
+        ids = list(await db.scalars(
+            select(Module.course_id)
+            .join(Lesson, Lesson.module_id == Module.id)
+            .join(LessonProgress, LessonProgress.lesson_id == Lesson.id)
+            .filter(LessonProgress.user_id == current_user.id)
+            .distinct()
+        ))
+    else:
+        try:
+            ids = list(dict.fromkeys(int(i) for i in course_ids.split(",") if i.strip()))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="course_ids must be comma-separated integers.")
+    if len(ids) > MAX_SNAPSHOT_COURSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_SNAPSHOT_COURSES} courses per request."
+        )
+
+    courses = (await db.execute(
+        select(Course.id, Course.es_certificacion).filter(Course.id.in_(ids), Course.status == "PUBLISHED")
+    )).all()
+    order = {course_id: i for i, course_id in enumerate(ids)}
+    return await _course_progress(db, current_user.id, sorted(courses, key=lambda c: order[c.id]))
+
 @router.get("/courses/{course_id}/progress", response_model=CourseProgressOut)
-def get_course_progress(
+async def get_course_progress(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
-    course = db.query(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").first()
+    course = await db.scalar(select(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").limit(1))
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found."
         )
-        
-    # Get all lessons in this course
-    lessons = db.query(Lesson).join(Module).filter(Module.course_id == course_id).all()
-    lesson_ids = [l.id for l in lessons]
-    
-    total_lessons = len(lesson_ids)
-    if total_lessons == 0:
-        return CourseProgressOut(
-            course_id=course_id,
-            total_lessons=0,
-            completed_lessons=0,
-            percentage=0.0,
-            completed=False,
-            completed_lesson_ids=[]
-        )
-        
-    completed_progress = db.query(LessonProgress.lesson_id).filter(
-        LessonProgress.user_id == current_user.id,
-        LessonProgress.lesson_id.in_(lesson_ids),
-        LessonProgress.completed == True
-    ).all()
-    completed_ids = [p[0] for p in completed_progress]
-    
-    completed_progress_count = len(completed_ids)
-    percentage = round((completed_progress_count / total_lessons) * 100, 2)
-    completed = completed_progress_count == total_lessons
-    
-    if course.es_certificacion:
-        from app.services.certification_progress import get_module_status
-        module_status = get_module_status(db, current_user.id, course)
-        modulo_final = next((m for m in module_status if m.get("es_examen_final")), None)
-        if modulo_final:
-            completed = completed and (modulo_final.get("aprobado") is True)
-    
-    return CourseProgressOut(
-        course_id=course_id,
-        total_lessons=total_lessons,
-        completed_lessons=completed_progress_count,
-        percentage=percentage,
-        completed=completed,
-        completed_lesson_ids=completed_ids
-    )
+
+    return (await _course_progress(db, current_user.id, [course]))[0]
@@ -1,75 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, bulk_insert_ids
 from app.dependencies.auth import get_current_user, UserPayload
+from app.dependencies.internal import require_internal_token
 from app.models.lesson import Lesson
-from app.models.quiz import Quiz, QuizQuestion, QuizOption, QuizAttempt, QuizAttemptAnswer
+from app.models.quiz import Quiz, QuizAttempt, QuizAttemptAnswer
 from app.schemas.quiz import (
     QuizCreate, QuizDetailOut, QuizDetailInstructorOut, 
-    QuizAttemptSubmit, QuizAttemptResultOut
+    QuizAttemptSubmit, QuizAttemptResultOut, QuizImportResultOut
+)
+from app.services.progress import upsert_lesson_completion
+from app.services.embeddings import aget_embeddings, cache_stats, EmbeddingQueueFull
+from app.services.quiz_authoring import (
+    QuizImportError, embed_expected_answers, expected_embeddings, insert_questions,
+    sync_questions, load_quiz_detail, parse_questions_csv,
 )
-from app.services.embeddings import get_embedding
-from app.services.quiz_grading import calificar_intento
 from app.models.course import Course
 from app.models.module import Module
 
 router = APIRouter()
 
-@router.post("/lessons/{lesson_id}/quiz", response_model=QuizDetailInstructorOut)
-def create_quiz(lesson_id: int, payload: QuizCreate, db: Session = Depends(get_db), current_user: UserPayload = Depends(get_current_user)):
-    if current_user.role not in ["admin", "instructor"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    
+def _grading_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Grading service is busy, please retry shortly.",
+        headers={"Retry-After": "5"},
+    )
+
+def _embed_expected_answers(questions, known: Optional[dict] = None) -> list:
+    try:
+        return embed_expected_answers(questions, known)
+    except EmbeddingQueueFull:
+        raise _grading_busy()
+
+def _get_quiz_lesson(db: Session, lesson_id: int) -> Lesson:
     lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
         
     if lesson.content_type != "QUIZ":
         raise HTTPException(status_code=400, detail="Lesson content_type must be QUIZ")
+    return lesson
+
+def _apply_quiz_update(db: Session, quiz: Quiz, payload: QuizCreate) -> dict:
+    """
+    Aplica la edición como diff en la transacción actual: sólo se recalculan los
+    embeddings de respuestas esperadas nuevas y la versión sube sólo si algo cambió.
+    """
+    embeddings = _embed_expected_answers(payload.questions, expected_embeddings(db, quiz.id))
+    try:
+        summary = sync_questions(db, quiz.id, payload.questions, embeddings)
+    except QuizImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    grading_changed = quiz.puntaje_minimo_aprobacion != payload.puntaje_minimo_aprobacion
+    quiz.titulo = payload.titulo
+    quiz.puntaje_minimo_aprobacion = payload.puntaje_minimo_aprobacion
+    if grading_changed or summary["inserted"] or summary["updated"] or summary["deleted"] or summary["archived"]:
+        quiz.version = Quiz.version + 1
+    return summary
+
+def _quiz_added(db: Session, lesson: Lesson) -> None:
+    """Un quiz nuevo cambia cuándo se aprueba un módulo de examen: se descartan los estados del curso."""
+    from app.services.certification_progress import invalidate_course
+    invalidate_course(db, db.query(Module.course_id).filter(Module.id == lesson.module_id).scalar())
+
+def _after_quiz_change(quiz_id: int) -> None:
+    from app.services.quiz_grading import invalidate_compiled_quiz
+    invalidate_compiled_quiz(quiz_id)
+
+@router.post("/lessons/{lesson_id}/quiz", response_model=QuizDetailInstructorOut)
+def create_quiz(lesson_id: int, payload: QuizCreate, db: Session = Depends(get_db), current_user: UserPayload = Depends(get_current_user)):
+    if current_user.role not in ["admin", "instructor"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    
+    lesson = _get_quiz_lesson(db, lesson_id)
 
     existing_quiz = db.query(Quiz).filter(Quiz.lesson_id == lesson_id).first()
     if existing_quiz:
         raise HTTPException(status_code=400, detail="Lesson already has a quiz")
 
+    embeddings = _embed_expected_answers(payload.questions)
     quiz = Quiz(
         lesson_id=lesson_id,
         titulo=payload.titulo,
         puntaje_minimo_aprobacion=payload.puntaje_minimo_aprobacion
     )
     db.add(quiz)
+    db.flush()
+    insert_questions(db, quiz.id, payload.questions, embeddings)
+    _quiz_added(db, lesson)
     db.commit()
-    db.refresh(quiz)
-
-    for q_data in payload.questions:
-        q_embedding = None
-        if q_data.tipo == "ABIERTA" and q_data.respuesta_esperada:
-            q_embedding = get_embedding(q_data.respuesta_esperada)
-            
-        question = QuizQuestion(
-            quiz_id=quiz.id,
-            tipo=q_data.tipo,
-            enunciado=q_data.enunciado,
-            puntaje=q_data.puntaje,
-            sort_order=q_data.sort_order,
-            respuesta_esperada=q_data.respuesta_esperada,
-            respuesta_esperada_embedding=q_embedding
-        )
-        db.add(question)
-        db.commit()
-        db.refresh(question)
-
-        if q_data.options:
-            for opt_data in q_data.options:
-                option = QuizOption(
-                    question_id=question.id,
-                    texto=opt_data.texto,
-                    es_correcta=opt_data.es_correcta
-                )
-                db.add(option)
-            db.commit()
-
-    db.refresh(quiz)
-    return quiz
+
+    return load_quiz_detail(db, quiz.id)
 
 @router.get("/lessons/{lesson_id}/quiz", response_model=QuizDetailOut)
 def get_quiz_student(lesson_id: int, db: Session = Depends(get_db), current_user: UserPayload = Depends(get_current_user)):
@@ -96,106 +123,140 @@ def update_quiz(quiz_id: int, payload: QuizCreate, db: Session = Depends(get_db)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
         
-    quiz.titulo = payload.titulo
-    quiz.puntaje_minimo_aprobacion = payload.puntaje_minimo_aprobacion
-    
-    # Simple approach: delete existing questions and recreate
-    # (A proper approach would diff them, but for brevity we replace them)
-    db.query(QuizQuestion).filter(QuizQuestion.quiz_id == quiz.id).delete()
-    
-    for q_data in payload.questions:
-        q_embedding = None
-        if q_data.tipo == "ABIERTA" and q_data.respuesta_esperada:
-            q_embedding = get_embedding(q_data.respuesta_esperada)
-            
-        question = QuizQuestion(
-            quiz_id=quiz.id,
-            tipo=q_data.tipo,
-            enunciado=q_data.enunciado,
-            puntaje=q_data.puntaje,
-            sort_order=q_data.sort_order,
-            respuesta_esperada=q_data.respuesta_esperada,
-            respuesta_esperada_embedding=q_embedding
-        )
-        db.add(question)
-        db.commit()
-        db.refresh(question)
-
-        if q_data.options:
-            for opt_data in q_data.options:
-                option = QuizOption(
-                    question_id=question.id,
-                    texto=opt_data.texto,
-                    es_correcta=opt_data.es_correcta
-                )
-                db.add(option)
-            db.commit()
-
-    db.refresh(quiz)
-    return quiz
+    # Las preguntas se emparejan por id o por contenido: las que no cambian conservan
+    # su fila, su embedding y las referencias de los intentos anteriores
+    _apply_quiz_update(db, quiz, payload)
+    db.commit()
+    _after_quiz_change(quiz.id)
 
-@router.post("/quizzes/{quiz_id}/attempts", response_model=QuizAttemptResultOut)
-def submit_quiz_attempt(quiz_id: int, payload: QuizAttemptSubmit, db: Session = Depends(get_db), current_user: UserPayload = Depends(get_current_user)):
+    return load_quiz_detail(db, quiz.id)
+
+def _import_quiz(db: Session, payload: QuizCreate) -> dict:
+    lesson = _get_quiz_lesson(db, payload.lesson_id)
+    quiz = db.query(Quiz).filter(Quiz.lesson_id == payload.lesson_id).first()
+    created = quiz is None
+    if created:
+        quiz = Quiz(lesson_id=payload.lesson_id, titulo=payload.titulo, puntaje_minimo_aprobacion=payload.puntaje_minimo_aprobacion)
+        db.add(quiz)
+        db.flush()
+        insert_questions(db, quiz.id, payload.questions, _embed_expected_answers(payload.questions))
+        _quiz_added(db, lesson)
+    else:
+        _apply_quiz_update(db, quiz, payload)
+    db.commit()
+    _after_quiz_change(quiz.id)
+    return {"quiz_id": quiz.id, "lesson_id": quiz.lesson_id, "created": created, "questions": len(payload.questions)}
+
+@router.post("/quizzes/import", response_model=QuizImportResultOut)
+async def import_quiz(
+    request: Request,
+    lesson_id: Optional[int] = Query(None, description="Solo para CSV"),
+    titulo: Optional[str] = Query(None, description="Solo para CSV"),
+    puntaje_minimo_aprobacion: float = Query(60.0, description="Solo para CSV"),
+    db: Session = Depends(get_db),
+    current_user: UserPayload = Depends(get_current_user),
+):
+    """
+    Importa un banco de preguntas completo en una sola transacción: crea el quiz de
+    la lección o reemplaza sus preguntas (con el mismo diff que al editar). Acepta JSON (mismo formato que al crear un
+    quiz) o CSV (`Content-Type: text/csv`, columnas tipo, enunciado, puntaje,
+    sort_order, respuesta_esperada, opciones) con lesson_id y titulo en la query.
+    """
+    if current_user.role not in ["admin", "instructor"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("text/csv"):
+            if lesson_id is None or not titulo:
+                raise HTTPException(status_code=400, detail="lesson_id and titulo are required for CSV imports")
+            payload = QuizCreate(
+                lesson_id=lesson_id,
+                titulo=titulo,
+                puntaje_minimo_aprobacion=puntaje_minimo_aprobacion,
+                questions=parse_questions_csv(body.decode("utf-8-sig")),
+            )
+        else:
+            payload = QuizCreate.model_validate_json(body)
+    except (QuizImportError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    return await run_in_threadpool(_import_quiz, db, payload)
+
+def _load_quiz_for_attempt(db: Session, quiz_id: int, payload: QuizAttemptSubmit, current_user: UserPayload):
+    try:
+        return _read_quiz_for_attempt(db, quiz_id, payload, current_user)
+    finally:
+        # El quiz compilado no depende de la sesión: se libera la conexión mientras se
+        # calculan los embeddings y _save_attempt abre una transacción nueva
+        db.close()
+
+def _read_quiz_for_attempt(db: Session, quiz_id: int, payload: QuizAttemptSubmit, current_user: UserPayload):
     quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
         
     course = db.query(Course).join(Module).join(Lesson).filter(Lesson.id == quiz.lesson_id).first()
     if course and course.es_certificacion:
-        from app.services.certification_progress import get_module_status
-        module_status = get_module_status(db, current_user.id, course)
+        from app.services.certification_progress import is_module_locked
         lesson = db.query(Lesson).filter(Lesson.id == quiz.lesson_id).first()
-        modulo_actual = next((m for m in module_status if m["module_id"] == lesson.module_id), None)
-        if modulo_actual and modulo_actual.get("bloqueado"):
+        locked = is_module_locked(db, current_user.id, course, lesson.module_id)
+        # Guarda el estado de certificación si hubo que reconstruirlo (la sesión se cierra después)
+        db.commit()
+        if locked:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Debes aprobar el examen del módulo anterior para acceder a este quiz."
             )
 
-    resultado = calificar_intento(quiz, payload.respuestas)
-    
-    attempt = QuizAttempt(
-        quiz_id=quiz.id,
-        user_id=current_user.id,
-        puntaje_obtenido=resultado["puntaje_obtenido"],
-        puntaje_maximo=resultado["puntaje_maximo"],
-        porcentaje=resultado["porcentaje"],
-        aprobado=resultado["aprobado"]
-    )
-    db.add(attempt)
-    db.commit()
-    db.refresh(attempt)
-    
-    for det in resultado["detalles"]:
-        answer = QuizAttemptAnswer(
-            attempt_id=attempt.id,
-            question_id=det["question_id"],
-            respuesta_texto=det["respuesta_texto"],
-            selected_option_id=det["selected_option_id"],
-            similitud=det["similitud"],
-            puntaje_obtenido=det["puntaje_obtenido"]
-        )
-        db.add(answer)
-    
-    if attempt.aprobado:
-        from app.models.progress import LessonProgress
-        progress = db.query(LessonProgress).filter(
-            LessonProgress.user_id == current_user.id,
-            LessonProgress.lesson_id == quiz.lesson_id
-        ).first()
-        if not progress:
-            progress = LessonProgress(
-                user_id=current_user.id,
-                lesson_id=quiz.lesson_id,
-                completed=True
-            )
-            db.add(progress)
-        else:
-            progress.completed = True
-    
+    # Importado aquí: el motor de calificación usa NumPy y no debe pesar en el arranque
+    from app.services.quiz_grading import get_compiled_quiz, respuestas_abiertas
+    compiled = get_compiled_quiz(db, quiz)
+    return compiled, respuestas_abiertas(compiled, payload.respuestas)
+
+def _save_attempt(db: Session, compiled, payload: QuizAttemptSubmit, current_user: UserPayload, embeddings_respuestas: dict):
+    """
+    Guarda el intento, sus respuestas y el progreso de la lección en una sola
+    transacción con un número fijo de sentencias: INSERT del intento, un INSERT en
+    bloque de las respuestas y un upsert del progreso si aprobó.
+    """
+    from app.services.quiz_grading import calificar_intento
+    resultado = calificar_intento(compiled, payload.respuestas, embeddings_respuestas)
+
+    attempt = {
+        "quiz_id": compiled.quiz_id,
+        "user_id": current_user.id,
+        "puntaje_obtenido": resultado["puntaje_obtenido"],
+        "puntaje_maximo": resultado["puntaje_maximo"],
+        "porcentaje": resultado["porcentaje"],
+        "aprobado": resultado["aprobado"],
+        "created_at": datetime.utcnow(),
+    }
+    attempt["id"] = db.scalar(insert(QuizAttempt).values(**attempt).returning(QuizAttempt.id))
+
+    answers = [{"attempt_id": attempt["id"], **det} for det in resultado["detalles"]]
+    for answer, answer_id in zip(answers, bulk_insert_ids(db, QuizAttemptAnswer, answers)):
+        answer["id"] = answer_id
+
+    if attempt["aprobado"]:
+        upsert_lesson_completion(db, current_user.id, compiled.lesson_id)
+
     db.commit()
-    db.refresh(attempt)
-    return attempt
+    return QuizAttemptResultOut(**attempt, answers=answers)
+
+@router.post("/quizzes/{quiz_id}/attempts", response_model=QuizAttemptResultOut)
+async def submit_quiz_attempt(quiz_id: int, payload: QuizAttemptSubmit, db: Session = Depends(get_db), current_user: UserPayload = Depends(get_current_user)):
+    # El acceso a BD va al threadpool y la inferencia al pool de procesos de embeddings;
+    # el event loop sólo espera, sin bloquear al resto de rutas del catálogo.
+    compiled, abiertas = await run_in_threadpool(_load_quiz_for_attempt, db, quiz_id, payload, current_user)
+    try:
+        vectors = await aget_embeddings([payload.respuestas[i].respuesta_texto for i in abiertas])
+    except EmbeddingQueueFull:
+        raise _grading_busy()
+    return await run_in_threadpool(_save_attempt, db, compiled, payload, current_user, dict(zip(abiertas, vectors)))
 
 @router.get("/quizzes/{quiz_id}/attempts/me", response_model=list[QuizAttemptResultOut])
 def get_my_attempts(quiz_id: int, db: Session = Depends(get_db), current_user: UserPayload = Depends(get_current_user)):
@@ -204,3 +265,8 @@ def get_my_attempts(quiz_id: int, db: Session = Depends(get_db), current_user: U
         QuizAttempt.user_id == current_user.id
     ).order_by(QuizAttempt.created_at.desc()).all()
     return attempts
+
+@router.get("/internal/embedding-cache", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+def embedding_cache_stats():
+    """Métricas de hit/miss de la caché de embeddings de este proceso."""
+    return cache_stats()
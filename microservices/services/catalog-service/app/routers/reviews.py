@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.course import Course
 from app.models.rating import Rating
 from app.dependencies.auth import get_current_user, UserPayload
+from app.dependencies.internal import require_internal_token
 from app.schemas.catalog import RatingOut, RatingCreate
+from shared.pagination import PageParams, paginate_async
+from app.services.ratings import record_rating, reconcile_ratings
+from app.cache import response_cache
 
 router = APIRouter()
 
@@ -41,34 +47,33 @@ def create_course_review(
         comment=review_in.comment
     )
     db.add(rating)
+    record_rating(db, course_id, review_in.score)
     db.commit()
+    response_cache.invalidate("courses")
     db.refresh(rating)
     return rating
 
 @router.get("/courses/{course_id}/reviews")
 @router.get("/courses/{course_id}/ratings", include_in_schema=False)
-def list_course_reviews(
+async def list_course_reviews(
     course_id: int,
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    course = db.query(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").first()
+    course = await db.scalar(select(Course).filter(Course.id == course_id, Course.status == "PUBLISHED").limit(1))
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found."
         )
         
-    query = db.query(Rating).filter(Rating.course_id == course_id).order_by(Rating.created_at.desc())
-    total = query.count()
-    start = (page - 1) * page_size
-    results = query.offset(start).limit(page_size).all()
-    
-    end = start + page_size
-    return {
-        "count": total,
-        "next": page + 1 if end < total else None,
-        "previous": page - 1 if page > 1 else None,
-        "results": [RatingOut.from_orm(r) for r in results]
-    }
+    query = select(Rating).filter(Rating.course_id == course_id)
+    return await paginate_async(db, query, params, [(Rating.created_at, True), (Rating.id, True)], RatingOut.from_orm)
+
+@router.post("/internal/reconcile-ratings", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+def reconcile_course_ratings(db: Session = Depends(get_db)):
+    """Invocado por la tarea periódica de Celery para corregir deriva en los agregados."""
+    result = reconcile_ratings(db)
+    if result["repaired"]:
+        response_cache.invalidate("courses")
+    return {"status": "ok", **result}
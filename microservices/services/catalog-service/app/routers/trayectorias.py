@@ -11,6 +11,7 @@ from app.schemas.catalog import (
     TrayectoriaAddCurso
 )
 from app.dependencies.auth import get_current_user
+from app.cache import response_cache
 
 router = APIRouter(prefix="/trayectorias", tags=["trayectorias"])
 
@@ -37,6 +38,7 @@ def create_trayectoria(
     t = Trayectoria(**trayectoria_data.dict())
     db.add(t)
     db.commit()
+    response_cache.invalidate("trayectorias")
     db.refresh(t)
     return t
 
@@ -58,6 +60,7 @@ def update_trayectoria(
         setattr(t, key, value)
         
     db.commit()
+    response_cache.invalidate("trayectorias")
     db.refresh(t)
     return t
 
@@ -76,6 +79,7 @@ def delete_trayectoria(
         
     db.delete(t)
     db.commit()
+    response_cache.invalidate("trayectorias")
     return None
 
 @router.post("/{id}/cursos", response_model=TrayectoriaDetailOut)
@@ -112,6 +116,7 @@ def add_curso_to_trayectoria(
         db.add(tc)
         
     db.commit()
+    response_cache.invalidate("trayectorias")
     db.refresh(t)
     return t
 
@@ -135,4 +140,5 @@ def remove_curso_from_trayectoria(
         
     db.delete(tc)
     db.commit()
+    response_cache.invalidate("trayectorias")
     return None
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.course import Course
 from app.models.wishlist import WishlistItem
 from app.dependencies.auth import get_current_user, UserPayload
 from app.schemas.catalog import WishlistItemOut, WishlistCreate, CourseOut
+from shared.pagination import PageParams, paginate
 
 router = APIRouter()
 
@@ -61,28 +62,15 @@ def remove_from_wishlist(
 
 @router.get("/wishlist")
 def get_my_wishlist(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+    params: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
-    query = db.query(WishlistItem).filter(WishlistItem.user_id == current_user.id).order_by(WishlistItem.added_at.desc())
-    total = query.count()
-    start = (page - 1) * page_size
-    results = query.offset(start).limit(page_size).all()
-    
-    end = start + page_size
-    return {
-        "count": total,
-        "next": page + 1 if end < total else None,
-        "previous": page - 1 if page > 1 else None,
-        "results": [
-            {
-                "id": item.id,
-                "user_id": item.user_id,
-                "course_id": item.course_id,
-                "added_at": item.added_at,
-                "course": CourseOut.from_orm(item.course) if item.course else None
-            } for item in results
-        ]
-    }
+    query = db.query(WishlistItem).filter(WishlistItem.user_id == current_user.id)
+    return paginate(query, params, [(WishlistItem.added_at, True), (WishlistItem.id, True)], lambda item: {
+        "id": item.id,
+        "user_id": item.user_id,
+        "course_id": item.course_id,
+        "added_at": item.added_at,
+        "course": CourseOut.from_orm(item.course) if item.course else None
+    })
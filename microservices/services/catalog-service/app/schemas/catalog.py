@@ -78,6 +78,7 @@ class CourseDetailOut(CourseOut):
     modules: List[ModuleWithLessons] = []
     rating_count: int = 0
     average_rating: float = 0.0
+    rating_histogram: List[int] = []
 
     class Config:
         from_attributes = True
@@ -112,7 +113,7 @@ class WishlistItemOut(BaseModel):
         from_attributes = True
 
 class LessonProgressOut(BaseModel):
-    id: int
+    id: Optional[int] = None  # None mientras la marca está en el buffer de escritura diferida
     user_id: int
     lesson_id: int
     completed: bool
@@ -121,6 +122,16 @@ class LessonProgressOut(BaseModel):
     class Config:
         from_attributes = True
 
+class LessonHeartbeatIn(BaseModel):
+    # Hasta 24 h y sin inf/nan: la posición se guarda en una columna entera
+    position_seconds: float = Field(..., ge=0, le=86400, allow_inf_nan=False)
+    duration_seconds: Optional[float] = Field(None, gt=0, le=86400, allow_inf_nan=False)  # duración real del video, si el reproductor la conoce
+
+class LessonPositionOut(BaseModel):
+    lesson_id: int
+    position_seconds: int = 0
+    completed: bool = False
+
 class CourseProgressOut(BaseModel):
     course_id: int
     total_lessons: int
@@ -7,7 +7,7 @@ class QuizOptionBase(BaseModel):
     es_correcta: bool = False
 
 class QuizOptionCreate(QuizOptionBase):
-    pass
+    id: Optional[int] = None  # al editar: opción existente que se conserva
 
 class QuizOptionOut(BaseModel):
     id: int
@@ -27,6 +27,7 @@ class QuizQuestionBase(BaseModel):
     respuesta_esperada: Optional[str] = None
 
 class QuizQuestionCreate(QuizQuestionBase):
+    id: Optional[int] = None  # al editar: pregunta existente que se conserva
     options: Optional[List[QuizOptionCreate]] = []
 
 class QuizQuestionStudentOut(BaseModel):
@@ -65,6 +66,12 @@ class QuizDetailOut(QuizOut):
 class QuizDetailInstructorOut(QuizOut):
     questions: List[QuizQuestionOut] = []
 
+class QuizImportResultOut(BaseModel):
+    quiz_id: int
+    lesson_id: int
+    created: bool
+    questions: int
+
 # --- Attempts ---
 
 class AnswerSubmit(BaseModel):
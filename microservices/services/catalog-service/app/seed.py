@@ -0,0 +1,98 @@
+from app.database import engine, Base, SessionLocal
+from app.models.category import Category
+from app.models.course import Course
+from app.models.module import Module
+from app.models.lesson import Lesson
+from app.services.course_events import COURSE_CREATED, publish_course_event
+from app.services.search import index_missing, rebuild_index
+
+def init_database():
+    """Crea las tablas que falten y carga los datos iniciales."""
+    Base.metadata.create_all(bind=engine)
+    seed_data()
+
+def seed_data():
+    db = SessionLocal()
+    try:
+        if db.query(Category).count() == 0:
+            backend = Category(name="Backend")
+            architecture = Category(name="Architecture")
+            db.add_all([backend, architecture])
+            db.flush()
+            
+            db.add_all([
+                Course(
+                    title="Python Fundamentals",
+                    description="From zero to backend basics",
+                    category_id=backend.id,
+                    price=100.0,
+                    status="PUBLISHED",
+                    nivel_dificultad="PRINCIPIANTE",
+                    duracion_horas=20,
+                    instructor_id=2
+                ),
+                Course(
+                    title="Flask for APIs",
+                    description="Design and build production APIs",
+                    category_id=backend.id,
+                    price=120.0,
+                    status="PUBLISHED",
+                    nivel_dificultad="INTERMEDIO",
+                    duracion_horas=25,
+                    instructor_id=2
+                ),
+                Course(
+                    title="Arquitectura de Microservicios",
+                    description="Patterns for scalable systems",
+                    category_id=architecture.id,
+                    price=150.0,
+                    status="PUBLISHED",
+                    nivel_dificultad="AVANZADO",
+                    duracion_horas=30,
+                    instructor_id=2
+                ),
+            ])
+            db.flush()
+            
+            all_courses = db.query(Course).all()
+            for course in all_courses:
+                m1 = Module(course_id=course.id, title=f"{course.title} - Module 1", sort_order=1)
+                m2 = Module(course_id=course.id, title=f"{course.title} - Module 2", sort_order=2)
+                db.add_all([m1, m2])
+                db.flush()
+                
+                # Seed lessons for each module
+                db.add_all([
+                    Lesson(module_id=m1.id, title="Introducción", content_type="TEXTO", content="Texto de introducción", sort_order=1, duration_minutes=10),
+                    Lesson(module_id=m1.id, title="Conceptos Clave", content_type="VIDEO", content="https://example.com/video1.mp4", sort_order=2, duration_minutes=20),
+                    Lesson(module_id=m2.id, title="Práctica Guiada", content_type="PRACTICA", content="Instrucciones del laboratorio", sort_order=1, duration_minutes=30),
+                    Lesson(module_id=m2.id, title="Quiz Final", content_type="QUIZ", content="Cuestionario de prueba", sort_order=2, duration_minutes=15),
+                ])
+            db.commit()
+            rebuild_index(db)
+            # La réplica de precios de transactions-service se alimenta de estos eventos
+            for course in all_courses:
+                publish_course_event(COURSE_CREATED, course)
+        else:
+            # If categories exist, but lessons are missing, seed them for existing modules
+            if db.query(Lesson).count() == 0:
+                modules = db.query(Module).all()
+                for mod in modules:
+                    db.add_all([
+                        Lesson(module_id=mod.id, title="Introducción", content_type="TEXTO", content="Texto de introducción", sort_order=1, duration_minutes=10),
+                        Lesson(module_id=mod.id, title="Conceptos Clave", content_type="VIDEO", content="https://example.com/video1.mp4", sort_order=2, duration_minutes=20),
+                        Lesson(module_id=mod.id, title="Práctica Guiada", content_type="PRACTICA", content="Instrucciones del laboratorio", sort_order=1, duration_minutes=30),
+                        Lesson(module_id=mod.id, title="Quiz Final", content_type="QUIZ", content="Cuestionario de prueba", sort_order=2, duration_minutes=15),
+                    ])
+                db.commit()
+                # Los títulos de lección forman parte del documento de búsqueda
+                rebuild_index(db)
+            else:
+                # BD existente creada antes del índice o con cursos insertados por fuera de la API
+                index_missing(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    init_database()
+    print("Database initialized.")
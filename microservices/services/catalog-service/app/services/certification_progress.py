@@ -1,94 +1,276 @@
+"""
+Progreso secuencial de los cursos de certificación.
+
+El estado por (usuario, curso) se persiste en CertificationProgress: módulos
+completados y módulos bloqueados. Se actualiza de forma incremental cuando el
+usuario completa una lección (recalculando sólo ese módulo), así que verificar un
+bloqueo es una sola lectura por índice. Cambiar la estructura del curso descarta
+los estados, que se reconstruyen en la siguiente lectura.
+
+Ninguna función hace commit (salvo rebuild_all): el estado reconstruido se escribe
+en la transacción del llamador, que decide cuándo confirmarla.
+
+Reconstrucción completa:
+    python -m app.services.certification_progress [course_id]
+"""
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
+
 from app.models.course import Course
 from app.models.module import Module
 from app.models.lesson import Lesson
 from app.models.quiz import Quiz, QuizAttempt
-from app.models.progress import LessonProgress
-import logging
+from app.models.progress import LessonProgress, CertificationProgress
 
 logger = logging.getLogger(__name__)
 
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _is_exam(module: Module) -> bool:
+    return bool(module.es_examen_modulo or module.es_examen_final)
+
+
+def _completed_modules(db: Session, user_id: int, modules: list[Module]) -> set[int]:
+    """
+    Ids de los módulos completados por el usuario. Un módulo de examen está completo
+    si su quiz fue aprobado (o si no tiene quiz); uno normal, si todas sus lecciones
+    están completadas (o si no tiene lecciones).
+    """
+    if not modules:
+        return set()
+    lessons = db.query(Lesson.id, Lesson.module_id).filter(Lesson.module_id.in_([m.id for m in modules])).all()
+    lessons_by_module = defaultdict(list)
+    for lesson_id, module_id in lessons:
+        lessons_by_module[module_id].append(lesson_id)
+    lesson_ids = [lesson_id for lesson_id, _ in lessons]
+
+    quiz_by_lesson_id = dict(db.query(Quiz.lesson_id, Quiz.id).filter(Quiz.lesson_id.in_(lesson_ids)).all())
+    approved_quiz_ids = {
+        quiz_id for (quiz_id,) in db.query(QuizAttempt.quiz_id).filter(
+            QuizAttempt.user_id == user_id,
+            QuizAttempt.quiz_id.in_(list(quiz_by_lesson_id.values())),
+            QuizAttempt.aprobado == True
+        ).distinct()
+    }
+    completed_lesson_ids = {
+        lesson_id for (lesson_id,) in db.query(LessonProgress.lesson_id).filter(
+            LessonProgress.user_id == user_id,
+            LessonProgress.lesson_id.in_(lesson_ids),
+            LessonProgress.completed == True
+        )
+    }
+
+    completed = set()
+    for module in modules:
+        module_lessons = sorted(lessons_by_module[module.id])
+        if _is_exam(module):
+            # Asumimos que hay un quiz principal por módulo de examen
+            module_quizzes = [quiz_by_lesson_id[l] for l in module_lessons if l in quiz_by_lesson_id]
+            if not module_quizzes:
+                logger.warning(f"Módulo {module.id} es examen pero no tiene quiz asociado. Desbloqueo por defecto.")
+                completed.add(module.id)
+            elif module_quizzes[0] in approved_quiz_ids:
+                completed.add(module.id)
+        elif all(l in completed_lesson_ids for l in module_lessons):
+            completed.add(module.id)
+    return completed
+
+
+def _locked_modules(ordered_module_ids: list[int], completed: set[int]) -> list[int]:
+    """Un módulo está bloqueado si el anterior (por sort_order) no está completado."""
+    return [
+        module_id for prev_id, module_id in zip(ordered_module_ids, ordered_module_ids[1:])
+        if prev_id not in completed
+    ]
+
+
+def _ordered_modules(db: Session, course_id: int) -> list[Module]:
+    return db.query(Module).filter(Module.course_id == course_id).order_by(Module.sort_order.asc(), Module.id.asc()).all()
+
+
+def _lookup(db: Session, user_id: int, course_id: int, for_update: bool = False) -> Optional[CertificationProgress]:
+    query = db.query(CertificationProgress).filter(
+        CertificationProgress.user_id == user_id,
+        CertificationProgress.course_id == course_id
+    )
+    return (query.with_for_update() if for_update else query).first()
+
+
+def rebuild_state(db: Session, user_id: int, course_id: int) -> CertificationProgress:
+    """
+    Recalcula desde cero el estado del usuario en el curso y lo guarda con un upsert
+    sobre `_user_course_cert_uc` (un request concurrente que cree el mismo estado no
+    produce error ni aborta la transacción). No hace commit.
+    """
+    modules = _ordered_modules(db, course_id)
+    completed = _completed_modules(db, user_id, modules)
+    values = {
+        "completed_module_ids": sorted(completed),
+        "locked_module_ids": _locked_modules([m.id for m in modules], completed),
+        "updated_at": datetime.utcnow(),
+    }
+    dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        state = _lookup(db, user_id, course_id)
+        if state is None:
+            state = CertificationProgress(user_id=user_id, course_id=course_id)
+            db.add(state)
+        for field, value in values.items():
+            setattr(state, field, value)
+        db.flush()
+        return state
+
+    db.execute(
+        dialect_insert(CertificationProgress.__table__)
+        .values(user_id=user_id, course_id=course_id, **values)
+        .on_conflict_do_update(index_elements=["user_id", "course_id"], set_=values)
+    )
+    return (
+        db.query(CertificationProgress)
+        .filter(CertificationProgress.user_id == user_id, CertificationProgress.course_id == course_id)
+        .populate_existing()
+        .one()
+    )
+
+
+def get_state(db: Session, user_id: int, course_id: int) -> CertificationProgress:
+    """
+    Estado persistido (una lectura por índice); se reconstruye si no existe. No hace
+    commit: el estado reconstruido queda en la transacción del llamador.
+    """
+    state = _lookup(db, user_id, course_id)
+    if state is None:
+        state = rebuild_state(db, user_id, course_id)
+    return state
+
+
+def is_module_locked(db: Session, user_id: int, course: Course, module_id: int) -> bool:
+    return module_id in get_state(db, user_id, course.id).locked_module_ids
+
+
+def record_lesson_completion(db: Session, user_id: int, lesson_id: int) -> None:
+    """
+    Actualiza el estado tras completar una lección (o aprobar el quiz de un examen):
+    sólo se recalcula el módulo de la lección. No hace commit.
+    """
+    row = (
+        db.query(Module, Course.es_certificacion)
+        .join(Course, Course.id == Module.course_id)
+        .join(Lesson, Lesson.module_id == Module.id)
+        .filter(Lesson.id == lesson_id)
+        .first()
+    )
+    if row is None or not row[1]:
+        return
+    module = row[0]
+
+    state = _lookup(db, user_id, module.course_id, for_update=True)
+    if state is None:
+        rebuild_state(db, user_id, module.course_id)
+        return
+
+    completed = set(state.completed_module_ids)
+    if module.id in completed or module.id not in _completed_modules(db, user_id, [module]):
+        return
+    completed.add(module.id)
+    ordered_ids = [module_id for (module_id,) in db.query(Module.id).filter(
+        Module.course_id == module.course_id
+    ).order_by(Module.sort_order.asc(), Module.id.asc())]
+    state.completed_module_ids = sorted(completed)
+    state.locked_module_ids = _locked_modules(ordered_ids, completed)
+
+
+def invalidate_course(db: Session, course_id: int) -> None:
+    """Descarta los estados del curso tras un cambio de estructura. No hace commit."""
+    db.query(CertificationProgress).filter(CertificationProgress.course_id == course_id).delete(synchronize_session=False)
+
+
 def get_module_status(db: Session, user_id: int, course: Course) -> list[dict]:
     """
     Retorna, para cada módulo del curso (ordenado por sort_order), un dict:
     { module_id, title, sort_order, es_examen_modulo, es_examen_final,
       bloqueado: bool, aprobado: bool (si tiene examen y fue aprobado, None si no aplica) }
     """
-    # 1. Obtener módulos ordenados
-    modules = db.query(Module).filter(Module.course_id == course.id).order_by(Module.sort_order.asc()).all()
+    modules = _ordered_modules(db, course.id)
     if not modules:
         return []
-
-    # 2. Cargar lecciones, quizzes e intentos
-    module_ids = [m.id for m in modules]
-    lessons = db.query(Lesson).filter(Lesson.module_id.in_(module_ids)).all()
-    lesson_ids = [l.id for l in lessons]
-
-    quizzes = db.query(Quiz).filter(Quiz.lesson_id.in_(lesson_ids)).all()
-    quiz_by_lesson_id = {q.lesson_id: q for q in quizzes}
-
-    # Intentos aprobados del usuario
-    quiz_ids = [q.id for q in quizzes]
-    approved_attempts = db.query(QuizAttempt).filter(
-        QuizAttempt.user_id == user_id,
-        QuizAttempt.quiz_id.in_(quiz_ids),
-        QuizAttempt.aprobado == True
-    ).all()
-    approved_quiz_ids = {a.quiz_id for a in approved_attempts}
-
-    # Lecciones completadas del usuario
-    completed_progress = db.query(LessonProgress).filter(
-        LessonProgress.user_id == user_id,
-        LessonProgress.lesson_id.in_(lesson_ids),
-        LessonProgress.completed == True
-    ).all()
-    completed_lesson_ids = {p.lesson_id for p in completed_progress}
-
-    # 3. Evaluar estado secuencial
-    result = []
-    
-    # El primer módulo siempre está desbloqueado
-    prev_module_completed = True
-
-    for i, module in enumerate(modules):
-        bloqueado = not prev_module_completed if i > 0 else False
-
-        # Determinar si este módulo está aprobado o completado
-        module_lessons = [l for l in lessons if l.module_id == module.id]
-        
-        aprobado = None
-        is_completed = False
-
-        if module.es_examen_modulo or module.es_examen_final:
-            # Buscar el quiz del módulo
-            module_quizzes = [quiz_by_lesson_id[l.id] for l in module_lessons if l.id in quiz_by_lesson_id]
-            if not module_quizzes:
-                logger.warning(f"Módulo {module.id} es examen pero no tiene quiz asociado. Desbloqueo por defecto.")
-                aprobado = True
-                is_completed = True
-            else:
-                # Asumimos que hay un quiz principal por módulo de examen
-                quiz = module_quizzes[0]
-                aprobado = quiz.id in approved_quiz_ids
-                is_completed = aprobado
-        else:
-            # Módulo normal: está completado si TODAS sus lecciones están completadas
-            if not module_lessons:
-                is_completed = True # Módulo sin lecciones
-            else:
-                is_completed = all(l.id in completed_lesson_ids for l in module_lessons)
-
-        result.append({
+    state = get_state(db, user_id, course.id)
+    completed = set(state.completed_module_ids)
+    locked = set(state.locked_module_ids)
+    return [
+        {
             "module_id": module.id,
             "title": module.title,
             "sort_order": module.sort_order,
             "es_examen_modulo": module.es_examen_modulo,
             "es_examen_final": module.es_examen_final,
-            "bloqueado": bloqueado,
-            "aprobado": aprobado
-        })
+            "bloqueado": module.id in locked,
+            "aprobado": (module.id in completed) if _is_exam(module) else None,
+        }
+        for module in modules
+    ]
+
+
+def final_exam_approved(db: Session, user_id: int, course_ids: list[int]) -> dict:
+    """
+    Para cada curso con módulo de examen final (el primero por sort_order): si el
+    usuario lo aprobó, leído de los estados persistidos.
+    """
+    finals = {}
+    rows = db.query(Module.course_id, Module.id).filter(
+        Module.course_id.in_(course_ids), Module.es_examen_final == True
+    ).order_by(Module.sort_order.desc(), Module.id.desc())
+    for course_id, module_id in rows:
+        finals[course_id] = module_id
+    if not finals:
+        return {}
+    states = {
+        state.course_id: state for state in db.query(CertificationProgress).filter(
+            CertificationProgress.user_id == user_id,
+            CertificationProgress.course_id.in_(list(finals))
+        )
+    }
+    for course_id in finals.keys() - states.keys():
+        states[course_id] = get_state(db, user_id, course_id)
+    return {course_id: module_id in states[course_id].completed_module_ids for course_id, module_id in finals.items()}
+
+
+def rebuild_all(db: Session, course_id: Optional[int] = None) -> dict:
+    """
+    Reconstruye los estados de todos los usuarios con actividad (lecciones o
+    intentos) en los cursos de certificación. Hace commit por curso.
+    """
+    courses = db.query(Course.id).filter(Course.es_certificacion == True)
+    if course_id is not None:
+        courses = courses.filter(Course.id == course_id)
+    rebuilt = 0
+    course_ids = [c for (c,) in courses]
+    for cid in course_ids:
+        lesson_ids = db.query(Lesson.id).join(Module).filter(Module.course_id == cid).scalar_subquery()
+        quiz_ids = db.query(Quiz.id).filter(Quiz.lesson_id.in_(lesson_ids)).scalar_subquery()
+        users = {u for (u,) in db.query(LessonProgress.user_id).filter(LessonProgress.lesson_id.in_(lesson_ids)).distinct()}
+        users |= {u for (u,) in db.query(QuizAttempt.user_id).filter(QuizAttempt.quiz_id.in_(quiz_ids)).distinct()}
+        invalidate_course(db, cid)
+        for user_id in users:
+            rebuild_state(db, user_id, cid)
+        db.commit()
+        rebuilt += len(users)
+    return {"courses": len(course_ids), "states": rebuilt}
+
 
-        # Para el siguiente módulo en la iteración
-        prev_module_completed = is_completed
+if __name__ == "__main__":
+    from app.database import SessionLocal
 
-    return result
+    db = SessionLocal()
+    try:
+        result = rebuild_all(db, int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    finally:
+        db.close()
+    print(f"Rebuilt {result['states']} certification progress states in {result['courses']} courses.")
@@ -0,0 +1,50 @@
+"""
+Eventos de cambios de cursos en el stream `cursos` (shared/event_bus.py).
+
+transactions-service los consume para mantener su réplica de precios
+(course_prices), así agregar al carrito no consulta al catálogo. Se publican
+después del commit; si Redis no está disponible el error se registra y el evento
+se pierde: la réplica se corrige con el siguiente cambio del curso o con la
+reconciliación periódica (tarea reconciliar_precios_cursos, cada 15 minutos).
+"""
+import logging
+import os
+import sys
+
+from app.config import settings
+from app.models.course import Course
+
+logger = logging.getLogger(__name__)
+
+STREAM = "cursos"
+COURSE_CREATED = "curso.creado"
+COURSE_UPDATED = "curso.actualizado"
+
+_bus = None
+
+
+def _event_bus():
+    global _bus
+    if _bus is None:
+        sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../../"))
+        from shared.event_bus import RedisEventBus
+        _bus = RedisEventBus(settings.REDIS_URL)
+    return _bus
+
+
+def course_payload(course: Course) -> dict:
+    return {
+        "course_id": course.id,
+        "title": course.title,
+        "price": course.price,
+        "status": course.status,
+    }
+
+
+def publish_course_event(event_type: str, course: Course) -> None:
+    if not settings.REDIS_URL:
+        return
+    try:
+        _event_bus().publish(stream=STREAM, event_type=event_type, data=course_payload(course))
+    except Exception as e:
+        logger.error(f"Error publishing {event_type} for course {course.id}: {e}")
@@ -0,0 +1,124 @@
+"""
+Caché de embeddings direccionada por contenido.
+
+La clave es un hash del texto normalizado más el nombre del modelo, así que la misma
+respuesta (aunque difiera en mayúsculas o espacios) se calcula una sola vez. El
+texto normalizado sólo es la clave: el modelo codifica el texto original. Hay un
+LRU en memoria por proceso delante de Redis; los vectores son los mismos bytes
+float32 que se guardan en la BD.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# v2: vectores del texto original (antes se codificaba el texto normalizado)
+KEY_PREFIX = "catalog:emb:v2"
+REDIS_RETRY_SECONDS = 30
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFC, minúsculas y espacios colapsados: variantes triviales comparten embedding."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip().lower()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, redis_url: str, ttl: int, max_entries: int):
+        self.model_name = model_name
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self.stats = {"hits_local": 0, "hits_redis": 0, "misses": 0}
+
+    def key(self, normalized: str) -> str:
+        digest = hashlib.sha256(f"{self.model_name}\0{normalized}".encode()).hexdigest()
+        return f"{KEY_PREFIX}:{digest}"
+
+    # ── Redis ──────────────────────────────────────────────────────────────
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning(f"Embedding cache: Redis unavailable ({exc}); using in-process cache only.")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    # ── LRU local ─────────────────────────────────────────────────────────
+
+    def _remember(self, key: str, vector: bytes) -> None:
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get_local(self, texts: list[str]) -> dict:
+        """Vectores encontrados en el LRU, por texto normalizado."""
+        found = {}
+        with self._lock:
+            for text in texts:
+                vector = self._lru.get(self.key(text))
+                if vector is not None:
+                    self._lru.move_to_end(self.key(text))
+                    found[text] = vector
+            self.stats["hits_local"] += len(found)
+        return found
+
+    def get_remote(self, texts: list[str]) -> dict:
+        """Vectores encontrados en Redis (se copian al LRU); cuenta el resto como misses."""
+        found = {}
+        client = self._client()
+        if client is not None and texts:
+            keys = [self.key(text) for text in texts]
+            try:
+                values = client.mget(keys)
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+                values = [None] * len(keys)
+            for text, key, raw in zip(texts, keys, values):
+                if raw:
+                    self._remember(key, raw)
+                    found[text] = raw
+        with self._lock:
+            self.stats["hits_redis"] += len(found)
+            self.stats["misses"] += len(texts) - len(found)
+        return found
+
+    def set_many(self, vectors: dict) -> None:
+        for text, vector in vectors.items():
+            self._remember(self.key(text), vector)
+        client = self._client()
+        if client is None or not vectors:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for text, vector in vectors.items():
+                pipe.set(self.key(text), vector, ex=self.ttl)
+            pipe.execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["local_entries"] = len(self._lru)
+        lookups = stats["hits_local"] + stats["hits_redis"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits_local"] + stats["hits_redis"]) / lookups, 4) if lookups else None
+        return stats
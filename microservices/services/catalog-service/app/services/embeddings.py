@@ -1,37 +1,323 @@
-import numpy as np
-from sentence_transformers import SentenceTransformer
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-# Load the model only once when this module is imported (singleton behavior)
+from app.config import settings
+from app.services.embedding_cache import EmbeddingCache, normalize_text
+
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+logger = logging.getLogger(__name__)
+
+# The model is loaded on first use (or by warm_up() in the background), never at
+# import time, so workers that don't grade quizzes boot without it.
 _model = None
+_model_lock = threading.Lock()
+_ready = threading.Event()
 
 def _get_model():
     global _model
     if _model is None:
-        # We load the model dynamically so it doesn't block app startup unless used
-        # or we could load it globally. The prompt says "al iniciar la app, no por request".
-        # We can load it right away.
-        _model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        with _model_lock:
+            if _model is None:
+                # sentence_transformers pulls in torch; importing it alone takes seconds
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME)
     return _model
 
-# Preload
-_get_model()
 
-def get_embedding(text: str) -> list[float]:
+class EmbeddingQueueFull(Exception):
+    """Raised when EMBEDDING_MAX_PENDING batches are already waiting for the model."""
+
+
+def _encode_local(texts: list[str]) -> list[bytes]:
     """
-    Returns the vector embedding for the given text.
+    Runs a single model.encode call for all `texts` (duplicates are encoded once).
+    Vectors are L2-normalized float32, returned as raw bytes: that is how they are
+    stored and cached, and cosine similarity reduces to a dot product.
     """
-    model = _get_model()
-    # encode returns a numpy array, convert to list of floats for JSON storage
-    embedding = model.encode(text)
-    return embedding.tolist()
+    import numpy as np
+
+    unique = list(dict.fromkeys(texts))
+    vectors = _get_model().encode(
+        unique,
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    by_text = {text: vector.astype(np.float32).tobytes() for text, vector in zip(unique, vectors)}
+    return [by_text[text] for text in texts]
+
+
+# Inference runs in worker processes so CPU-bound encode calls never hold the GIL
+# of the API process (and with it the threadpool serving every other route).
+_pool = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(settings.EMBEDDING_MAX_PENDING)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a process that already holds torch threads can deadlock
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.EMBEDDING_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_get_model,
+                )
+    return _pool
+
+
+def warm_up() -> None:
+    """Loads the model (in every worker process if the pool is enabled) ahead of the first request."""
+    if settings.EMBEDDING_WORKERS <= 0:
+        _get_model()
+    else:
+        pool = _get_pool()
+        # One tiny task per worker: each spawned worker loads the model in its initializer
+        for future in [pool.submit(_encode_local, ["warm-up"]) for _ in range(settings.EMBEDDING_WORKERS)]:
+            future.result()
+    _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _discard_pool(broken: ProcessPoolExecutor) -> None:
+    """Drops a pool whose worker died (OOM kill, segfault) so the next call spawns a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+    logger.warning("Embedding worker pool broken; it will be rebuilt on the next request.")
+
+
+def _submit(texts: list[str]) -> Future:
+    """Queues `texts` on the worker pool, failing fast if the queue is full."""
+    if not _pending.acquire(blocking=False):
+        raise EmbeddingQueueFull()
+    try:
+        pool = _get_pool()
+        try:
+            future = pool.submit(_encode_local, texts)
+        except BrokenProcessPool:
+            # The pool is marked broken before its futures fail, so a retry lands here
+            _discard_pool(pool)
+            future = _get_pool().submit(_encode_local, texts)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+def _encode(texts: list[str]) -> list[bytes]:
+    if settings.EMBEDDING_WORKERS <= 0:
+        return _encode_local(texts)
+    try:
+        return _submit(texts).result()
+    except BrokenProcessPool:
+        # Retried once on a fresh pool; a second failure is reported to the caller
+        return _submit(texts).result()
+
+
+async def _aencode(texts: list[str]) -> list[bytes]:
+    try:
+        return await asyncio.wrap_future(_submit(texts))
+    except BrokenProcessPool:
+        return await asyncio.wrap_future(_submit(texts))
+
+
+class _MicroBatcher:
+    """
+    Groups the texts of concurrent requests into one model call. The first text
+    queued in a window starts a timer; after `window` seconds the timer thread takes
+    everything queued meanwhile and encodes it, and each caller's future receives
+    its slice. Sync callers block on the future, async callers await it.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending: list[tuple[list[str], Future]] = []
+        self._window_open = False
+
+    def enqueue(self, texts: list[str]) -> Future:
+        """Queues `texts` for the current window; the future resolves to their vectors."""
+        future = Future()
+        with self._lock:
+            self._pending.append((texts, future))
+            opens_window = not self._window_open
+            self._window_open = True
+        if opens_window:
+            timer = threading.Timer(self.window, self._flush)
+            timer.daemon = True
+            timer.start()
+        return future
+
+    def submit(self, texts: list[str]) -> list[bytes]:
+        return self.enqueue(texts).result()
+
+    async def asubmit(self, texts: list[str]) -> list[bytes]:
+        return await asyncio.wrap_future(self.enqueue(texts))
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._window_open = False
+        self._run(batch)
+
+    @staticmethod
+    def _run(batch: list[tuple[list[str], Future]]) -> None:
+        try:
+            vectors = _encode([text for texts, _ in batch for text in texts])
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        offset = 0
+        for texts, future in batch:
+            future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+
+_batcher = (
+    _MicroBatcher(settings.EMBEDDING_MICROBATCH_WINDOW_MS / 1000.0)
+    if settings.EMBEDDING_MICROBATCH_WINDOW_MS > 0 else None
+)
+
+
+_cache = EmbeddingCache(
+    model_name=MODEL_NAME,
+    redis_url=settings.REDIS_URL,
+    ttl=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+) if settings.EMBEDDING_CACHE_ENABLED else None
+
+
+def _compute(texts: list[str]) -> list[bytes]:
+    if _batcher is not None:
+        return _batcher.submit(texts)
+    return _encode(texts)
+
+
+async def _acompute(texts: list[str]) -> list[bytes]:
+    # Async requests share the micro-batch windows of the sync ones
+    if _batcher is not None:
+        return await _batcher.asubmit(texts)
+    return await _aencode(texts)
+
+
+def _cached(texts: list[str]) -> dict:
+    """Cached vectors for the given normalized texts (in-process LRU first, then Redis)."""
+    if _cache is None:
+        return {}
+    found = _cache.get_local(texts)
+    found.update(_cache.get_remote([text for text in texts if text not in found]))
+    return found
+
+
+def _store(vectors: dict) -> None:
+    if _cache is not None:
+        _cache.set_many(vectors)
+
+
+def _cache_keys(texts: list[str]) -> tuple:
+    """
+    Normalized text of each input (the cache key) and, per key, the original text
+    of its first occurrence. The model always encodes the original text: the
+    normalization only decides which trivial variants share one cached vector.
+    """
+    normalized = [normalize_text(text) for text in texts]
+    originals = {}
+    for key, text in zip(normalized, texts):
+        originals.setdefault(key, text)
+    return normalized, originals
+
+
+def get_embeddings(texts: list[str]) -> list[bytes]:
+    """
+    Returns the normalized embeddings of `texts`, in the same order. Texts already
+    in the embedding cache are free; the rest are computed in one batched model
+    call (shared with concurrent requests if micro-batching is on).
+    """
+    if not texts:
+        return []
+    normalized, originals = _cache_keys(texts)
+    found = _cached(list(originals))
+    missing = [key for key in originals if key not in found]
+    if missing:
+        computed = dict(zip(missing, _compute([originals[key] for key in missing])))
+        _store(computed)
+        found.update(computed)
+    return [found[text] for text in normalized]
+
+
+async def aget_embeddings(texts: list[str]) -> list[bytes]:
+    """
+    Async variant of get_embeddings for async endpoints: the event loop awaits the
+    worker pool (through the micro-batcher if it is on) without tying up a
+    threadpool thread while the model runs.
+    """
+    if not texts:
+        return []
+    if settings.EMBEDDING_WORKERS <= 0:
+        return await asyncio.to_thread(get_embeddings, texts)
+    normalized, originals = _cache_keys(texts)
+    found = await asyncio.to_thread(_cached, list(originals))
+    missing = [key for key in originals if key not in found]
+    if missing:
+        computed = dict(zip(missing, await _acompute([originals[key] for key in missing])))
+        await asyncio.to_thread(_store, computed)
+        found.update(computed)
+    return [found[text] for text in normalized]
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the embedding cache for this process."""
+    return _cache.snapshot() if _cache is not None else {"enabled": False}
+
+def get_embedding(text: str) -> bytes:
+    """
+    Returns the vector embedding for the given text (normalized float32 bytes).
+    """
+    return get_embeddings([text])[0]
+
+def as_vector(embedding: bytes):
+    """Zero-copy float32 view over a stored embedding."""
+    import numpy as np
+
+    return np.frombuffer(embedding, dtype=np.float32)
+
+def similarities(given, expected):
+    """
+    Row-wise cosine similarity between two (n, dim) float32 matrices of normalized
+    embeddings, accumulated in float64. The single definition used for grading.
+    """
+    import numpy as np
+
+    return np.einsum("ij,ij->i", given.astype(np.float64), expected.astype(np.float64))
 
-def cosine_similarity(vec_a: list[float], vec_b: list[float]) -> float:
+def cosine_similarity(vec_a: bytes, vec_b: bytes) -> float:
     """
-    Computes cosine similarity between two vectors.
+    Computes cosine similarity between two embeddings. Both are L2-normalized
+    when produced, so it is just their dot product.
     """
-    a = np.array(vec_a)
-    b = np.array(vec_b)
-    # Cosine similarity formula: dot(A, B) / (norm(A) * norm(B))
-    if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
-        return 0.0
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+    return float(similarities(as_vector(vec_a)[None, :], as_vector(vec_b)[None, :])[0])
@@ -0,0 +1,148 @@
+import math
+from datetime import datetime, timezone
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.module import Module
+from app.config import settings
+from app.models.progress import LessonProgress
+from app.services.certification_progress import is_module_locked, record_lesson_completion
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Tope de posición para lecciones sin duración registrada (igual al de LessonHeartbeatIn)
+MAX_POSITION_SECONDS = 24 * 60 * 60
+
+
+def _upsert_statement(dialect_insert):
+    table = LessonProgress.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.lesson_id],
+        set_={"completed": True, "completed_at": func.coalesce(table.c.completed_at, stmt.excluded.completed_at)},
+    )
+
+
+def _position_upsert_statement(dialect_insert):
+    table = LessonProgress.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.lesson_id],
+        set_={"position_seconds": stmt.excluded.position_seconds, "position_updated_at": stmt.excluded.position_updated_at},
+        # Un lote reintentado no pisa una posición más reciente
+        where=or_(table.c.position_updated_at.is_(None), table.c.position_updated_at <= stmt.excluded.position_updated_at),
+    )
+
+
+def upsert_lesson_completions(db: Session, rows: list[dict]) -> None:
+    """
+    Marca lecciones como completadas con INSERT ... ON CONFLICT sobre `_user_lesson_uc`
+    (un solo executemany, sin SELECT previo ni carrera entre requests simultáneos).
+    `rows` son dicts con user_id, lesson_id y completed_at; si la lección ya estaba
+    completada se conserva la fecha original. Actualiza también el progreso de
+    certificación de las lecciones que lo requieran. No hace commit.
+    """
+    if not rows:
+        return
+    dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        for row in rows:
+            progress = db.query(LessonProgress).filter(
+                LessonProgress.user_id == row["user_id"], LessonProgress.lesson_id == row["lesson_id"]
+            ).first()
+            if not progress:
+                db.add(LessonProgress(completed=True, **row))
+            else:
+                progress.completed = True
+                progress.completed_at = progress.completed_at or row["completed_at"]
+        db.flush()
+    else:
+        db.execute(_upsert_statement(dialect_insert), [{**row, "completed": True} for row in rows])
+
+    lesson_ids = {row["lesson_id"] for row in rows}
+    certification_lessons = {
+        lesson_id for (lesson_id,) in db.query(Lesson.id)
+        .join(Module, Module.id == Lesson.module_id)
+        .join(Course, Course.id == Module.course_id)
+        .filter(Lesson.id.in_(lesson_ids), Course.es_certificacion == True)
+    }
+    for row in rows:
+        if row["lesson_id"] in certification_lessons:
+            record_lesson_completion(db, row["user_id"], row["lesson_id"])
+
+
+def upsert_lesson_completion(db: Session, user_id: int, lesson_id: int) -> None:
+    """Marca una lección como completada (ver `upsert_lesson_completions`). No hace commit."""
+    completed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    upsert_lesson_completions(db, [{"user_id": user_id, "lesson_id": lesson_id, "completed_at": completed_at}])
+
+
+def record_watch_positions(db: Session, rows: list[dict]) -> None:
+    """
+    Guarda la posición de reproducción de lecciones VIDEO con un solo upsert en bloque.
+    `rows` son dicts con user_id, lesson_id, position_seconds, duration_seconds (None
+    para usar la duración de la lección) y updated_at. Completa las lecciones cuya
+    posición alcanza VIDEO_COMPLETION_RATIO de la duración, salvo las de módulos
+    bloqueados en cursos de certificación. La posición se limita a la duración guardada
+    de la lección; las filas con posiciones no finitas o negativas y las de lecciones
+    que no son VIDEO se ignoran. No hace commit.
+    """
+    if not rows:
+        return
+    lessons = {
+        lesson_id: (module_id, duration_minutes, course)
+        for lesson_id, module_id, duration_minutes, course in db.query(
+            Lesson.id, Lesson.module_id, Lesson.duration_minutes, Course
+        )
+        .join(Module, Module.id == Lesson.module_id)
+        .join(Course, Course.id == Module.course_id)
+        .filter(Lesson.id.in_({row["lesson_id"] for row in rows}), Lesson.content_type == "VIDEO")
+    }
+    positions, completions = [], []
+    for row in rows:
+        if row["lesson_id"] not in lessons:
+            continue
+        module_id, duration_minutes, course = lessons[row["lesson_id"]]
+        position, duration = row["position_seconds"], row["duration_seconds"]
+        if not math.isfinite(position) or position < 0:
+            continue
+        if duration is None or not math.isfinite(duration) or duration <= 0:
+            duration = None
+        stored_duration = duration_minutes * 60
+        if stored_duration:
+            duration = min(duration or stored_duration, stored_duration)
+        position = min(position, duration or MAX_POSITION_SECONDS)
+        positions.append({
+            "user_id": row["user_id"],
+            "lesson_id": row["lesson_id"],
+            "completed": False,
+            "position_seconds": int(position),
+            "position_updated_at": row["updated_at"],
+        })
+        if not duration or position < duration * settings.VIDEO_COMPLETION_RATIO:
+            continue
+        if course.es_certificacion and is_module_locked(db, row["user_id"], course, module_id):
+            continue
+        completions.append({"user_id": row["user_id"], "lesson_id": row["lesson_id"], "completed_at": row["updated_at"]})
+    if not positions:
+        return
+
+    dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        for values in positions:
+            progress = db.query(LessonProgress).filter(
+                LessonProgress.user_id == values["user_id"], LessonProgress.lesson_id == values["lesson_id"]
+            ).first()
+            if not progress:
+                db.add(LessonProgress(**values))
+            elif progress.position_updated_at is None or progress.position_updated_at <= values["position_updated_at"]:
+                progress.position_seconds = values["position_seconds"]
+                progress.position_updated_at = values["position_updated_at"]
+        db.flush()
+    else:
+        db.execute(_position_upsert_statement(dialect_insert), positions)
+    upsert_lesson_completions(db, completions)
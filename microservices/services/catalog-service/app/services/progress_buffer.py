@@ -0,0 +1,273 @@
+"""
+Buffer de escritura diferida (write-behind) del progreso de lecciones.
+
+Dos colas en Redis, cada una con un hash por usuario (lesson_id -> valor) y un set
+de usuarios con entradas pendientes:
+
+- Lecciones completadas (con PROGRESS_WRITE_BEHIND): el valor es la fecha de la
+  primera marca, así que los pings repetidos de la misma lección se coalescen.
+- Heartbeats de video: el valor es la última posición reportada, así que miles de
+  heartbeats por segundo se reducen a una fila por (usuario, lección) en cada flush.
+
+Un hilo de fondo vacía ambas colas cada PROGRESS_FLUSH_INTERVAL_SECONDS con upserts
+en bloque a lesson_progress. Las lecturas de progreso suman las entradas pendientes.
+
+Si Redis no está disponible, `add` y `add_position` retornan None/False y el llamador
+escribe directo en BD. Un proceso que muere entre tomar un lote y confirmarlo en BD
+pierde ese lote; por eso las completadas sólo se difieren en cursos sin certificación.
+
+Si la BD no responde, el lote vuelve a la cola y se reintenta en el siguiente flush.
+Si el lote falla por sus datos, se reintenta fila por fila y las filas que fallan
+solas pasan a una lista de Redis (dead-letter) en vez de volver a la cola, para que
+una fila inválida no bloquee a las demás en cada flush.
+
+Las fechas son UTC sin zona horaria, como las columnas DateTime de lesson_progress.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import redis
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "catalog:progress"
+DIRTY_USERS_KEY = f"{KEY_PREFIX}:dirty"
+DIRTY_POSITIONS_KEY = f"{KEY_PREFIX}:position:dirty"
+DEAD_USERS_KEY = f"{KEY_PREFIX}:dead"
+DEAD_POSITIONS_KEY = f"{KEY_PREFIX}:position:dead"
+REDIS_RETRY_SECONDS = 30
+
+# Errores de conexión con la BD: el lote se reintenta completo más tarde
+_DATABASE_UNAVAILABLE = (OperationalError, InterfaceError, DisconnectionError)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Entradas encoladas con zona horaria por versiones anteriores
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _user_key(user_id: int) -> str:
+    return f"{KEY_PREFIX}:pending:{user_id}"
+
+
+def _position_key(user_id: int) -> str:
+    return f"{KEY_PREFIX}:position:{user_id}"
+
+
+def _parse_completion(value: bytes) -> dict:
+    return {"completed_at": _naive_utc(datetime.fromisoformat(value.decode()))}
+
+
+def _encode_completion(row: dict) -> str:
+    return row["completed_at"].isoformat()
+
+
+def _parse_position(value: bytes) -> dict:
+    position, duration, updated_at = value.decode().split("|")
+    return {
+        "position_seconds": float(position),
+        "duration_seconds": float(duration) if duration else None,
+        "updated_at": _naive_utc(datetime.fromisoformat(updated_at)),
+    }
+
+
+def _encode_position(row: dict) -> str:
+    duration = "" if row["duration_seconds"] is None else row["duration_seconds"]
+    return f"{row['position_seconds']}|{duration}|{row['updated_at'].isoformat()}"
+
+
+class ProgressBuffer:
+    def __init__(self, redis_url: str, batch_size: int):
+        self.redis_url = redis_url
+        self.batch_size = batch_size
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning(f"Progress buffer: Redis unavailable ({exc}); writing progress directly.")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def add(self, user_id: int, lesson_id: int) -> Optional[datetime]:
+        """Encola la lección como completada. Retorna la fecha registrada, o None si no se pudo."""
+        client = self._client()
+        if client is None:
+            return None
+        now = _utc_now()
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.hsetnx(_user_key(user_id), lesson_id, now.isoformat())
+            pipe.hget(_user_key(user_id), lesson_id)
+            pipe.sadd(DIRTY_USERS_KEY, user_id)
+            _, first_seen, _ = pipe.execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return None
+        return _parse_completion(first_seen)["completed_at"]
+
+    def pending_lessons(self, user_id: int) -> set[int]:
+        """Lecciones del usuario completadas en el buffer pero aún no escritas en BD."""
+        client = self._client()
+        if client is None:
+            return set()
+        try:
+            return {int(lesson_id) for lesson_id in client.hkeys(_user_key(user_id))}
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return set()
+
+    def add_position(self, user_id: int, lesson_id: int, position_seconds: float, duration_seconds: Optional[float]) -> bool:
+        """Guarda la última posición de reproducción (un HSET). Retorna False si no se pudo."""
+        client = self._client()
+        if client is None:
+            return False
+        row = {
+            "position_seconds": position_seconds,
+            "duration_seconds": duration_seconds,
+            "updated_at": _utc_now(),
+        }
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(_position_key(user_id), lesson_id, _encode_position(row))
+            pipe.sadd(DIRTY_POSITIONS_KEY, user_id)
+            pipe.execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return False
+        return True
+
+    def pending_position(self, user_id: int, lesson_id: int) -> Optional[float]:
+        """Posición reportada que aún no se escribió en BD, o None."""
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            value = client.hget(_position_key(user_id), lesson_id)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return None
+        return _parse_position(value)["position_seconds"] if value else None
+
+    def _take(self, client, key_fn, parse, user_ids: list) -> list[dict]:
+        # HGETALL + DEL en una transacción: una marca llega antes (y se lleva) o después (queda)
+        pipe = client.pipeline(transaction=True)
+        for user_id in user_ids:
+            pipe.hgetall(key_fn(user_id))
+            pipe.delete(key_fn(user_id))
+        results = pipe.execute()
+        rows = []
+        for user_id, entries in zip(user_ids, results[::2]):
+            for lesson_id, value in entries.items():
+                rows.append({"user_id": user_id, "lesson_id": int(lesson_id), **parse(value)})
+        return rows
+
+    def _restore(self, client, key_fn, dirty_key: str, encode, rows: list[dict]) -> None:
+        # HSETNX: una entrada que llegó mientras tanto es más reciente y se conserva
+        pipe = client.pipeline(transaction=False)
+        for row in rows:
+            pipe.hsetnx(key_fn(row["user_id"]), row["lesson_id"], encode(row))
+            pipe.sadd(dirty_key, row["user_id"])
+        pipe.execute()
+
+    def _dead_letter(self, client, dead_key: str, encode, rows: list[dict], errors: list[str]) -> None:
+        pipe = client.pipeline(transaction=False)
+        for row, error in zip(rows, errors):
+            pipe.rpush(dead_key, json.dumps({
+                "user_id": row["user_id"], "lesson_id": row["lesson_id"], "value": encode(row), "error": error,
+            }))
+        pipe.execute()
+        logger.error(f"Progress buffer: moved {len(rows)} rows that fail on their own to {dead_key}: {errors[0]}")
+
+    def _write_rows(self, client, db, dead_key: str, key_fn, dirty_key: str, encode, write, rows: list[dict]) -> int:
+        """Escribe `rows` una por una; las que fallan van a `dead_key`. Retorna las escritas."""
+        failed, errors = [], []
+        for i, row in enumerate(rows):
+            try:
+                write(db, [row])
+                db.commit()
+            except _DATABASE_UNAVAILABLE:
+                db.rollback()
+                self._restore(client, key_fn, dirty_key, encode, rows[i:])
+                raise
+            except Exception as exc:
+                db.rollback()
+                failed.append(row)
+                errors.append(f"{type(exc).__name__}: {exc}")
+        if failed:
+            self._dead_letter(client, dead_key, encode, failed, errors)
+        return len(rows) - len(failed)
+
+    def _drain(self, client, db, dirty_key: str, dead_key: str, key_fn, parse, encode, write) -> int:
+        written = 0
+        while True:
+            user_ids = [int(user_id) for user_id in client.spop(dirty_key, self.batch_size) or []]
+            if not user_ids:
+                return written
+            rows = self._take(client, key_fn, parse, user_ids)
+            try:
+                write(db, rows)
+                db.commit()
+            except _DATABASE_UNAVAILABLE:
+                db.rollback()
+                self._restore(client, key_fn, dirty_key, encode, rows)
+                raise
+            except Exception as exc:
+                db.rollback()
+                logger.warning(f"Progress buffer: batch of {len(rows)} rows failed ({exc}); retrying row by row.")
+                written += self._write_rows(client, db, dead_key, key_fn, dirty_key, encode, write, rows)
+                continue
+            written += len(rows)
+
+    def flush(self, db) -> int:
+        """Escribe en BD todo lo pendiente, en lotes de batch_size usuarios. Retorna las filas escritas."""
+        from app.services.progress import record_watch_positions, upsert_lesson_completions
+
+        client = self._client()
+        if client is None:
+            return 0
+        written = 0
+        try:
+            written += self._drain(client, db, DIRTY_USERS_KEY, DEAD_USERS_KEY, _user_key,
+                                   _parse_completion, _encode_completion, upsert_lesson_completions)
+            written += self._drain(client, db, DIRTY_POSITIONS_KEY, DEAD_POSITIONS_KEY, _position_key,
+                                   _parse_position, _encode_position, record_watch_positions)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+        return written
+
+
+progress_buffer = ProgressBuffer(settings.REDIS_URL, settings.PROGRESS_FLUSH_BATCH_SIZE)
+
+
+def run_flusher(stop: threading.Event) -> None:
+    """Hilo de fondo: vacía el buffer periódicamente y una última vez al detenerse."""
+    from app.database import SessionLocal
+
+    while True:
+        stopping = stop.wait(settings.PROGRESS_FLUSH_INTERVAL_SECONDS)
+        db = SessionLocal()
+        try:
+            progress_buffer.flush(db)
+        except Exception as e:
+            logger.error(f"Progress buffer flush failed: {e}")
+        finally:
+            db.close()
+        if stopping:
+            return
@@ -0,0 +1,254 @@
+"""
+Escritura masiva de preguntas de quiz: todas las preguntas se insertan con un solo
+INSERT ... RETURNING y todas las opciones con un solo executemany, dentro de la
+transacción del llamador (sin commits intermedios). Las ediciones se aplican como un
+diff estructural para conservar las filas (y los embeddings) que no cambiaron.
+"""
+import csv
+import hashlib
+import io
+import json
+from collections import defaultdict
+from typing import Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.database import bulk_insert_ids
+from app.models.quiz import Quiz, QuizQuestion, QuizOption, QuizAttemptAnswer
+from app.schemas.quiz import QuizQuestionCreate
+from app.services.embeddings import get_embeddings
+
+CSV_COLUMNS = ["tipo", "enunciado", "puntaje", "sort_order", "respuesta_esperada", "opciones"]
+# En la columna "opciones" las opciones se separan con "|" y la correcta lleva "*" delante
+CSV_OPTION_SEPARATOR = "|"
+CSV_CORRECT_MARK = "*"
+
+
+class QuizImportError(ValueError):
+    pass
+
+
+def embed_expected_answers(questions: list, known: Optional[dict] = None) -> list:
+    """
+    Embeddings de las respuestas esperadas (ABIERTA), en una sola llamada al modelo.
+    Las respuestas que ya están en `known` (texto -> embedding) reutilizan su vector.
+    """
+    known = known or {}
+    embeddings = [None] * len(questions)
+    pending = []
+    for i, q in enumerate(questions):
+        if q.tipo != "ABIERTA" or not q.respuesta_esperada:
+            continue
+        if q.respuesta_esperada in known:
+            embeddings[i] = known[q.respuesta_esperada]
+        else:
+            pending.append(i)
+    if pending:
+        vectors = get_embeddings([questions[i].respuesta_esperada for i in pending])
+        for i, vector in zip(pending, vectors):
+            embeddings[i] = vector
+    return embeddings
+
+
+def expected_embeddings(db: Session, quiz_id: int) -> dict:
+    """Embeddings ya guardados en el quiz, por texto de respuesta esperada."""
+    rows = db.execute(
+        select(QuizQuestion.respuesta_esperada, QuizQuestion.respuesta_esperada_embedding).where(
+            QuizQuestion.quiz_id == quiz_id, QuizQuestion.respuesta_esperada_embedding.isnot(None)
+        )
+    )
+    return {text: embedding for text, embedding in rows}
+
+
+def insert_questions(db: Session, quiz_id: int, questions: list, embeddings: list) -> None:
+    """Inserta preguntas y opciones en bloque. No hace commit."""
+    if not questions:
+        return
+    question_ids = bulk_insert_ids(db, QuizQuestion, [
+        {
+            "quiz_id": quiz_id,
+            "tipo": q.tipo,
+            "enunciado": q.enunciado,
+            "puntaje": q.puntaje,
+            "sort_order": q.sort_order,
+            "respuesta_esperada": q.respuesta_esperada,
+            "respuesta_esperada_embedding": embedding,
+        }
+        for q, embedding in zip(questions, embeddings)
+    ])
+    options = [
+        {"question_id": question_id, "texto": opt.texto, "es_correcta": opt.es_correcta}
+        for q, question_id in zip(questions, question_ids)
+        for opt in q.options or []
+    ]
+    if options:
+        db.execute(insert(QuizOption), options)
+
+
+def content_hash(question) -> str:
+    """Huella del contenido de una pregunta (modelo ORM o schema); ignora puntaje y orden."""
+    data = [
+        question.tipo,
+        question.enunciado.strip(),
+        (question.respuesta_esperada or "").strip(),
+        [[opt.texto.strip(), bool(opt.es_correcta)] for opt in question.options or []],
+    ]
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False).encode()).hexdigest()
+
+
+def _match(existing: list, incoming: list, key, label: str) -> list:
+    """
+    Fila existente que corresponde a cada elemento entrante (o None): primero por id
+    explícito y, para los que no traen id, por `key` (contenido) entre las restantes.
+    """
+    by_id = {row.id: row for row in existing}
+    matches = [None] * len(incoming)
+    used = set()
+    for i, item in enumerate(incoming):
+        if item.id is None:
+            continue
+        if item.id not in by_id:
+            raise QuizImportError(f"{label} {item.id} does not belong to this quiz")
+        if item.id in used:
+            raise QuizImportError(f"{label} {item.id} appears more than once")
+        matches[i] = by_id[item.id]
+        used.add(item.id)
+
+    by_key = defaultdict(list)
+    for row in existing:
+        if row.id not in used:
+            by_key[key(row)].append(row)
+    for i, item in enumerate(incoming):
+        if item.id is None and by_key.get(key(item)):
+            matches[i] = by_key[key(item)].pop(0)
+    return matches
+
+
+def _referenced(db: Session, column, ids: list) -> set:
+    """Ids que aparecen en respuestas de intentos (no se pueden borrar sin perder historial)."""
+    if not ids:
+        return set()
+    return set(db.scalars(select(column).where(column.in_(ids)).distinct()))
+
+
+def _remove(db: Session, model, ids: list, referenced: set) -> int:
+    """Borra las filas sin referencias y archiva las referenciadas. Retorna cuántas archivó."""
+    archived = [i for i in ids if i in referenced]
+    deleted = [i for i in ids if i not in referenced]
+    if archived:
+        db.query(model).filter(model.id.in_(archived)).update({model.archivada: True}, synchronize_session=False)
+    if deleted:
+        db.query(model).filter(model.id.in_(deleted)).delete(synchronize_session=False)
+    return len(archived)
+
+
+def sync_questions(db: Session, quiz_id: int, questions: list, embeddings: list) -> dict:
+    """
+    Aplica `questions` sobre las preguntas vigentes del quiz con un diff estructural:
+    cada pregunta entrante se empareja por id o por contenido; las emparejadas se
+    actualizan en su lugar (mismo id, así las respuestas de intentos siguen apuntando
+    a ella), las nuevas se insertan en bloque y las que faltan se borran, o se
+    archivan si algún intento las referencia. Igual con las opciones. No hace commit.
+    Retorna los conteos de la operación.
+    """
+    existing = (
+        db.query(QuizQuestion)
+        .options(selectinload(QuizQuestion.options))
+        .filter(QuizQuestion.quiz_id == quiz_id, QuizQuestion.archivada == False)  # noqa: E712
+        .all()
+    )
+    matches = _match(existing, questions, content_hash, "Question")
+    summary = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "archived": 0}
+
+    new_questions, new_embeddings, new_options, removed_options = [], [], [], []
+    for q, current, embedding in zip(questions, matches, embeddings):
+        if current is None:
+            new_questions.append(q)
+            new_embeddings.append(embedding)
+            continue
+
+        changed = False
+        values = q.model_dump(include={"tipo", "enunciado", "puntaje", "sort_order", "respuesta_esperada"})
+        values["respuesta_esperada_embedding"] = embedding
+        for field, value in values.items():
+            if getattr(current, field) != value:
+                setattr(current, field, value)
+                changed = True
+
+        options = q.options or []
+        option_matches = _match(list(current.options), options, lambda opt: opt.texto.strip(), "Option")
+        for opt, current_opt in zip(options, option_matches):
+            if current_opt is None:
+                new_options.append({"question_id": current.id, "texto": opt.texto, "es_correcta": opt.es_correcta})
+                changed = True
+            elif (current_opt.texto, current_opt.es_correcta) != (opt.texto, opt.es_correcta):
+                current_opt.texto, current_opt.es_correcta = opt.texto, opt.es_correcta
+                changed = True
+        kept = {current_opt.id for current_opt in option_matches if current_opt is not None}
+        dropped = [current_opt.id for current_opt in current.options if current_opt.id not in kept]
+        removed_options.extend(dropped)
+        summary["updated" if changed or dropped else "unchanged"] += 1
+
+    matched = {current.id for current in matches if current is not None}
+    removed_questions = [current for current in existing if current.id not in matched]
+    removed_options.extend(opt.id for current in removed_questions for opt in current.options)
+    referenced_options = _referenced(db, QuizAttemptAnswer.selected_option_id, removed_options)
+    referenced_questions = _referenced(db, QuizAttemptAnswer.question_id, [current.id for current in removed_questions])
+    referenced_questions |= {
+        current.id for current in removed_questions if any(opt.id in referenced_options for opt in current.options)
+    }
+    # Una pregunta archivada conserva sus opciones; las de una borrada se van con ella
+    kept_with_question = {opt.id for current in removed_questions if current.id in referenced_questions for opt in current.options}
+    _remove(db, QuizOption, [i for i in removed_options if i not in kept_with_question], referenced_options)
+    summary["archived"] = _remove(db, QuizQuestion, [current.id for current in removed_questions], referenced_questions)
+    summary["deleted"] = len(removed_questions) - summary["archived"]
+
+    if new_options:
+        db.execute(insert(QuizOption), new_options)
+    insert_questions(db, quiz_id, new_questions, new_embeddings)
+    summary["inserted"] = len(new_questions)
+    return summary
+
+
+def load_quiz_detail(db: Session, quiz_id: int) -> Quiz:
+    """Quiz con preguntas y opciones cargadas en 3 consultas, para serializarlo."""
+    return (
+        db.query(Quiz)
+        .options(selectinload(Quiz.questions).selectinload(QuizQuestion.options))
+        .filter(Quiz.id == quiz_id)
+        .populate_existing()
+        .one()
+    )
+
+
+def parse_questions_csv(text: str) -> list[QuizQuestionCreate]:
+    """Convierte un banco de preguntas en CSV (columnas CSV_COLUMNS) en preguntas validadas."""
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [c for c in ("tipo", "enunciado") if c not in (reader.fieldnames or [])]
+    if missing:
+        raise QuizImportError(f"Missing CSV columns: {', '.join(missing)}")
+
+    questions = []
+    for line, row in enumerate(reader, start=2):
+        options = []
+        for raw in (row.get("opciones") or "").split(CSV_OPTION_SEPARATOR):
+            raw = raw.strip()
+            if raw:
+                correct = raw.startswith(CSV_CORRECT_MARK)
+                options.append({"texto": raw[1:].strip() if correct else raw, "es_correcta": correct})
+        data = {
+            "tipo": (row.get("tipo") or "").strip().upper(),
+            "enunciado": row.get("enunciado") or "",
+            "respuesta_esperada": (row.get("respuesta_esperada") or "").strip() or None,
+            "options": options,
+        }
+        for field in ("puntaje", "sort_order"):
+            if (row.get(field) or "").strip():
+                data[field] = row[field].strip()
+        try:
+            questions.append(QuizQuestionCreate(**data))
+        except ValidationError as e:
+            raise QuizImportError(f"Invalid row {line}: {e.errors()[0]['msg']}")
+    return questions
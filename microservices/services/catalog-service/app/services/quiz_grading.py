@@ -1,75 +1,205 @@
-from app.models.quiz import Quiz
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.quiz import Quiz, QuizQuestion
 from app.schemas.quiz import AnswerSubmit
-from app.services.embeddings import get_embedding, cosine_similarity
+from app.services.embeddings import get_embeddings, similarities
+
+UMBRAL_COMPLETO = 0.75
+UMBRAL_PARCIAL = 0.60
+CREDITO_PARCIAL = 0.70
+
+_SIN_OPCION = -1      # pregunta sin opción correcta
+_SIN_SELECCION = -2   # respuesta sin opción seleccionada
+
+COMPILED_CACHE_SIZE = 512
+
 
-def calificar_intento(quiz: Quiz, respuestas: list[AnswerSubmit]) -> dict:
+class CompiledQuiz:
+    """
+    Quiz precompilado en arreglos: ids y pesos de las preguntas, opción correcta de
+    cada pregunta de opción múltiple y la matriz de embeddings esperados (una fila
+    por pregunta, normalizada). Calificar no vuelve a tocar los modelos ORM.
+    """
+
+    def __init__(self, quiz: Quiz):
+        questions = list(quiz.questions)
+        self.quiz_id = quiz.id
+        self.version = quiz.version
+        self.lesson_id = quiz.lesson_id
+        self.puntaje_minimo_aprobacion = quiz.puntaje_minimo_aprobacion
+        self.question_ids = [q.id for q in questions]
+        self.index = {q.id: i for i, q in enumerate(questions)}
+        self.weights = np.array([q.puntaje for q in questions], dtype=np.float64)
+        self.is_multiple_choice = np.array([q.tipo == "OPCION_MULTIPLE" for q in questions], dtype=bool)
+        self.correct_option = np.array([
+            next((opt.id for opt in q.options if opt.es_correcta), _SIN_OPCION)
+            if q.tipo == "OPCION_MULTIPLE" else _SIN_OPCION
+            for q in questions
+        ], dtype=np.int64)
+        self.has_expected = np.array(
+            [q.tipo == "ABIERTA" and bool(q.respuesta_esperada_embedding) for q in questions], dtype=bool
+        )
+        blobs = [q.respuesta_esperada_embedding for q, ok in zip(questions, self.has_expected) if ok]
+        dim = len(blobs[0]) // 4 if blobs else 0
+        self.expected = np.zeros((len(questions), dim), dtype=np.float32)
+        if blobs:
+            self.expected[self.has_expected] = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), dim)
+
+
+_compiled_cache: OrderedDict = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_quiz(db: Session, quiz: Quiz) -> CompiledQuiz:
+    """
+    Quiz compilado desde la caché del proceso, válido mientras `quiz.version` no
+    cambie. Sólo en un fallo se leen preguntas y opciones (con selectinload).
+    """
+    with _compiled_lock:
+        compiled = _compiled_cache.get(quiz.id)
+        if compiled is not None and compiled.version == quiz.version:
+            _compiled_cache.move_to_end(quiz.id)
+            return compiled
+
+    quiz = (
+        db.query(Quiz)
+        .options(selectinload(Quiz.questions).selectinload(QuizQuestion.options))
+        .filter(Quiz.id == quiz.id)
+        .populate_existing()
+        .one()
+    )
+    compiled = CompiledQuiz(quiz)
+    with _compiled_lock:
+        _compiled_cache[quiz.id] = compiled
+        _compiled_cache.move_to_end(quiz.id)
+        while len(_compiled_cache) > COMPILED_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
+
+
+def invalidate_compiled_quiz(quiz_id: int) -> None:
+    with _compiled_lock:
+        _compiled_cache.pop(quiz_id, None)
+
+
+def _compiled(quiz: Union[Quiz, CompiledQuiz]) -> CompiledQuiz:
+    return quiz if isinstance(quiz, CompiledQuiz) else CompiledQuiz(quiz)
+
+
+def respuestas_abiertas(quiz: Union[Quiz, CompiledQuiz], respuestas: list[AnswerSubmit]) -> list[int]:
+    """Índices de `respuestas` que requieren embedding (preguntas ABIERTA con texto)."""
+    compiled = _compiled(quiz)
+    return [
+        i for i, resp in enumerate(respuestas)
+        if resp.respuesta_texto
+        and resp.question_id in compiled.index
+        and compiled.has_expected[compiled.index[resp.question_id]]
+    ]
+
+
+def calificar_intentos(
+    quiz: Union[Quiz, CompiledQuiz],
+    envios: list[list[AnswerSubmit]],
+    embeddings_envios: Optional[list[dict]] = None,
+) -> list[dict]:
+    """
+    Califica varios envíos del mismo quiz con operaciones vectorizadas. Reglas:
+    opción múltiple completa si coincide con la opción correcta; abierta completa
+    con similitud >= 0.75, 70% con >= 0.60; las preguntas sin responder suman al
+    puntaje máximo. `embeddings_envios[k]` mapea índice de respuesta -> embedding
+    del envío k; si no se pasa, se calculan aquí en un solo lote.
+    """
+    compiled = _compiled(quiz)
+    if embeddings_envios is None:
+        abiertas = [respuestas_abiertas(compiled, respuestas) for respuestas in envios]
+        vectores = iter(get_embeddings([envios[k][i].respuesta_texto for k, idx in enumerate(abiertas) for i in idx]))
+        embeddings_envios = [{i: next(vectores) for i in idx} for idx in abiertas]
+
+    # Aplanar las respuestas válidas de todos los envíos (en orden) en arreglos paralelos
+    filas = []
+    for k, respuestas in enumerate(envios):
+        for i, resp in enumerate(respuestas):
+            qi = compiled.index.get(resp.question_id)
+            if qi is not None:
+                filas.append((k, i, qi))
+    n_envios = len(envios)
+    envio = np.array([k for k, _, _ in filas], dtype=np.int64)
+    pregunta = np.array([qi for _, _, qi in filas], dtype=np.int64)
+    respuestas = [envios[k][i] for k, i, _ in filas]
+    seleccion = np.array(
+        [_SIN_SELECCION if r.selected_option_id is None else r.selected_option_id for r in respuestas], dtype=np.int64
+    )
+    peso = compiled.weights[pregunta]
+
+    # Opción múltiple: una comparación contra la opción correcta de cada pregunta
+    correcta = compiled.correct_option[pregunta]
+    puntaje = np.where(compiled.is_multiple_choice[pregunta] & (correcta != _SIN_OPCION) & (seleccion == correcta), peso, 0.0)
+
+    # Abiertas: similitud por producto punto fila a fila contra la matriz esperada
+    similitud = np.full(len(filas), np.nan)
+    abiertas = np.array([bool(r.respuesta_texto) for r in respuestas], dtype=bool) & compiled.has_expected[pregunta]
+    if abiertas.any():
+        posiciones = np.flatnonzero(abiertas)
+        blobs = b"".join(embeddings_envios[filas[p][0]][filas[p][1]] for p in posiciones)
+        dadas = np.frombuffer(blobs, dtype=np.float32).reshape(len(posiciones), -1)
+        sims = similarities(dadas, compiled.expected[pregunta[posiciones]])
+        similitud[posiciones] = sims
+        w = peso[posiciones]
+        puntaje[posiciones] = np.where(
+            sims >= UMBRAL_COMPLETO, w, np.where(sims >= UMBRAL_PARCIAL, w * CREDITO_PARCIAL, 0.0)
+        )
+
+    # Preguntas no respondidas de cada envío (en el orden del quiz)
+    respondidas = np.zeros((n_envios, len(compiled.question_ids)), dtype=bool)
+    respondidas[envio, pregunta] = True
+    faltantes_envio, faltantes_pregunta = np.nonzero(~respondidas)
+
+    # bincount acumula en orden, igual que la suma secuencial respuesta a respuesta
+    obtenido = np.bincount(envio, weights=puntaje, minlength=n_envios)
+    maximo = np.bincount(
+        np.concatenate([envio, faltantes_envio]),
+        weights=np.concatenate([peso, compiled.weights[faltantes_pregunta]]),
+        minlength=n_envios,
+    )
+
+    resultados = [
+        {"puntaje_obtenido": float(obtenido[k]), "puntaje_maximo": float(maximo[k]), "detalles": []}
+        for k in range(n_envios)
+    ]
+    for p, (k, _, qi) in enumerate(filas):
+        resp = respuestas[p]
+        resultados[k]["detalles"].append({
+            "question_id": compiled.question_ids[qi],
+            "respuesta_texto": resp.respuesta_texto,
+            "selected_option_id": resp.selected_option_id,
+            "similitud": None if np.isnan(similitud[p]) else float(similitud[p]),
+            "puntaje_obtenido": float(puntaje[p]),
+        })
+    for resultado in resultados:
+        maximo_k = resultado["puntaje_maximo"]
+        resultado["porcentaje"] = (resultado["puntaje_obtenido"] / maximo_k * 100.0) if maximo_k > 0 else 0.0
+        resultado["aprobado"] = resultado["porcentaje"] >= compiled.puntaje_minimo_aprobacion
+    return resultados
+
+
+def calificar_intento(
+    quiz: Union[Quiz, CompiledQuiz], respuestas: list[AnswerSubmit], embeddings_respuestas: Optional[dict] = None
+) -> dict:
     """
     Califica un intento de quiz basándose en las respuestas dadas.
+    `embeddings_respuestas` (índice de respuesta -> embedding) permite calcular los
+    embeddings fuera de esta función; si no se pasa, se calculan aquí en un lote.
     Retorna un diccionario con:
       - puntaje_obtenido
       - puntaje_maximo
       - porcentaje
       - aprobado
-      - detalles_respuestas (lista con data para crear QuizAttemptAnswer)
+      - detalles (lista con data para crear QuizAttemptAnswer)
     """
-    puntaje_maximo = 0.0
-    puntaje_obtenido = 0.0
-    detalles = []
-
-    # Crear mapa de preguntas para fácil acceso
-    preguntas_map = {q.id: q for q in quiz.questions}
-
-    for resp in respuestas:
-        pregunta = preguntas_map.get(resp.question_id)
-        if not pregunta:
-            continue
-            
-        puntaje_maximo += pregunta.puntaje
-        puntaje_pregunta = 0.0
-        similitud = None
-
-        if pregunta.tipo == "OPCION_MULTIPLE":
-            # Buscar la opción seleccionada y verificar si es correcta
-            opcion_correcta = next((opt for opt in pregunta.options if opt.es_correcta), None)
-            if opcion_correcta and resp.selected_option_id == opcion_correcta.id:
-                puntaje_pregunta = pregunta.puntaje
-        
-        elif pregunta.tipo == "ABIERTA":
-            if resp.respuesta_texto and pregunta.respuesta_esperada_embedding:
-                # Calcular embedding de la respuesta dada
-                resp_embedding = get_embedding(resp.respuesta_texto)
-                # Calcular similitud
-                similitud = cosine_similarity(resp_embedding, pregunta.respuesta_esperada_embedding)
-                
-                # Asignar puntaje según rangos
-                if similitud >= 0.75:
-                    puntaje_pregunta = pregunta.puntaje
-                elif similitud >= 0.60:
-                    puntaje_pregunta = pregunta.puntaje * 0.70
-                else:
-                    puntaje_pregunta = 0.0
-
-        puntaje_obtenido += puntaje_pregunta
-        detalles.append({
-            "question_id": pregunta.id,
-            "respuesta_texto": resp.respuesta_texto,
-            "selected_option_id": resp.selected_option_id,
-            "similitud": similitud,
-            "puntaje_obtenido": puntaje_pregunta
-        })
-
-    # Si el estudiante no respondió alguna pregunta, sumar al puntaje máximo de todas formas
-    for q in quiz.questions:
-        if not any(d["question_id"] == q.id for d in detalles):
-            puntaje_maximo += q.puntaje
-
-    porcentaje = (puntaje_obtenido / puntaje_maximo * 100.0) if puntaje_maximo > 0 else 0.0
-    aprobado = porcentaje >= quiz.puntaje_minimo_aprobacion
-
-    return {
-        "puntaje_obtenido": puntaje_obtenido,
-        "puntaje_maximo": puntaje_maximo,
-        "porcentaje": porcentaje,
-        "aprobado": aprobado,
-        "detalles": detalles
-    }
+    embeddings_envios = None if embeddings_respuestas is None else [embeddings_respuestas]
+    return calificar_intentos(quiz, [respuestas], embeddings_envios)[0]
@@ -0,0 +1,82 @@
+from sqlalchemy import func, case, select
+from sqlalchemy.orm import Session
+from app.models.course import Course
+from app.models.rating import Rating
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCORES = (1, 2, 3, 4, 5)
+RECONCILE_CHUNK = 1000
+
+
+def _hist_column(score: int):
+    return getattr(Course, f"rating_hist_{score}")
+
+
+def histogram(course: Course) -> list[int]:
+    """Cantidad de ratings por puntaje, de 1 a 5 estrellas."""
+    return [getattr(course, f"rating_hist_{score}") for score in SCORES]
+
+
+def record_rating(db: Session, course_id: int, score: int) -> None:
+    """
+    Actualiza los agregados del curso dentro de la transacción del nuevo Rating.
+    El UPDATE es relativo (col = col + n), así que no se pierden escrituras concurrentes.
+    """
+    db.query(Course).filter(Course.id == course_id).update(
+        {
+            Course.rating_count: Course.rating_count + 1,
+            Course.rating_sum: Course.rating_sum + score,
+            Course.rating_avg: (Course.rating_sum + score) * 1.0 / (Course.rating_count + 1),
+            _hist_column(score): _hist_column(score) + 1,
+        },
+        synchronize_session=False,
+    )
+
+
+def reconcile_ratings(db: Session) -> dict:
+    """
+    Recalcula los agregados desde la tabla ratings y corrige los cursos con deriva.
+    Retorna {checked, repaired}.
+    """
+    actual = {}
+    rows = db.query(Rating.course_id, Rating.score, func.count(Rating.id)).group_by(Rating.course_id, Rating.score).all()
+    for course_id, score, count in rows:
+        actual.setdefault(course_id, {s: 0 for s in SCORES})[score] = count
+
+    courses = db.query(
+        Course.id, Course.rating_count, Course.rating_sum, Course.rating_avg,
+        *[_hist_column(s) for s in SCORES]
+    ).all()
+
+    drifted = []
+    for course_id, count, total, avg, *hist in courses:
+        expected = actual.get(course_id, {s: 0 for s in SCORES})
+        expected_hist = [expected[s] for s in SCORES]
+        expected_count = sum(expected_hist)
+        expected_sum = sum(s * expected[s] for s in SCORES)
+        expected_avg = expected_sum / expected_count if expected_count else 0.0
+        if (count, total, list(hist)) != (expected_count, expected_sum, expected_hist) or abs(avg - expected_avg) > 1e-6:
+            drifted.append(course_id)
+
+    if drifted:
+        # Se recalcula en SQL para tomar también ratings insertados mientras corría el job
+        count_q = select(func.count(Rating.id)).where(Rating.course_id == Course.id).scalar_subquery()
+        sum_q = select(func.coalesce(func.sum(Rating.score), 0)).where(Rating.course_id == Course.id).scalar_subquery()
+        values = {
+            Course.rating_count: count_q,
+            Course.rating_sum: sum_q,
+            Course.rating_avg: case((count_q > 0, sum_q * 1.0 / count_q), else_=0.0),
+        }
+        for s in SCORES:
+            values[_hist_column(s)] = (
+                select(func.count(Rating.id)).where(Rating.course_id == Course.id, Rating.score == s).scalar_subquery()
+            )
+        for i in range(0, len(drifted), RECONCILE_CHUNK):
+            chunk = drifted[i:i + RECONCILE_CHUNK]
+            db.query(Course).filter(Course.id.in_(chunk)).update(values, synchronize_session=False)
+            db.commit()
+        logger.warning(f"Rating aggregates repaired for {len(drifted)} courses")
+
+    return {"checked": len(courses), "repaired": len(drifted)}
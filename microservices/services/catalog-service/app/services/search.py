@@ -0,0 +1,221 @@
+import html
+import re
+import unicodedata
+from collections import defaultdict
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session, Query
+from app.models.course import Course
+from app.models.category import Category
+from app.models.module import Module
+from app.models.lesson import Lesson
+from app.models.search import CourseSearchTerm
+
+# Pesos por campo. En PostgreSQL se usan las etiquetas A-D de setweight (ts_rank_cd
+# las pondera 1.0/0.4/0.2/0.1 por defecto); el índice en Python replica esos pesos.
+FIELD_WEIGHTS = {
+    "title": ("A", 1.0),
+    "category": ("B", 0.4),
+    "lessons": ("C", 0.2),
+    "description": ("D", 0.1),
+}
+
+SNIPPET_LENGTH = 160
+MAX_QUERY_TOKENS = 8
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "o", "para",
+    "por", "que", "se", "su", "sus", "un", "una", "uno", "y",
+    "and", "for", "in", "of", "on", "the", "to", "with",
+}
+
+# Sufijos del español, del más largo al más corto, para un stemming ligero. Incluye la
+# vocal final para que "programa", "programas" y "programación" compartan raíz ("program").
+_SUFFIXES = (
+    "aciones", "uciones", "amiento", "imiento", "mente", "acion", "ucion", "ancia", "encia",
+    "idades", "idad", "ables", "ibles", "able", "ible", "istas", "ista", "iendo", "adora",
+    "ando", "ador", "ores", "oras", "ar", "er", "ir", "es", "os", "as", "s", "a", "e", "o",
+)
+_MIN_STEM = 4
+
+
+def _fold_char(c: str) -> str:
+    # Se conserva la longitud original para poder resaltar sobre el texto sin normalizar
+    return unicodedata.normalize("NFD", c)[0].lower()[0]
+
+
+def fold(value: str) -> str:
+    """Minúsculas y sin tildes, carácter a carácter ("Programación" -> "programacion")."""
+    return "".join(_fold_char(c) for c in value or "")
+
+
+def stem(token: str) -> str:
+    """Raíz del término; se aplica igual a los términos indexados y a los de la consulta."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(value: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(fold(value)) if t not in STOPWORDS]
+
+
+def query_tokens(q: str) -> list[str]:
+    seen = []
+    for token in tokenize(q):
+        if token not in seen:
+            seen.append(token)
+    return seen[:MAX_QUERY_TOKENS]
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _course_fields(db: Session, course: Course) -> dict:
+    category_name = db.query(Category.name).filter(Category.id == course.category_id).scalar() or ""
+    lesson_titles = (
+        db.query(Lesson.title)
+        .join(Module, Lesson.module_id == Module.id)
+        .filter(Module.course_id == course.id)
+        .all()
+    )
+    return {
+        "title": course.title or "",
+        "category": category_name,
+        "lessons": " ".join(t for (t,) in lesson_titles),
+        "description": course.description or "",
+    }
+
+
+def index_course(db: Session, course: Course) -> None:
+    """
+    Recalcula el documento de búsqueda del curso dentro de la transacción actual.
+    Debe llamarse tras cualquier cambio en el título, descripción, categoría o lecciones.
+    """
+    db.flush()
+    fields = _course_fields(db, course)
+
+    if _is_postgres(db):
+        db.execute(
+            text(
+                "UPDATE courses SET search_document = "
+                "setweight(to_tsvector('spanish', :title), 'A') || "
+                "setweight(to_tsvector('spanish', :category), 'B') || "
+                "setweight(to_tsvector('spanish', :lessons), 'C') || "
+                "setweight(to_tsvector('spanish', :description), 'D') "
+                "WHERE id = :course_id"
+            ),
+            {**{k: fold(v) for k, v in fields.items()}, "course_id": course.id},
+        )
+        return
+
+    weights = defaultdict(float)
+    for field, value in fields.items():
+        _, weight = FIELD_WEIGHTS[field]
+        for token in tokenize(value):
+            weights[stem(token)[:64]] += weight
+
+    db.query(CourseSearchTerm).filter(CourseSearchTerm.course_id == course.id).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        CourseSearchTerm,
+        [{"course_id": course.id, "term": term, "weight": weight} for term, weight in weights.items()],
+    )
+
+
+def index_missing(db: Session) -> int:
+    """Indexa los cursos que aún no tienen documento de búsqueda. Retorna cuántos indexó."""
+    if _is_postgres(db):
+        pending = db.query(Course).filter(Course.search_document.is_(None))
+    else:
+        indexed = select(CourseSearchTerm.course_id).where(CourseSearchTerm.course_id == Course.id).exists()
+        pending = db.query(Course).filter(~indexed)
+    count = 0
+    for course in pending.all():
+        index_course(db, course)
+        count += 1
+    db.commit()
+    return count
+
+
+def rebuild_index(db: Session) -> int:
+    """Reindexa todos los cursos. Retorna la cantidad de cursos procesados."""
+    count = 0
+    for course in db.query(Course).yield_per(500):
+        index_course(db, course)
+        count += 1
+    db.commit()
+    return count
+
+
+def apply_search(db: Session, query: Query, q: str):
+    """
+    Filtra `query` (Query o select() sobre Course) por los términos de `q`. Retorna
+    (query, rank), donde rank es la expresión de relevancia para ordenar (None si `q`
+    no tiene términos útiles). Cada término se busca por prefijo, para que funcione
+    mientras el usuario escribe. `db` sólo se usa para conocer el motor (puede ser async).
+    """
+    tokens = query_tokens(q)
+    if not tokens:
+        return query, None
+
+    if _is_postgres(db):
+        tsquery = func.to_tsquery("spanish", " & ".join(f"{t}:*" for t in tokens))
+        query = query.filter(Course.search_document.op("@@")(tsquery))
+        return query, func.ts_rank_cd(Course.search_document, tsquery)
+
+    # Un subquery por término (rango sobre el índice term, course_id) y se intersectan con JOIN
+    rank = None
+    for token in tokens:
+        prefix = stem(token)
+        matches = (
+            select(
+                CourseSearchTerm.course_id.label("course_id"),
+                func.sum(CourseSearchTerm.weight).label("score"),
+            )
+            .where(CourseSearchTerm.term >= prefix, CourseSearchTerm.term < prefix + "\uffff")
+            .group_by(CourseSearchTerm.course_id)
+            .subquery()
+        )
+        query = query.join(matches, matches.c.course_id == Course.id)
+        rank = matches.c.score if rank is None else rank + matches.c.score
+
+    return query, rank
+
+
+def highlight(value: str, q: str, length: int = SNIPPET_LENGTH) -> str:
+    """
+    Fragmento de `value` alrededor de la primera coincidencia, con los términos
+    encontrados envueltos en <mark>. El texto se compara sin tildes ni mayúsculas.
+    """
+    value = value or ""
+    prefixes = [stem(t) for t in query_tokens(q)]
+    folded = fold(value)
+    spans = []
+    if prefixes:
+        pattern = re.compile(r"\b(?:%s)[a-z0-9]*" % "|".join(re.escape(p) for p in prefixes))
+        spans = [m.span() for m in pattern.finditer(folded)]
+
+    start = 0
+    if len(value) > length and spans:
+        start = max(0, spans[0][0] - length // 4)
+    end = min(len(value), start + length)
+
+    parts = []
+    cursor = start
+    for s, e in spans:
+        if s < start or e > end:
+            continue
+        parts.append(html.escape(value[cursor:s]))
+        parts.append(f"<mark>{html.escape(value[s:e])}</mark>")
+        cursor = e
+    parts.append(html.escape(value[cursor:end]))
+
+    snippet = "".join(parts)
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(value):
+        snippet = snippet + "…"
+    return snippet
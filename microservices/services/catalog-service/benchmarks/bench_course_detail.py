@@ -0,0 +1,103 @@
+"""
+Benchmark: GET /courses/{id} con cursos de distinto número de módulos.
+Verifica que la cantidad de consultas SQL sea constante (sin N+1 por módulo).
+
+Uso (desde microservices/services/catalog-service):
+    python benchmarks/bench_course_detail.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_async_db
+from app.models import Category, Course, Module, Lesson, Rating
+from app.routers import courses
+
+MODULE_COUNTS = [1, 5, 30, 100]
+LESSONS_PER_MODULE = 6
+REPETITIONS = 50
+
+# El detalle se sirve con el engine async; los datos se cargan con uno sync sobre el mismo archivo
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+engine = create_engine(f"sqlite:///{DB_PATH}")
+TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+AsyncTestingSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+statements = []
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+async def override_get_async_db():
+    async with AsyncTestingSession() as db:
+        yield db
+
+
+def seed() -> dict:
+    db = TestingSession()
+    category = Category(name="Benchmark")
+    db.add(category)
+    db.flush()
+    course_ids = {}
+    for n_modules in MODULE_COUNTS:
+        course = Course(title=f"Curso {n_modules} módulos", description="bench", category_id=category.id,
+                        price=10.0, status="PUBLISHED", instructor_id=1)
+        db.add(course)
+        db.flush()
+        for m in range(n_modules):
+            module = Module(course_id=course.id, title=f"Módulo {m}", sort_order=m)
+            db.add(module)
+            db.flush()
+            db.add_all([
+                Lesson(module_id=module.id, title=f"Lección {m}.{l}", sort_order=l)
+                for l in range(LESSONS_PER_MODULE)
+            ])
+        db.add_all([Rating(course_id=course.id, user_id=u, score=1 + u % 5) for u in range(20)])
+        course_ids[n_modules] = course.id
+    db.commit()
+    db.close()
+    return course_ids
+
+
+def main():
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/api/catalog")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    client = TestClient(app)
+
+    course_ids = seed()
+    query_counts = {}
+    print(f"{'módulos':>8} {'lecciones':>10} {'consultas':>10} {'ms/req':>8}")
+    for n_modules, course_id in course_ids.items():
+        statements.clear()
+        response = client.get(f"/api/catalog/courses/{course_id}")
+        assert response.status_code == 200, response.text
+        assert len(response.json()["modules"]) == n_modules
+        query_counts[n_modules] = len(statements)
+
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            client.get(f"/api/catalog/courses/{course_id}")
+        elapsed_ms = (time.perf_counter() - start) * 1000 / REPETITIONS
+        print(f"{n_modules:>8} {n_modules * LESSONS_PER_MODULE:>10} {query_counts[n_modules]:>10} {elapsed_ms:>8.2f}")
+
+    assert len(set(query_counts.values())) == 1, f"Query count depends on module count: {query_counts}"
+    print(f"OK: {next(iter(query_counts.values()))} consultas por detalle de curso, independiente del número de módulos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: importación de un banco de 1.000 preguntas.
+Compara POST /quizzes/import (una transacción, INSERT ... RETURNING en bloque) con
+el camino anterior de un commit + refresh por pregunta y por lote de opciones.
+El modelo de embeddings se reemplaza por vectores fijos para medir sólo la BD.
+
+Uso (desde microservices/services/catalog-service):
+    python benchmarks/bench_quiz_import.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db
+from app.dependencies.auth import get_current_user, UserPayload
+from app.models import Category, Course, Module, Lesson
+from app.models.quiz import Quiz, QuizQuestion, QuizOption
+from app.routers import quizzes
+from app.services import quiz_authoring
+
+QUESTIONS = 1000
+OPTIONS_PER_QUESTION = 4
+OPEN_RATIO = 0.3
+DIM = 384
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+def override_get_db():
+    db = TestingSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def fake_embeddings(texts):
+    vector = np.full(DIM, 1 / np.sqrt(DIM), dtype=np.float32).tobytes()
+    return [vector for _ in texts]
+
+
+def bank(n: int) -> list:
+    questions = []
+    for i in range(n):
+        if i < n * OPEN_RATIO:
+            questions.append({"tipo": "ABIERTA", "enunciado": f"Pregunta abierta {i}", "sort_order": i,
+                              "respuesta_esperada": f"Respuesta esperada {i}"})
+        else:
+            questions.append({"tipo": "OPCION_MULTIPLE", "enunciado": f"Pregunta {i}", "sort_order": i, "options": [
+                {"texto": f"Opción {j}", "es_correcta": j == 0} for j in range(OPTIONS_PER_QUESTION)
+            ]})
+    return questions
+
+
+def quiz_lessons(count: int) -> list:
+    db = TestingSession()
+    category = Category(name="Benchmark")
+    db.add(category)
+    db.flush()
+    course = Course(title="Curso", description="bench", category_id=category.id, price=1.0, status="PUBLISHED", instructor_id=1)
+    db.add(course)
+    db.flush()
+    module = Module(course_id=course.id, title="Módulo", sort_order=1)
+    db.add(module)
+    db.flush()
+    lessons = [Lesson(module_id=module.id, title=f"Quiz {i}", content_type="QUIZ", sort_order=i) for i in range(count)]
+    db.add_all(lessons)
+    db.commit()
+    ids = [lesson.id for lesson in lessons]
+    db.close()
+    return ids
+
+
+def legacy_import(lesson_id: int, payload: dict) -> None:
+    """El camino anterior: commit + refresh por pregunta y por lote de opciones."""
+    db = TestingSession()
+    quiz = Quiz(lesson_id=lesson_id, titulo=payload["titulo"], puntaje_minimo_aprobacion=60.0)
+    db.add(quiz)
+    db.commit()
+    db.refresh(quiz)
+    for q in payload["questions"]:
+        embedding = fake_embeddings([q["respuesta_esperada"]])[0] if q["tipo"] == "ABIERTA" else None
+        question = QuizQuestion(quiz_id=quiz.id, tipo=q["tipo"], enunciado=q["enunciado"], sort_order=q["sort_order"],
+                                respuesta_esperada=q.get("respuesta_esperada"), respuesta_esperada_embedding=embedding)
+        db.add(question)
+        db.commit()
+        db.refresh(question)
+        if q.get("options"):
+            for opt in q["options"]:
+                db.add(QuizOption(question_id=question.id, texto=opt["texto"], es_correcta=opt["es_correcta"]))
+            db.commit()
+    db.close()
+
+
+def main():
+    quiz_authoring.get_embeddings = fake_embeddings
+    app = FastAPI()
+    app.include_router(quizzes.router, prefix="/api/catalog")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: UserPayload(id=1, username="bench", role="admin")
+    client = TestClient(app)
+
+    legacy_lesson, bulk_lesson = quiz_lessons(2)
+    payload = {"titulo": "Banco", "questions": bank(QUESTIONS)}
+
+    statements.clear()
+    start = time.perf_counter()
+    legacy_import(legacy_lesson, payload)
+    legacy_ms = (time.perf_counter() - start) * 1000
+    legacy_statements = len(statements)
+
+    statements.clear()
+    start = time.perf_counter()
+    response = client.post("/api/catalog/quizzes/import", json={**payload, "lesson_id": bulk_lesson})
+    bulk_ms = (time.perf_counter() - start) * 1000
+    bulk_statements = len(statements)
+    assert response.status_code == 200, response.text
+    assert response.json()["questions"] == QUESTIONS
+
+    db = TestingSession()
+    quiz_id = response.json()["quiz_id"]
+    assert db.query(QuizQuestion).filter(QuizQuestion.quiz_id == quiz_id).count() == QUESTIONS
+    db.close()
+
+    print(f"{'camino':>22} {'sentencias':>11} {'ms':>9}")
+    print(f"{'commit por pregunta':>22} {legacy_statements:>11} {legacy_ms:>9.1f}")
+    print(f"{'POST /quizzes/import':>22} {bulk_statements:>11} {bulk_ms:>9.1f}")
+    print(f"OK: {QUESTIONS} preguntas importadas en una transacción ({legacy_ms / bulk_ms:.1f}x más rápido).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from app.database import SessionLocal
+from app.services.search import rebuild_index
+
+# Reconstruye el índice de búsqueda del catálogo (tsvector en PostgreSQL,
+# tabla course_search_terms en SQLite). Ejecutar tras migrar o importar cursos en bloque.
+db = SessionLocal()
+try:
+    total = rebuild_index(db)
+    print(f"Indexed {total} courses.")
+finally:
+    db.close()
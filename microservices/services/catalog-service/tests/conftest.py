@@ -0,0 +1,76 @@
+"""
+Fixtures comunes: una BD SQLite temporal y el modelo de embeddings reemplazado por
+vectores deterministas (las pruebas no descargan el modelo).
+
+Uso (desde microservices/services/catalog-service):
+    python -m pytest -q
+"""
+import hashlib
+import os
+import sys
+import tempfile
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+# settings se lee al importar app: la configuración de prueba va antes de cualquier import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'catalog-test.db')}"
+os.environ["REDIS_URL"] = ""
+os.environ["EMBEDDING_WORKERS"] = "0"
+os.environ["EMBEDDING_WARMUP"] = "false"
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+import numpy as np
+import pytest
+
+from app.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+
+EMBEDDING_DIM = 16
+
+
+def fake_vector(text: str) -> bytes:
+    """Vector unitario float32 derivado del texto (mismo texto, mismo vector)."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).astype(np.float32).tobytes()
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    from app.services import embeddings
+
+    monkeypatch.setattr(embeddings, "_compute", lambda texts: [fake_vector(text) for text in texts])
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def course(db):
+    """Curso con un módulo de dos lecciones (la segunda de tipo QUIZ)."""
+    from app.models import Category, Course, Lesson, Module
+
+    category = Category(name="Backend")
+    db.add(category)
+    db.flush()
+    course = Course(title="Python", description="Curso", category_id=category.id, price=10.0, instructor_id=2)
+    db.add(course)
+    db.flush()
+    module = Module(course_id=course.id, title="Módulo 1", sort_order=1)
+    db.add(module)
+    db.flush()
+    db.add_all([
+        Lesson(module_id=module.id, title="Video", content_type="VIDEO", sort_order=1, duration_minutes=10),
+        Lesson(module_id=module.id, title="Quiz", content_type="QUIZ", sort_order=2, duration_minutes=5),
+    ])
+    db.commit()
+    return course
@@ -0,0 +1,75 @@
+"""
+Micro-batching de embeddings: los textos de requests concurrentes, sync o async, se
+codifican en una sola llamada al modelo.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.config import settings
+from app.services import embeddings
+from app.services.embeddings import _MicroBatcher
+
+from conftest import fake_vector
+
+
+@pytest.fixture
+def encode_calls(monkeypatch):
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [fake_vector(text) for text in texts]
+
+    monkeypatch.setattr(embeddings, "_encode", encode)
+    return calls
+
+
+def test_sync_and_async_callers_share_one_window(encode_calls):
+    batcher = _MicroBatcher(0.1)
+    results = {}
+
+    def sync_caller(text):
+        results[text] = batcher.submit([text])
+
+    async def async_callers():
+        return await asyncio.gather(*(batcher.asubmit([f"async-{i}"]) for i in range(3)))
+
+    threads = [threading.Thread(target=sync_caller, args=(f"sync-{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    async_results = asyncio.run(async_callers())
+    for thread in threads:
+        thread.join()
+
+    assert len(encode_calls) == 1
+    assert sorted(encode_calls[0]) == sorted([f"sync-{i}" for i in range(3)] + [f"async-{i}" for i in range(3)])
+    assert results == {f"sync-{i}": [fake_vector(f"sync-{i}")] for i in range(3)}
+    assert async_results == [[fake_vector(f"async-{i}")] for i in range(3)]
+
+
+def test_async_embeddings_go_through_the_batcher_with_worker_processes(encode_calls, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_WORKERS", 2)
+    monkeypatch.setattr(embeddings, "_batcher", _MicroBatcher(0.05))
+
+    async def grade_concurrently():
+        return await asyncio.gather(*(embeddings.aget_embeddings([f"respuesta {i}", "común"]) for i in range(4)))
+
+    results = asyncio.run(grade_concurrently())
+
+    assert len(encode_calls) == 1
+    assert results == [[fake_vector(f"respuesta {i}"), fake_vector("común")] for i in range(4)]
+
+
+def test_encode_errors_reach_every_caller_of_the_window(monkeypatch):
+    def full(texts):
+        raise embeddings.EmbeddingQueueFull()
+
+    monkeypatch.setattr(embeddings, "_encode", full)
+    batcher = _MicroBatcher(0.01)
+
+    async def callers():
+        return await asyncio.gather(batcher.asubmit(["a"]), batcher.asubmit(["b"]), return_exceptions=True)
+
+    assert all(isinstance(result, embeddings.EmbeddingQueueFull) for result in asyncio.run(callers()))
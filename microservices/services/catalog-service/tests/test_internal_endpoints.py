@@ -0,0 +1,48 @@
+"""
+Las rutas /internal/* quedan detrás de nginx: sólo responden con el header
+X-Internal-Token que envían las tareas periódicas de Celery.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+TOKEN = "internal-test-token"
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", TOKEN)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Internal-Token": "wrong"}, {"X-Internal-Token": ""}])
+def test_reconcile_ratings_requires_the_internal_token(client, headers):
+    response = client.post("/api/catalog/internal/reconcile-ratings", headers=headers)
+
+    assert response.status_code == 403
+
+
+def test_reconcile_ratings_with_the_internal_token(client):
+    response = client.post("/api/catalog/internal/reconcile-ratings", headers={"X-Internal-Token": TOKEN})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+def test_internal_routes_are_closed_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "")
+
+    response = client.post("/api/catalog/internal/reconcile-ratings", headers={"X-Internal-Token": ""})
+
+    assert response.status_code == 403
+
+
+def test_embedding_cache_stats_require_the_internal_token(client):
+    assert client.get("/api/catalog/internal/embedding-cache").status_code == 403
+
+    response = client.get("/api/catalog/internal/embedding-cache", headers={"X-Internal-Token": TOKEN})
+
+    assert response.status_code == 200
+    assert response.json() == {"enabled": False}
@@ -0,0 +1,50 @@
+"""
+Cursores de paginación: uno válido devuelve la página siguiente y uno manipulado
+responde 400, nunca llega a la consulta SQL.
+"""
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from shared.pagination import encode_cursor
+
+
+def token(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.fixture
+def client(db, course):
+    # Sin `with`: el lifespan (seed, hilos de fondo) no corre
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("cursor", [
+    token([{"a": 1}]),
+    token([{"dt": "garbage"}]),
+    token([{"dt": 5}]),
+    token([[1]]),
+    token([True]),
+    token([1, 2]),
+    token({"id": 1}),
+    "%%%not-base64",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_tampered_cursor_is_rejected(client, cursor):
+    response = client.get("/api/catalog/courses", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+
+
+def test_valid_cursor_returns_the_next_page(client, db, course):
+    first = client.get("/api/catalog/courses", params={"cursor": ""})
+    assert first.status_code == 200
+    assert [c["id"] for c in first.json()["results"]] == [course.id]
+
+    after = client.get("/api/catalog/courses", params={"cursor": encode_cursor([course.id])})
+    assert after.status_code == 200
+    assert after.json()["results"] == []
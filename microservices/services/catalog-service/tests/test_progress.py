@@ -0,0 +1,92 @@
+"""
+Upsert del progreso de lecciones: una fila por (usuario, lección), la fecha de la
+primera finalización se conserva y el camino sin ON CONFLICT se comporta igual.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Lesson, LessonProgress
+from app.services import progress
+from app.services.progress import upsert_lesson_completion, upsert_lesson_completions
+
+
+@pytest.fixture(params=["on_conflict", "orm_fallback"])
+def upsert_path(request, monkeypatch):
+    if request.param == "orm_fallback":
+        # Motores sin INSERT ... ON CONFLICT usan el SELECT + UPDATE por fila
+        monkeypatch.setattr(progress, "_UPSERT_DIALECTS", {})
+    return request.param
+
+
+def lesson_id(db, content_type: str = "VIDEO") -> int:
+    return db.query(Lesson.id).filter(Lesson.content_type == content_type).scalar()
+
+
+def stored(db, user_id: int):
+    db.expire_all()
+    return db.query(LessonProgress).filter(LessonProgress.user_id == user_id).all()
+
+
+def test_repeated_completion_keeps_one_row_and_the_first_date(db, course, upsert_path):
+    lesson = lesson_id(db)
+    first = datetime(2026, 1, 1, 10, 0)
+
+    upsert_lesson_completions(db, [{"user_id": 5, "lesson_id": lesson, "completed_at": first}])
+    db.commit()
+    upsert_lesson_completions(db, [{"user_id": 5, "lesson_id": lesson, "completed_at": first + timedelta(days=3)}])
+    upsert_lesson_completion(db, 5, lesson)
+    db.commit()
+
+    rows = stored(db, 5)
+    assert len(rows) == 1
+    assert rows[0].completed is True
+    assert rows[0].completed_at == first
+
+
+def test_completion_updates_a_row_created_by_a_watch_position(db, course, upsert_path):
+    lesson = lesson_id(db)
+    db.add(LessonProgress(user_id=5, lesson_id=lesson, completed=False, position_seconds=42,
+                          position_updated_at=datetime(2026, 1, 1)))
+    db.commit()
+
+    upsert_lesson_completions(db, [{"user_id": 5, "lesson_id": lesson, "completed_at": datetime(2026, 1, 2)}])
+    db.commit()
+
+    (row,) = stored(db, 5)
+    assert (row.completed, row.completed_at, row.position_seconds) == (True, datetime(2026, 1, 2), 42)
+
+
+def test_batch_with_duplicates_and_several_users(db, course, upsert_path):
+    video, quiz = lesson_id(db), lesson_id(db, "QUIZ")
+    at = datetime(2026, 1, 1)
+    upsert_lesson_completions(db, [
+        {"user_id": 5, "lesson_id": video, "completed_at": at},
+        {"user_id": 6, "lesson_id": video, "completed_at": at},
+        {"user_id": 5, "lesson_id": quiz, "completed_at": at},
+    ])
+    db.commit()
+    upsert_lesson_completions(db, [{"user_id": 5, "lesson_id": quiz, "completed_at": at + timedelta(hours=1)}])
+    db.commit()
+
+    assert sorted((r.lesson_id, r.completed_at) for r in stored(db, 5)) == [(video, at), (quiz, at)]
+    assert [(r.lesson_id, r.completed) for r in stored(db, 6)] == [(video, True)]
+
+
+@pytest.mark.parametrize("position, duration, expected", [
+    (1e300, 1e300, 600),           # la lección dura 10 minutos
+    (float("inf"), None, None),    # no se puede guardar: se descarta
+    (float("nan"), 30.0, None),
+    (120.0, float("nan"), 120),    # duración inválida: se usa la de la lección
+])
+def test_watch_positions_are_clamped_to_the_lesson_duration(db, course, upsert_path, position, duration, expected):
+    lesson = lesson_id(db)
+
+    progress.record_watch_positions(db, [{
+        "user_id": 5, "lesson_id": lesson, "position_seconds": position,
+        "duration_seconds": duration, "updated_at": datetime(2026, 1, 1),
+    }])
+    db.commit()
+
+    rows = stored(db, 5)
+    assert [row.position_seconds for row in rows] == ([] if expected is None else [expected])
@@ -0,0 +1,85 @@
+"""
+Vaciado del buffer de progreso cuando la escritura en BD falla: una fila inválida no
+bloquea a las demás (va a la lista dead-letter) y una caída de la BD devuelve el lote
+a la cola.
+"""
+import json
+
+import fakeredis
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.models import Lesson, LessonProgress
+from app.services import progress, progress_buffer as buffer_module
+from app.services.progress_buffer import DEAD_USERS_KEY, DIRTY_USERS_KEY, ProgressBuffer
+
+
+@pytest.fixture
+def buffer():
+    buffer = ProgressBuffer("redis://progress-buffer-test", batch_size=10)
+    buffer._redis = fakeredis.FakeRedis()
+    return buffer
+
+
+@pytest.fixture
+def poison_write(monkeypatch):
+    """upsert_lesson_completions falla en todo lote que contenga al usuario 666."""
+    write = progress.upsert_lesson_completions
+
+    def failing(db, rows):
+        if any(row["user_id"] == 666 for row in rows):
+            raise ValueError("row cannot be stored")
+        write(db, rows)
+
+    monkeypatch.setattr(progress, "upsert_lesson_completions", failing)
+
+
+def completed_users(db) -> set:
+    db.expire_all()
+    return {row.user_id for row in db.query(LessonProgress).filter(LessonProgress.completed == True)}
+
+
+def test_failing_row_goes_to_dead_letter_and_the_rest_is_written(db, course, buffer, poison_write):
+    lesson = db.query(Lesson.id).filter(Lesson.content_type == "VIDEO").scalar()
+    for user_id in (1, 2, 666, 3):
+        assert buffer.add(user_id, lesson) is not None
+
+    assert buffer.flush(db) == 3
+
+    assert completed_users(db) == {1, 2, 3}
+    client = buffer._redis
+    (dead,) = [json.loads(entry) for entry in client.lrange(DEAD_USERS_KEY, 0, -1)]
+    assert (dead["user_id"], dead["lesson_id"]) == (666, lesson)
+    assert "row cannot be stored" in dead["error"]
+    # La fila no vuelve a la cola: el siguiente flush no la reintenta
+    assert client.scard(DIRTY_USERS_KEY) == 0
+    assert buffer.flush(db) == 0
+
+
+def test_database_outage_requeues_the_batch(db, course, buffer, monkeypatch):
+    lesson = db.query(Lesson.id).filter(Lesson.content_type == "VIDEO").scalar()
+    for user_id in (1, 2):
+        buffer.add(user_id, lesson)
+    first_seen = buffer.add(1, lesson)
+
+    def unavailable(db, rows):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(progress, "upsert_lesson_completions", unavailable)
+    with pytest.raises(OperationalError):
+        buffer.flush(db)
+    assert buffer._redis.llen(DEAD_USERS_KEY) == 0
+    assert buffer.pending_lessons(1) == {lesson}
+
+    monkeypatch.undo()
+    assert buffer.flush(db) == 2
+    assert completed_users(db) == {1, 2}
+    (row,) = db.query(LessonProgress).filter(LessonProgress.user_id == 1).all()
+    assert row.completed_at == first_seen
+
+
+def test_buffered_timestamps_are_naive_utc(buffer):
+    assert buffer.add(1, 10).tzinfo is None
+    buffer.add_position(1, 11, 30.0, None)
+    (value,) = buffer._redis.hvals(buffer_module._position_key(1))
+    assert buffer_module._parse_position(value)["updated_at"].tzinfo is None
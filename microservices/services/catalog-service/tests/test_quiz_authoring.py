@@ -0,0 +1,104 @@
+"""
+sync_questions: las preguntas y opciones que salen del quiz se borran, salvo que un
+intento las referencie; en ese caso se archivan y el historial sigue intacto.
+"""
+from app.models import Lesson
+from app.models.quiz import Quiz, QuizAttempt, QuizAttemptAnswer, QuizOption, QuizQuestion
+from app.schemas.quiz import QuizQuestionCreate
+from app.services.quiz_authoring import embed_expected_answers, insert_questions, sync_questions
+
+
+def question(enunciado: str, options: list, correct: int = 0, **extra) -> QuizQuestionCreate:
+    return QuizQuestionCreate(
+        tipo="OPCION_MULTIPLE", enunciado=enunciado, sort_order=1,
+        options=[{"texto": texto, "es_correcta": i == correct} for i, texto in enumerate(options)], **extra,
+    )
+
+
+def create_quiz(db, course, questions: list) -> Quiz:
+    lesson = db.query(Lesson).filter(Lesson.content_type == "QUIZ").one()
+    quiz = Quiz(lesson_id=lesson.id, titulo="Quiz")
+    db.add(quiz)
+    db.flush()
+    insert_questions(db, quiz.id, questions, embed_expected_answers(questions))
+    db.commit()
+    return quiz
+
+
+def answer(db, quiz: Quiz, question_id: int, option_id: int) -> None:
+    attempt = QuizAttempt(quiz_id=quiz.id, user_id=7, puntaje_obtenido=1, puntaje_maximo=1, porcentaje=100, aprobado=True)
+    db.add(attempt)
+    db.flush()
+    db.add(QuizAttemptAnswer(attempt_id=attempt.id, question_id=question_id, selected_option_id=option_id))
+    db.commit()
+
+
+def option(question_row: QuizQuestion, texto: str) -> int:
+    return next(opt.id for opt in question_row.options if opt.texto == texto)
+
+
+def rows(db, model, quiz_id: int) -> dict:
+    if model is QuizQuestion:
+        query = db.query(QuizQuestion).filter(QuizQuestion.quiz_id == quiz_id)
+    else:
+        query = db.query(QuizOption).join(QuizQuestion, QuizOption.question_id == QuizQuestion.id).filter(
+            QuizQuestion.quiz_id == quiz_id
+        )
+    return {row.texto if model is QuizOption else row.enunciado: row.archivada for row in query}
+
+
+def sync(db, quiz: Quiz, questions: list) -> dict:
+    summary = sync_questions(db, quiz.id, questions, embed_expected_answers(questions))
+    db.commit()
+    db.expire_all()
+    return summary
+
+
+def test_removed_question_is_archived_only_when_an_attempt_references_it(db, course):
+    quiz = create_quiz(db, course, [question("A", ["a1", "a2"]), question("B", ["b1", "b2"]), question("C", ["c1", "c2"])])
+    answered = db.query(QuizQuestion).filter(QuizQuestion.enunciado == "A").one()
+    answer(db, quiz, answered.id, option(answered, "a2"))
+
+    summary = sync(db, quiz, [question("C", ["c1", "c2"])])
+
+    assert summary == {"inserted": 0, "updated": 0, "unchanged": 1, "deleted": 1, "archived": 1}
+    assert rows(db, QuizQuestion, quiz.id) == {"A": True, "C": False}
+    # La pregunta archivada conserva todas sus opciones; las de B se borraron con ella
+    assert rows(db, QuizOption, quiz.id) == {"a1": False, "a2": False, "c1": False, "c2": False}
+    assert [q.enunciado for q in db.get(Quiz, quiz.id).questions] == ["C"]
+    stored = db.query(QuizAttemptAnswer).one()
+    assert (stored.question_id, stored.selected_option_id) == (answered.id, option(answered, "a2"))
+
+
+def test_removed_option_is_archived_only_when_an_attempt_selected_it(db, course):
+    quiz = create_quiz(db, course, [question("A", ["a1", "a2", "a3"])])
+    current = db.query(QuizQuestion).one()
+    answer(db, quiz, current.id, option(current, "a2"))
+
+    summary = sync(db, quiz, [question("A", ["a1"], id=current.id)])
+
+    assert summary["updated"] == 1 and summary["deleted"] == 0 and summary["archived"] == 0
+    assert rows(db, QuizOption, quiz.id) == {"a1": False, "a2": True}
+    assert [opt.texto for opt in db.get(QuizQuestion, current.id).options] == ["a1"]
+
+
+def test_question_with_a_referenced_option_is_archived(db, course):
+    quiz = create_quiz(db, course, [question("A", ["a1", "a2"]), question("B", ["b1"])])
+    removed = db.query(QuizQuestion).filter(QuizQuestion.enunciado == "A").one()
+    answer(db, quiz, db.query(QuizQuestion).filter(QuizQuestion.enunciado == "B").one().id, option(removed, "a1"))
+
+    summary = sync(db, quiz, [question("B", ["b1"])])
+
+    assert summary["archived"] == 1 and summary["deleted"] == 0
+    assert rows(db, QuizQuestion, quiz.id) == {"A": True, "B": False}
+
+
+def test_unchanged_questions_keep_their_ids(db, course):
+    quiz = create_quiz(db, course, [question("A", ["a1", "a2"]), question("B", ["b1", "b2"])])
+    before = {q.enunciado: q.id for q in db.query(QuizQuestion)}
+
+    summary = sync(db, quiz, [question("B", ["b1", "b2"]), question("A", ["a1", "a2"]), question("D", ["d1"])])
+
+    assert summary == {"inserted": 1, "updated": 0, "unchanged": 2, "deleted": 0, "archived": 0}
+    after = {q.enunciado: q.id for q in db.query(QuizQuestion)}
+    assert after["A"] == before["A"] and after["B"] == before["B"]
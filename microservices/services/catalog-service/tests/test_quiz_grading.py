@@ -0,0 +1,169 @@
+"""
+El motor vectorizado (calificar_intentos) debe dar los mismos resultados que las
+reglas originales pregunta a pregunta, reproducidas aquí como referencia.
+"""
+import numpy as np
+import pytest
+
+from app.models.quiz import Quiz, QuizOption, QuizQuestion
+from app.schemas.quiz import AnswerSubmit
+from app.services.quiz_grading import calificar_intento, calificar_intentos
+
+from conftest import EMBEDDING_DIM
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float64)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def _with_similarity(expected: np.ndarray, similarity: float, rng) -> bytes:
+    """Vector unitario cuyo coseno con `expected` es `similarity`."""
+    orthogonal = rng.standard_normal(EMBEDDING_DIM)
+    orthogonal -= orthogonal @ expected.astype(np.float64) * expected
+    orthogonal /= np.linalg.norm(orthogonal)
+    return _unit(similarity * expected + np.sqrt(1 - similarity ** 2) * orthogonal).tobytes()
+
+
+def calificar_referencia(quiz: Quiz, respuestas: list, embeddings_respuestas: dict) -> dict:
+    """Reglas previas al motor vectorizado, una respuesta a la vez."""
+    preguntas = {q.id: q for q in quiz.questions}
+    obtenido, maximo, detalles = 0.0, 0.0, []
+    for i, resp in enumerate(respuestas):
+        pregunta = preguntas.get(resp.question_id)
+        if not pregunta:
+            continue
+        maximo += pregunta.puntaje
+        puntaje, similitud = 0.0, None
+        if pregunta.tipo == "OPCION_MULTIPLE":
+            correcta = next((opt for opt in pregunta.options if opt.es_correcta), None)
+            if correcta and resp.selected_option_id == correcta.id:
+                puntaje = pregunta.puntaje
+        elif pregunta.tipo == "ABIERTA" and resp.respuesta_texto and pregunta.respuesta_esperada_embedding:
+            dada = np.frombuffer(embeddings_respuestas[i], dtype=np.float32).astype(np.float64)
+            esperada = np.frombuffer(pregunta.respuesta_esperada_embedding, dtype=np.float32).astype(np.float64)
+            similitud = float(dada @ esperada)
+            if similitud >= 0.75:
+                puntaje = pregunta.puntaje
+            elif similitud >= 0.60:
+                puntaje = pregunta.puntaje * 0.70
+        obtenido += puntaje
+        detalles.append({
+            "question_id": pregunta.id,
+            "respuesta_texto": resp.respuesta_texto,
+            "selected_option_id": resp.selected_option_id,
+            "similitud": similitud,
+            "puntaje_obtenido": puntaje,
+        })
+    respondidas = {d["question_id"] for d in detalles}
+    maximo += sum(q.puntaje for q in quiz.questions if q.id not in respondidas)
+    porcentaje = obtenido / maximo * 100.0 if maximo > 0 else 0.0
+    return {
+        "puntaje_obtenido": obtenido,
+        "puntaje_maximo": maximo,
+        "porcentaje": porcentaje,
+        "aprobado": porcentaje >= quiz.puntaje_minimo_aprobacion,
+        "detalles": detalles,
+    }
+
+
+def build_quiz(rng) -> Quiz:
+    questions = []
+    option_id = 100
+    for qid in range(1, 13):
+        weight = float(rng.choice([0.5, 1.0, 2.0, 3.0]))
+        if qid % 3:
+            options = []
+            correct = int(rng.integers(-1, 3))  # -1: pregunta sin opción correcta
+            for k in range(3):
+                option_id += 1
+                options.append(QuizOption(id=option_id, question_id=qid, texto=f"o{option_id}", es_correcta=k == correct))
+            questions.append(QuizQuestion(
+                id=qid, tipo="OPCION_MULTIPLE", enunciado=f"q{qid}", puntaje=weight, sort_order=qid, options=options
+            ))
+        else:
+            # Una de cada dos abiertas no tiene embedding esperado (no suma puntaje)
+            expected = _unit(rng.standard_normal(EMBEDDING_DIM)).tobytes() if qid % 2 else None
+            questions.append(QuizQuestion(
+                id=qid, tipo="ABIERTA", enunciado=f"q{qid}", puntaje=weight, sort_order=qid,
+                respuesta_esperada="esperada", respuesta_esperada_embedding=expected,
+            ))
+    return Quiz(id=1, lesson_id=1, titulo="Quiz", puntaje_minimo_aprobacion=60.0, version=1, questions=questions)
+
+
+def build_submission(quiz: Quiz, rng) -> tuple:
+    respuestas, embeddings_respuestas = [], {}
+    for question in quiz.questions:
+        roll = rng.random()
+        if roll < 0.15:
+            continue  # sin responder: suma sólo al máximo
+        if question.tipo == "OPCION_MULTIPLE":
+            choices = [opt.id for opt in question.options] + [None, 9999]
+            respuestas.append(AnswerSubmit(question_id=question.id, selected_option_id=choices[int(rng.integers(len(choices)))]))
+        else:
+            texto = None if roll < 0.25 else "respuesta"
+            if texto and question.respuesta_esperada_embedding:
+                expected = np.frombuffer(question.respuesta_esperada_embedding, dtype=np.float32)
+                # Lejos de los umbrales exactos para no depender del redondeo float32
+                similarity = float(rng.choice([0.95, 0.76, 0.74, 0.61, 0.59, 0.1, -0.3]))
+                embeddings_respuestas[len(respuestas)] = _with_similarity(expected, similarity, rng)
+            respuestas.append(AnswerSubmit(question_id=question.id, respuesta_texto=texto))
+        if roll > 0.9:
+            # Respuesta repetida a la misma pregunta: cuenta dos veces, como antes
+            respuestas.append(respuestas[-1])
+            if len(respuestas) - 2 in embeddings_respuestas:
+                embeddings_respuestas[len(respuestas) - 1] = embeddings_respuestas[len(respuestas) - 2]
+    # Pregunta que no pertenece al quiz: se ignora
+    respuestas.append(AnswerSubmit(question_id=999, selected_option_id=1))
+    return respuestas, embeddings_respuestas
+
+
+def assert_same_result(actual: dict, expected: dict) -> None:
+    assert actual["puntaje_obtenido"] == pytest.approx(expected["puntaje_obtenido"])
+    assert actual["puntaje_maximo"] == pytest.approx(expected["puntaje_maximo"])
+    assert actual["porcentaje"] == pytest.approx(expected["porcentaje"])
+    assert actual["aprobado"] == expected["aprobado"]
+    assert len(actual["detalles"]) == len(expected["detalles"])
+    for got, want in zip(actual["detalles"], expected["detalles"]):
+        assert {k: got[k] for k in ("question_id", "respuesta_texto", "selected_option_id")} == \
+            {k: want[k] for k in ("question_id", "respuesta_texto", "selected_option_id")}
+        assert got["puntaje_obtenido"] == pytest.approx(want["puntaje_obtenido"])
+        if want["similitud"] is None:
+            assert got["similitud"] is None
+        else:
+            assert got["similitud"] == pytest.approx(want["similitud"], abs=1e-5)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batch_grading_matches_original_rules(seed):
+    rng = np.random.default_rng(seed)
+    quiz = build_quiz(rng)
+    submissions = [build_submission(quiz, rng) for _ in range(8)]
+
+    results = calificar_intentos(quiz, [r for r, _ in submissions], [e for _, e in submissions])
+
+    assert len(results) == len(submissions)
+    for result, (respuestas, embeddings_respuestas) in zip(results, submissions):
+        assert_same_result(result, calificar_referencia(quiz, respuestas, embeddings_respuestas))
+
+
+def test_single_attempt_matches_batch():
+    rng = np.random.default_rng(42)
+    quiz = build_quiz(rng)
+    respuestas, embeddings_respuestas = build_submission(quiz, rng)
+
+    assert_same_result(
+        calificar_intento(quiz, respuestas, embeddings_respuestas),
+        calificar_referencia(quiz, respuestas, embeddings_respuestas),
+    )
+
+
+def test_empty_submission_counts_every_question_in_the_maximum():
+    quiz = build_quiz(np.random.default_rng(7))
+
+    result = calificar_intento(quiz, [], {})
+
+    assert result["puntaje_obtenido"] == 0.0
+    assert result["puntaje_maximo"] == pytest.approx(sum(q.puntaje for q in quiz.questions))
+    assert result["porcentaje"] == 0.0 and result["aprobado"] is False
+    assert result["detalles"] == []
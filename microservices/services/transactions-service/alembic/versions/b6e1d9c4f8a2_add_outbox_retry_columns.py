@@ -0,0 +1,31 @@
+"""add outbox_messages.available_at and dead_at
+
+Revision ID: b6e1d9c4f8a2
+Revises: a9d4e6b2c7f3
+Create Date: 2026-10-18 21:12:37.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d9c4f8a2'
+down_revision: Union[str, Sequence[str], None] = 'a9d4e6b2c7f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox_messages', sa.Column('available_at', sa.DateTime(), nullable=True))
+    op.add_column('outbox_messages', sa.Column('dead_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('outbox_messages') as batch_op:
+        batch_op.drop_column('dead_at')
+        batch_op.drop_column('available_at')
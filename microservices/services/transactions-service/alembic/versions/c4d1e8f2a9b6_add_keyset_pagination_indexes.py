@@ -0,0 +1,30 @@
+"""add keyset pagination indexes
+
+Revision ID: c4d1e8f2a9b6
+Revises: b2cccfe52617
+Create Date: 2026-10-18 11:52:17.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d1e8f2a9b6'
+down_revision: Union[str, Sequence[str], None] = 'b2cccfe52617'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_id', 'orders', ['user_id', 'id'], unique=False)
+    op.create_index('ix_enrollments_user_id_id', 'enrollments', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_enrollments_user_id_id', table_name='enrollments')
+    op.drop_index('ix_orders_user_id_id', table_name='orders')
@@ -0,0 +1,29 @@
+"""add course_prices.published
+
+Revision ID: d7a3c9e1f5b2
+Revises: c4d1e8f2a9b6
+Create Date: 2026-10-18 16:05:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3c9e1f5b2'
+down_revision: Union[str, Sequence[str], None] = 'c4d1e8f2a9b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('course_prices', sa.Column('published', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('course_prices') as batch_op:
+        batch_op.drop_column('published')
@@ -0,0 +1,40 @@
+"""add order number sequence
+
+Revision ID: e2b8f4a6c1d9
+Revises: d7a3c9e1f5b2
+Create Date: 2026-10-18 17:22:09.514830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8f4a6c1d9'
+down_revision: Union[str, Sequence[str], None] = 'd7a3c9e1f5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not op.get_bind().dialect.supports_sequences:
+        return
+    op.execute(sa.schema.CreateSequence(sa.Sequence('order_number_seq', start=10001), if_not_exists=True))
+    # Continuar después del mayor número existente (SF-<n>, antes 10000 + id)
+    op.execute("""
+        SELECT setval('order_number_seq', GREATEST(
+            10000,
+            (SELECT COALESCE(MAX(id), 0) + 10000 FROM orders),
+            (SELECT COALESCE(MAX(CAST(substring(number FROM 4) AS BIGINT)), 0) FROM orders WHERE number ~ '^SF-[0-9]+$')
+        ))
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not op.get_bind().dialect.supports_sequences:
+        return
+    op.execute(sa.schema.DropSequence(sa.Sequence('order_number_seq'), if_exists=True))
@@ -0,0 +1,35 @@
+"""add enrollments (user_id, course_id) unique constraint
+
+Revision ID: f5c2a7d3e8b1
+Revises: e2b8f4a6c1d9
+Create Date: 2026-10-18 18:41:56.207364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c2a7d3e8b1'
+down_revision: Union[str, Sequence[str], None] = 'e2b8f4a6c1d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Inscripciones duplicadas de carreras anteriores: se conserva la más antigua
+    op.execute("""
+        DELETE FROM enrollments
+        WHERE id NOT IN (SELECT MIN(id) FROM enrollments GROUP BY user_id, course_id)
+    """)
+    with op.batch_alter_table('enrollments') as batch_op:
+        batch_op.create_unique_constraint('uq_enrollments_user_id_course_id', ['user_id', 'course_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('enrollments') as batch_op:
+        batch_op.drop_constraint('uq_enrollments_user_id_course_id', type_='unique')
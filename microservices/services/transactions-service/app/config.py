@@ -4,6 +4,8 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./transactions.db"
     JWT_SECRET: str = "dev-secret-change-in-production"
     JWT_ALGORITHM: str = "HS256"
+    # Header X-Internal-Token de las tareas de Celery Beat para /internal/*; vacío = rutas cerradas
+    INTERNAL_API_TOKEN: str = ""
     
     # Wompi Sandbox Configuration
     WOMPI_PUBLIC_KEY: str = "pub_stagtest_g2gOf6oEGop4jiaV3aJ4AYAQ"
@@ -14,6 +16,19 @@ class Settings(BaseSettings):
     # Redis for Celery Tasks dispatcher
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # Réplica de precios: eventos del stream `cursos` y backfill inicial desde el catálogo
+    CATALOG_URL: str = "http://catalog-service:8000"
+    PRICE_REPLICATION_ENABLED: bool = True
+
+    # Outbox de eventos/tareas: relay en un hilo del servicio (o aparte con python -m app.services.outbox)
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_RELAY_BATCH_SIZE: int = 200
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 1.0
+    # Reintentos de un mensaje que no se pudo publicar: espera exponencial y tope de intentos
+    OUTBOX_RETRY_BASE_SECONDS: float = 2.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    OUTBOX_MAX_ATTEMPTS: int = 25
+
     class Config:
         env_file = ".env"
 
@@ -1,11 +1,16 @@
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.config import settings
 from app.database import engine, Base, SessionLocal
 from app.models.course import CoursePrice
 from app.models.cart import CartItem
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.enrollment import Enrollment
-from app.routers import cart, orders, enrollments, checkout
+from app.models.outbox import OutboxMessage
+from app.routers import cart, orders, enrollments, checkout, internal
+from app.services.order_numbers import insert_order
 
 # Generate database tables
 Base.metadata.create_all(bind=engine)
@@ -13,21 +18,21 @@ Base.metadata.create_all(bind=engine)
 def seed_data():
     db = SessionLocal()
     try:
-        if db.query(CoursePrice).count() == 0:
-            db.add_all([
-                CoursePrice(course_id=1, title="Python Fundamentals", price=100.0),
-                CoursePrice(course_id=2, title="Flask for APIs", price=120.0),
-                CoursePrice(course_id=3, title="Arquitectura de Microservicios", price=150.0),
-            ])
-            db.flush()
+        if db.query(Order).count() == 0:
+            # Con la réplica activa los precios llegan del catálogo: una tabla vacía dispara el backfill
+            if not settings.PRICE_REPLICATION_ENABLED and db.query(CoursePrice).count() == 0:
+                db.add_all([
+                    CoursePrice(course_id=1, title="Python Fundamentals", price=100.0),
+                    CoursePrice(course_id=2, title="Flask for APIs", price=120.0),
+                    CoursePrice(course_id=3, title="Arquitectura de Microservicios", price=150.0),
+                ])
+                db.flush()
             
             # Seed cart item and orders for user 1 (which matches standard test user)
             db.add(CartItem(user_id=1, course_id=1, quantity=1))
             
-            order1 = Order(number="SF-10001", user_id=1, status="CONFIRMED", total=100.0)
-            order2 = Order(number="SF-10002", user_id=1, status="PENDING", total=120.0)
-            db.add_all([order1, order2])
-            db.flush()
+            order1 = insert_order(db, user_id=1, status="CONFIRMED", total=100.0)
+            order2 = insert_order(db, user_id=1, status="PENDING", total=120.0)
             
             db.add(OrderItem(order_id=order1.id, course_id=1, price=100.0, quantity=1))
             db.add(OrderItem(order_id=order2.id, course_id=2, price=120.0, quantity=1))
@@ -41,7 +46,24 @@ def seed_data():
 
 seed_data()
 
-app = FastAPI(title="SkillForge Transactions Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.PRICE_REPLICATION_ENABLED:
+        from app.services.price_replication import consume_course_events
+        threading.Thread(target=consume_course_events, daemon=True).start()
+    relay = None
+    if settings.OUTBOX_RELAY_ENABLED:
+        from app.services.outbox import notify_relay, run_relay
+        stop_relay = threading.Event()
+        relay = threading.Thread(target=run_relay, args=(stop_relay,), daemon=True)
+        relay.start()
+    yield
+    if relay is not None:
+        stop_relay.set()
+        notify_relay()
+        relay.join(timeout=10)
+
+app = FastAPI(title="SkillForge Transactions Service", lifespan=lifespan)
 
 @app.get("/health")
 def health():
@@ -52,6 +74,7 @@ app.include_router(cart.router, prefix="/api/transactions", tags=["cart"])
 app.include_router(orders.router, prefix="/api/transactions", tags=["orders"])
 app.include_router(enrollments.router, prefix="/api/transactions", tags=["enrollments"])
 app.include_router(checkout.router, prefix="/api/transactions", tags=["checkout"])
+app.include_router(internal.router, prefix="/api/transactions", tags=["internal"])
 
 # Legacy API transactions endpoints for backwards compatibility/tests
 app.include_router(cart.router, prefix="/api", tags=["legacy-cart"])
@@ -4,5 +4,6 @@ from app.models.cart import CartItem
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.enrollment import Enrollment
+from app.models.outbox import OutboxMessage
 
-__all__ = ["Base", "CoursePrice", "CartItem", "Order", "OrderItem", "Enrollment"]
+__all__ = ["Base", "CoursePrice", "CartItem", "Order", "OrderItem", "Enrollment", "OutboxMessage"]
@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Boolean, true
 from app.database import Base
 
 class CoursePrice(Base):
+    """Réplica del precio de un curso del catálogo (ver app/services/price_replication.py)."""
     __tablename__ = "course_prices"
     course_id = Column(Integer, primary_key=True)
     title = Column(String(200), nullable=False)
     price = Column(Float, nullable=False)
+    published = Column(Boolean, nullable=False, default=True, server_default=true())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
 from app.database import Base
 from datetime import datetime
 
@@ -10,3 +10,8 @@ class Enrollment(Base):
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
     status = Column(String(20), nullable=False, default="ACTIVA")
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_enrollments_user_id_id", "user_id", "id"),
+        UniqueConstraint("user_id", "course_id", name="uq_enrollments_user_id_course_id"),
+    )
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index, Sequence
 from sqlalchemy.orm import relationship
 from app.database import Base
 
+# Fuente de números de orden en PostgreSQL (ver app/services/order_numbers.py)
+order_number_seq = Sequence("order_number_seq", start=10001, metadata=Base.metadata)
+
 class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True)
@@ -11,3 +14,5 @@ class Order(Base):
     total = Column(Float, nullable=False, default=0.0)
     
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+
+    __table_args__ = (Index("ix_orders_user_id_id", "user_id", "id"),)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.database import Base
+from datetime import datetime
+
+class OutboxMessage(Base):
+    """
+    Evento o tarea Celery pendiente de publicar, escrito en la misma transacción que
+    el cambio que lo origina (ver app/services/outbox.py).
+    """
+    __tablename__ = "outbox_messages"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(10), nullable=False)  # "event" | "task"
+    destination = Column(String(200), nullable=False)  # stream de Redis o nombre de la tarea
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=True)  # próximo reintento tras un fallo; NULL: disponible ya
+    dead_at = Column(DateTime, nullable=True)  # agotó OUTBOX_MAX_ATTEMPTS; el relay ya no lo toma
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -5,6 +5,7 @@ from app.models.cart import CartItem
 from app.models.course import CoursePrice
 from app.dependencies.auth import get_current_user, UserPayload
 from app.schemas.transactions import CartOut, CartItemOut, CartItemAdd, CartItemRemove
+from app.services.cart_pricing import price_cart
 
 router = APIRouter()
 
@@ -13,28 +14,21 @@ def get_cart(
     db: Session = Depends(get_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
-    items = db.query(CartItem).filter(CartItem.user_id == current_user.id).order_by(CartItem.id.asc()).all()
-    detailed = []
-    total = 0.0
-    for item in items:
-        course = db.query(CoursePrice).filter(CoursePrice.course_id == item.course_id).first()
-        if not course:
-            continue
-        subtotal = course.price * item.quantity
-        total += subtotal
-        detailed.append(
-            CartItemOut(
-                course_id=item.course_id,
-                course_title=course.title,
-                quantity=item.quantity,
-                unit_price=course.price,
-                subtotal=round(subtotal, 2)
-            )
+    cart = price_cart(db, current_user.id)
+    detailed = [
+        CartItemOut(
+            course_id=item.course_id,
+            course_title=item.title,
+            quantity=item.quantity,
+            unit_price=item.unit_price,
+            subtotal=round(item.subtotal, 2)
         )
+        for item in cart.items
+    ]
     return CartOut(
         count=len(detailed),
         results=detailed,
-        total=round(total, 2)
+        total=cart.total
     )
 
 @router.post("/cart/items", status_code=status.HTTP_201_CREATED)
@@ -44,27 +38,16 @@ def add_to_cart(
     db: Session = Depends(get_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
-    course = db.query(CoursePrice).filter(CoursePrice.course_id == item_in.course_id).first()
+    # Réplica alimentada por eventos del catálogo (app/services/price_replication.py)
+    course = db.query(CoursePrice).filter(
+        CoursePrice.course_id == item_in.course_id,
+        CoursePrice.published == True
+    ).first()
     if not course:
-        import requests
-        try:
-            resp = requests.get(f"http://catalog-service:8000/api/catalog/courses/{item_in.course_id}", timeout=5)
-            if resp.status_code == 200:
-                data = resp.json()
-                course = CoursePrice(course_id=data["id"], title=data["title"], price=data["price"])
-                db.add(course)
-                db.commit()
-                db.refresh(course)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Course not found."
-                )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Course not found or unavailable."
-            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found."
+        )
     existing = db.query(CartItem).filter(
         CartItem.user_id == current_user.id,
         CartItem.course_id == item_in.course_id
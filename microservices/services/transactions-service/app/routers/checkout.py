@@ -1,21 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import logging
 from app.database import get_db
-from app.models.cart import CartItem
-from app.models.course import CoursePrice
 from app.models.order import Order
 from app.models.order_item import OrderItem
-from app.models.enrollment import Enrollment
 from app.dependencies.auth import get_current_user, UserPayload
 from app.schemas.transactions import (
     QuoteRequest, QuoteResponse, CouponValidate, CouponValidationResult, OrderOut
 )
 from app.services.wompi_gateway import WompiPaymentGateway
+from app.services.cart_pricing import price_cart
+from app.services.order_numbers import insert_order
+from app.services.fulfilment import fulfil_order
+from app.services.outbox import notify_relay
 from app.config import settings
-from app.celery_client import celery_app
 
 logger = logging.getLogger("transactions")
 
@@ -94,53 +95,34 @@ def checkout_confirm(
     db: Session = Depends(get_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
-    cart = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    if not cart:
+    cart = price_cart(db, current_user.id)
+    if not cart.items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Your cart is empty."
         )
-        
-    total = 0.0
-    items_to_create = []
-    
-    for item in cart:
-        course = db.query(CoursePrice).filter(CoursePrice.course_id == item.course_id).first()
-        if course:
-            price_subtotal = course.price * item.quantity
-            total += price_subtotal
-            items_to_create.append({
-                "course_id": item.course_id,
-                "price": course.price,
-                "quantity": item.quantity
-            })
             
-    last_order = db.query(Order.id).order_by(Order.id.desc()).first()
-    next_id = (last_order[0] if last_order else 0) + 1
-    number = f"SF-{10000 + next_id}"
+    order = insert_order(db, user_id=current_user.id, status="PENDING", total=cart.total)
     
-    order = Order(
-        number=number,
+    # Crear OrderItems históricos (un solo INSERT para todo el carrito)
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": order.id,
+            "course_id": item.course_id,
+            "price": item.unit_price,
+            "quantity": item.quantity
+        }
+        for item in cart.items
+    ])
+        
+    db.commit()
+    return OrderOut(
+        id=order.id,
+        number=order.number,
         user_id=current_user.id,
         status="PENDING",
-        total=round(total, 2)
+        total=cart.total
     )
-    db.add(order)
-    db.flush()
-    
-    # Crear OrderItems históricos
-    for item_data in items_to_create:
-        order_item = OrderItem(
-            order_id=order.id,
-            course_id=item_data["course_id"],
-            price=item_data["price"],
-            quantity=item_data["quantity"]
-        )
-        db.add(order_item)
-        
-    db.commit()
-    db.refresh(order)
-    return order
 
 @router.post("/checkout/return", response_model=OrderOut)
 def checkout_return(
@@ -161,65 +143,15 @@ def checkout_return(
     res = payload.result.lower()
     if res == "success":
         if order.status == "PENDING":
-            # Crear inscripciones basadas en los OrderItems persistentes
-            order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            for item in order_items:
-                existing = db.query(Enrollment).filter(
-                    Enrollment.user_id == current_user.id,
-                    Enrollment.course_id == item.course_id
-                ).first()
-                if not existing:
-                    enrollment = Enrollment(
-                        user_id=current_user.id,
-                        course_id=item.course_id,
-                        order_id=order.id,
-                        status="ACTIVA"
-                    )
-                    db.add(enrollment)
+            # Obtenemos email y nombre (simulado o a través del token)
+            # Como tenemos el user_id, y asumimos que el token tiene email:
+            user_email = current_user.email if hasattr(current_user, 'email') else f"user{current_user.id}@skillforge.local"
+            user_name = "Estudiante" # Opcional: obtener del microservicio de auth si estuviera disponible
             
-            order.status = "CONFIRMED"
-            # Limpiar el carrito del usuario
-            db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
-            db.commit()
-            
-            # Despachar tarea de email de confirmación (cola high_priority)
-            try:
-                # Obtenemos email y nombre (simulado o a través del token)
-                # Como tenemos el user_id, y asumimos que el token tiene email:
-                user_email = current_user.email if hasattr(current_user, 'email') else f"user{current_user.id}@skillforge.local"
-                user_name = "Estudiante" # Opcional: obtener del microservicio de auth si estuviera disponible
-                
-                celery_app.send_task(
-                    "shared.tasks.notifications.enviar_notificacion_orden_async",
-                    kwargs={
-                        "data": {
-                            "email": user_email,
-                            "nombre_usuario": user_name,
-                            "numero_orden": order.number
-                        }
-                    },
-                    queue="high_priority"
-                )
-                
-                # Publicar evento de orden completada
-                import sys
-                import os
-                sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../../"))
-                from shared.event_bus import RedisEventBus
-                
-                bus = RedisEventBus()
-                for item in order_items:
-                    bus.publish(
-                        stream="ordenes",
-                        event_type="orden.completada",
-                        data={
-                            "user_id": current_user.id,
-                            "course_id": item.course_id,
-                            "order_number": order.number
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Error dispatching Celery tasks on local return: {str(e)}")
+            # Inscripciones, carrito, email (cola high_priority) y eventos en una transacción
+            if fulfil_order(db, order, user_email, user_name) is not None:
+                db.commit()
+                notify_relay()
         
     elif res in {"fail", "cancel"}:
         order.status = "CANCELLED"
@@ -305,66 +237,15 @@ def wompi_webhook(
         
     if wompi_status == "APPROVED":
         if order.status == "PENDING":
-            # Crear inscripciones basadas en OrderItems guardados de forma persistente
-            order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            for item in order_items:
-                existing = db.query(Enrollment).filter(
-                    Enrollment.user_id == order.user_id,
-                    Enrollment.course_id == item.course_id
-                ).first()
-                if not existing:
-                    enrollment = Enrollment(
-                        user_id=order.user_id,
-                        course_id=item.course_id,
-                        order_id=order.id,
-                        status="ACTIVA"
-                    )
-                    db.add(enrollment)
+            # Obtenemos email y nombre (simulado o a través del token)
+            user_email = f"user{order.user_id}@skillforge.local" # Fallback temporal si no tenemos el user object
+            user_name = "Estudiante"
             
-            order.status = "CONFIRMED"
-            # Limpiar carrito
-            db.query(CartItem).filter(CartItem.user_id == order.user_id).delete()
-            db.commit()
-            logger.info(f"Order {reference} APPROVED and CONFIRMED via Wompi Webhook.")
-            
-            # Despachar tareas asíncronas de Celery y Eventos
-            try:
-                # 1. Email de confirmación al estudiante (cola high_priority)
-                # Obtenemos email y nombre (simulado o a través del token)
-                user_email = f"user{order.user_id}@skillforge.local" # Fallback temporal si no tenemos el user object
-                user_name = "Estudiante"
-                
-                celery_app.send_task(
-                    "shared.tasks.notifications.enviar_notificacion_orden_async",
-                    kwargs={
-                        "data": {
-                            "email": user_email,
-                            "nombre_usuario": user_name,
-                            "numero_orden": order.number
-                        }
-                    },
-                    queue="high_priority"
-                )
-                
-                # 2. Publicar evento de orden completada
-                import sys
-                import os
-                sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../../"))
-                from shared.event_bus import RedisEventBus
-                
-                bus = RedisEventBus()
-                for item in order_items:
-                    bus.publish(
-                        stream="ordenes",
-                        event_type="orden.completada",
-                        data={
-                            "user_id": order.user_id,
-                            "course_id": item.course_id,
-                            "order_number": order.number
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Error dispatching tasks/events on webhook approval: {str(e)}")
+            # Inscripciones, carrito, email (cola high_priority) y eventos en una transacción
+            if fulfil_order(db, order, user_email, user_name) is not None:
+                db.commit()
+                notify_relay()
+                logger.info(f"Order {reference} APPROVED and CONFIRMED via Wompi Webhook.")
                 
     elif wompi_status in {"DECLINED", "VOIDED", "ERROR"}:
         if order.status == "PENDING":
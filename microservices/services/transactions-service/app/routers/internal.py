@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.dependencies.internal import require_internal_token
+from app.services.price_replication import backfill
+
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+@router.post("/internal/reconcile-prices", include_in_schema=False)
+def reconcile_course_prices(db: Session = Depends(get_db)):
+    """
+    Invocado por la tarea periódica de Celery: vuelve a copiar los cursos del catálogo
+    para corregir la réplica si se perdió algún evento `curso.*`.
+    """
+    return {"status": "ok", "courses": backfill(db)}
@@ -1,31 +1,21 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.order import Order
 from app.dependencies.auth import get_current_user, UserPayload
 from app.schemas.transactions import OrderOut
+from shared.pagination import PageParams, paginate
 
 router = APIRouter()
 
 @router.get("/orders")
 def list_orders(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+    params: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: UserPayload = Depends(get_current_user)
 ):
-    query = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.id.desc())
-    total = query.count()
-    start = (page - 1) * page_size
-    results = query.offset(start).limit(page_size).all()
-    
-    end = start + page_size
-    return {
-        "count": total,
-        "next": page + 1 if end < total else None,
-        "previous": page - 1 if page > 1 else None,
-        "results": [OrderOut.from_orm(r) for r in results]
-    }
+    query = db.query(Order).filter(Order.user_id == current_user.id)
+    return paginate(query, params, [(Order.id, True)], OrderOut.from_orm)
 
 @router.get("/orders/{order_identifier}", response_model=OrderOut)
 def get_order_detail(
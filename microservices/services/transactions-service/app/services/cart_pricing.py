@@ -0,0 +1,39 @@
+"""
+Precio del carrito de un usuario, compartido por la vista del carrito y el checkout.
+
+Los ítems y sus precios se cargan con una sola consulta (JOIN con course_prices), así
+que el costo no depende del número de ítems. Los ítems de cursos sin precio replicado
+se omiten, igual que antes.
+"""
+from typing import NamedTuple
+from sqlalchemy.orm import Session
+from app.models.cart import CartItem
+from app.models.course import CoursePrice
+
+
+class PricedItem(NamedTuple):
+    course_id: int
+    title: str
+    quantity: int
+    unit_price: float
+    subtotal: float
+
+
+class PricedCart(NamedTuple):
+    items: list[PricedItem]
+    total: float
+
+
+def price_cart(db: Session, user_id: int) -> PricedCart:
+    rows = (
+        db.query(CartItem.course_id, CartItem.quantity, CoursePrice.title, CoursePrice.price)
+        .join(CoursePrice, CoursePrice.course_id == CartItem.course_id)
+        .filter(CartItem.user_id == user_id)
+        .order_by(CartItem.id.asc())
+        .all()
+    )
+    items = [
+        PricedItem(course_id, title, quantity, price, price * quantity)
+        for course_id, quantity, title, price in rows
+    ]
+    return PricedCart(items=items, total=round(sum(item.subtotal for item in items), 2))
@@ -0,0 +1,83 @@
+"""
+Cumplimiento de una orden pagada, compartido por el retorno del checkout y el webhook de Wompi.
+
+El número de consultas no depende de los ítems de la orden (una trayectoria de 20
+cursos cuesta lo mismo que un curso): los ítems y las inscripciones que el usuario ya
+tiene se leen con un solo LEFT JOIN y las faltantes se crean con un INSERT en bloque.
+El INSERT usa ON CONFLICT DO NOTHING sobre (user_id, course_id), así que una
+inscripción creada en paralelo (p. ej. retorno y webhook a la vez) no produce error.
+
+El email de confirmación y los eventos `orden.completada` se escriben en el outbox en
+la misma transacción (app/services/outbox.py).
+"""
+from typing import Optional
+
+from sqlalchemy import and_, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.cart import CartItem
+from app.models.enrollment import Enrollment
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.services import outbox
+
+ORDER_NOTIFICATION_TASK = "shared.tasks.notifications.enviar_notificacion_orden_async"
+ORDERS_STREAM = "ordenes"
+ORDER_COMPLETED = "orden.completada"
+
+_INSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _enrollment_insert(db: Session):
+    dialect_insert = _INSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        return insert(Enrollment.__table__)
+    return dialect_insert(Enrollment.__table__).on_conflict_do_nothing(index_elements=["user_id", "course_id"])
+
+
+def fulfil_order(db: Session, order: Order, user_email: str, user_name: str) -> Optional[list[int]]:
+    """
+    Confirma la orden PENDING, inscribe al usuario en sus cursos, vacía su carrito y
+    encola la notificación y los eventos de la orden; sin commit. Retorna los course_id
+    de la orden, o None si ya no estaba PENDING (otro proceso la confirmó o canceló),
+    en cuyo caso no cambia nada.
+    """
+    # El cambio de estado es condicional: sólo un llamador concurrente lo consigue
+    confirmed = db.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == "PENDING")
+        .values(status="CONFIRMED")
+    )
+    if confirmed.rowcount != 1:
+        return None
+
+    rows = db.execute(
+        select(OrderItem.course_id, Enrollment.id)
+        .outerjoin(Enrollment, and_(Enrollment.user_id == order.user_id, Enrollment.course_id == OrderItem.course_id))
+        .where(OrderItem.order_id == order.id)
+        .order_by(OrderItem.id)
+    ).all()
+    course_ids = [course_id for course_id, _ in rows]
+    missing = list(dict.fromkeys(course_id for course_id, enrollment_id in rows if enrollment_id is None))
+    if missing:
+        db.execute(_enrollment_insert(db), [
+            {"user_id": order.user_id, "course_id": course_id, "order_id": order.id, "status": "ACTIVA"}
+            for course_id in missing
+        ])
+
+    db.query(CartItem).filter(CartItem.user_id == order.user_id).delete()
+    outbox.enqueue(db, [
+        outbox.task_message(
+            ORDER_NOTIFICATION_TASK,
+            {"data": {"email": user_email, "nombre_usuario": user_name, "numero_orden": order.number}},
+            queue="high_priority"
+        ),
+        *(
+            outbox.event_message(ORDERS_STREAM, ORDER_COMPLETED, {
+                "user_id": order.user_id, "course_id": course_id, "order_number": order.number
+            })
+            for course_id in course_ids
+        ),
+    ])
+    return course_ids
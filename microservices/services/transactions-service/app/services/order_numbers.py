@@ -0,0 +1,31 @@
+"""
+Números de orden (SF-<n>) asignados dentro del mismo INSERT que crea la orden.
+
+En PostgreSQL <n> sale de la secuencia order_number_seq: nextval no toma locks ni
+participa en la transacción, así que checkouts concurrentes nunca reciben el mismo
+número y siempre crecen; una transacción revertida deja un hueco, nunca un duplicado.
+En motores sin secuencias (SQLite en desarrollo) se usa 10000 + max(id) + 1 como
+subconsulta del INSERT, que es atómico porque SQLite admite un solo escritor a la vez.
+"""
+from sqlalchemy import String, cast, func, insert, literal, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, order_number_seq
+
+ORDER_NUMBER_PREFIX = "SF-"
+
+
+def next_order_number(db: Session):
+    """Expresión SQL (no un valor) del próximo número, para usar en el INSERT."""
+    if db.get_bind().dialect.supports_sequences:
+        n = order_number_seq.next_value()
+    else:
+        n = order_number_seq.start + func.coalesce(select(func.max(Order.id)).scalar_subquery(), 0)
+    return literal(ORDER_NUMBER_PREFIX) + cast(n, String)
+
+
+def insert_order(db: Session, **values) -> Row:
+    """Inserta la orden con su número en una sola sentencia. Retorna (id, number); sin commit."""
+    stmt = insert(Order).values(number=next_order_number(db), **values).returning(Order.id, Order.number)
+    return db.execute(stmt).one()
@@ -0,0 +1,163 @@
+"""
+Outbox transaccional para eventos de Redis Streams y tareas Celery.
+
+Los handlers no publican directamente: `enqueue` inserta las filas en outbox_messages
+dentro de la misma transacción que el cambio (p. ej. la orden confirmada), así que si
+la transacción se confirma los mensajes existen y si se revierte no existen.
+
+El relay toma lotes de filas pendientes (FOR UPDATE SKIP LOCKED en PostgreSQL, así que
+varios relays no se pisan), publica los eventos del lote en un solo pipeline de Redis y
+las tareas con un único productor de Celery, y borra las filas publicadas en la misma
+transacción. Entrega al menos una vez: si el proceso muere entre publicar y confirmar el
+borrado, el lote se publica de nuevo; los consumidores deben ser idempotentes (las
+tareas llevan task_id "outbox-<id>" para poder deduplicar).
+
+Un mensaje que no se pudo publicar se reintenta con espera exponencial (available_at)
+y tras OUTBOX_MAX_ATTEMPTS intentos se marca con dead_at y el relay deja de tomarlo.
+Las filas muertas se conservan para revisarlas; para reencolarlas basta con poner
+dead_at y available_at en NULL.
+
+Corre como hilo de fondo del servicio (OUTBOX_RELAY_ENABLED) o como proceso aparte:
+    python -m app.services.outbox
+"""
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+EVENT = "event"
+TASK = "task"
+
+_bus = None
+_wakeup = threading.Event()
+
+
+def event_message(stream: str, event_type: str, data: dict) -> dict:
+    return {"kind": EVENT, "destination": stream, "payload": {"event_type": event_type, "data": data}}
+
+
+def task_message(name: str, kwargs: dict, queue: Optional[str] = None) -> dict:
+    return {"kind": TASK, "destination": name, "payload": {"kwargs": kwargs, "queue": queue}}
+
+
+def enqueue(db: Session, messages: list[dict]) -> None:
+    """Agrega los mensajes a la transacción actual (un solo INSERT); sin commit."""
+    if messages:
+        db.execute(insert(OutboxMessage.__table__), messages)
+
+
+def notify_relay() -> None:
+    """Despierta al relay de este proceso para no esperar al siguiente intervalo."""
+    # Sólo llega al hilo de este proceso: con varios workers (o el relay como proceso
+    # aparte) los mensajes de otro worker se publican en el siguiente sondeo.
+    _wakeup.set()
+
+
+def _event_bus():
+    global _bus
+    if _bus is None:
+        sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../../"))
+        from shared.event_bus import RedisEventBus
+        _bus = RedisEventBus(settings.REDIS_URL)
+    return _bus
+
+
+def _send_tasks(rows: list, published: list) -> None:
+    from app.celery_client import celery_app
+
+    with celery_app.producer_or_acquire() as producer:
+        for row in rows:
+            celery_app.send_task(
+                row.destination,
+                kwargs=row.payload["kwargs"],
+                queue=row.payload["queue"],
+                task_id=f"outbox-{row.id}",
+                producer=producer
+            )
+            published.append(row.id)
+
+
+def _retry_later(rows: list, now: datetime) -> None:
+    """Suma un intento a cada fila y la aplaza con espera exponencial, o la marca muerta."""
+    dead = []
+    for row in rows:
+        row.attempts += 1
+        if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            row.dead_at = now
+            dead.append(row.id)
+        else:
+            delay = min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (row.attempts - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+            row.available_at = now + timedelta(seconds=delay)
+    if dead:
+        logger.error(f"Outbox relay: messages {dead} failed {settings.OUTBOX_MAX_ATTEMPTS} times; marked dead")
+
+
+def relay_batch(db: Session, batch_size: int) -> int:
+    """Publica y borra hasta batch_size mensajes pendientes. Retorna cuántos publicó."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = db.scalars(
+        select(OutboxMessage)
+        .where(OutboxMessage.dead_at.is_(None))
+        .where(or_(OutboxMessage.available_at.is_(None), OutboxMessage.available_at <= now))
+        .order_by(OutboxMessage.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        db.rollback()
+        return 0
+
+    events = [row for row in rows if row.kind == EVENT]
+    tasks = [row for row in rows if row.kind == TASK]
+    published = []
+    try:
+        if events:
+            _event_bus().publish_many([
+                (row.destination, row.payload["event_type"], row.payload["data"]) for row in events
+            ])
+            published.extend(row.id for row in events)
+        if tasks:
+            _send_tasks(tasks, published)
+    except Exception as e:
+        logger.error(f"Outbox relay: {len(rows) - len(published)} messages left pending: {e}")
+        done = set(published)
+        _retry_later([row for row in rows if row.id not in done], now)
+    if published:
+        db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(published)), execution_options={"synchronize_session": False})
+    db.commit()
+    return len(published)
+
+
+def run_relay(stop: threading.Event) -> None:
+    """Publica lotes mientras haya pendientes; luego espera un aviso o el siguiente intervalo."""
+    from app.database import SessionLocal
+
+    while not stop.is_set():
+        # Antes del lote: un aviso que llega mientras se publica dispara otra vuelta
+        _wakeup.clear()
+        published = 0
+        db = SessionLocal()
+        try:
+            published = relay_batch(db, settings.OUTBOX_RELAY_BATCH_SIZE)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Outbox relay failed: {e}")
+        finally:
+            db.close()
+        if published < settings.OUTBOX_RELAY_BATCH_SIZE:
+            _wakeup.wait(settings.OUTBOX_RELAY_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_relay(threading.Event())
@@ -0,0 +1,174 @@
+"""
+Réplica local de precios de cursos (course_prices), alimentada por el catálogo.
+
+catalog-service publica `curso.creado` / `curso.actualizado` en el stream `cursos`
+(shared/event_bus.py) y un hilo de fondo los aplica con un upsert, así que agregar
+al carrito sólo lee la réplica y nunca hace una llamada HTTP síncrona al catálogo.
+Los cursos que dejan de estar publicados se conservan (carritos y matrículas los
+referencian) pero quedan con published=False.
+
+Si la réplica está vacía se llena paginando el listado público del catálogo (backfill).
+El mismo backfill corre cada 15 minutos desde Celery Beat (tarea reconciliar_precios_cursos,
+POST /internal/reconcile-prices) o a mano con `python -m app.services.price_replication
+backfill`, y corrige los cursos cuyo evento se perdió porque Redis no estaba disponible
+cuando el catálogo lo publicó. El grupo de consumidores se crea en '$' antes del primer
+backfill, así que un cambio concurrente queda en el stream y se aplica después: los
+eventos son el estado completo del curso y aplicarlos dos veces no cambia el resultado.
+
+Un evento se confirma (XACK) sólo después de aplicarlo. Si la BD falla el consumidor
+se reinicia y vuelve a leer primero sus pendientes; los que deja un proceso que murió
+los reclama otro con XAUTOCLAIM tras RECLAIM_IDLE_MS. Cada proceso consume con su
+propio nombre (host y pid) para no compartir pendientes con otro worker.
+"""
+import logging
+import os
+import socket
+import sys
+import time
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.course import CoursePrice
+
+logger = logging.getLogger(__name__)
+
+STREAM = "cursos"
+GROUP = "transactions_prices"
+CONSUMER_PREFIX = "transactions_worker"
+COURSE_EVENTS = {"curso.creado", "curso.actualizado"}
+BACKFILL_PAGE_SIZE = 100
+RECLAIM_IDLE_MS = 60_000
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _row(data: dict) -> dict:
+    return {
+        "course_id": int(data["course_id"]),
+        "title": data["title"],
+        "price": float(data["price"]),
+        "published": data.get("status", "PUBLISHED") == "PUBLISHED",
+    }
+
+
+def upsert_prices(db: Session, rows: list[dict]) -> None:
+    """INSERT ... ON CONFLICT DO UPDATE en bloque; sin commit."""
+    if not rows:
+        return
+    dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        for row in rows:
+            db.merge(CoursePrice(**row))
+        return
+    stmt = dialect_insert(CoursePrice.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CoursePrice.course_id],
+        set_={"title": stmt.excluded.title, "price": stmt.excluded.price, "published": stmt.excluded.published},
+    )
+    db.execute(stmt, rows)
+
+
+def consumer_name() -> str:
+    return f"{CONSUMER_PREFIX}-{socket.gethostname()}-{os.getpid()}"
+
+
+def handle_event(db: Session, bus, msg_id: str, event_type: str, data: dict) -> None:
+    """
+    Aplica un evento del stream y lo confirma. Un evento mal formado se confirma sin
+    aplicarlo; si falla la BD la excepción se propaga y el evento queda pendiente.
+    """
+    if event_type in COURSE_EVENTS:
+        try:
+            row = _row(data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Discarding malformed {event_type} {msg_id}: {e}")
+        else:
+            try:
+                upsert_prices(db, [row])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+    bus.ack(STREAM, GROUP, msg_id)
+
+
+def needs_backfill(db: Session) -> bool:
+    """La réplica local está vacía (BD nueva o recreada), sin importar lo que hicieron otros despliegues."""
+    return db.query(CoursePrice.course_id).first() is None
+
+
+def backfill(db: Session) -> int:
+    """
+    Copia los cursos publicados del catálogo (paginación por cursor) y marca como no
+    publicados los que la réplica tiene y el catálogo ya no lista. Retorna los cursos copiados.
+    """
+    import requests
+
+    url = f"{settings.CATALOG_URL}/api/catalog/courses"
+    params = {"page_size": BACKFILL_PAGE_SIZE, "count": "none"}
+    seen = set()
+    while True:
+        response = requests.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        page = response.json()
+        rows = [_row({**course, "course_id": course["id"]}) for course in page["results"]]
+        upsert_prices(db, rows)
+        seen.update(row["course_id"] for row in rows)
+        if not page.get("next_cursor"):
+            break
+        params["cursor"] = page["next_cursor"]
+    stale = update(CoursePrice).where(CoursePrice.published == True)
+    if seen:
+        stale = stale.where(CoursePrice.course_id.notin_(seen))
+    db.execute(stale.values(published=False))
+    db.commit()
+    return len(seen)
+
+
+def _event_bus():
+    sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../../"))
+    from shared.event_bus import RedisEventBus
+    return RedisEventBus(settings.REDIS_URL)
+
+
+def consume_course_events() -> None:
+    """Hilo de fondo: backfill inicial (si la réplica está vacía) y luego los eventos del catálogo."""
+    from app.database import SessionLocal
+
+    consumer = consumer_name()
+    while True:
+        try:
+            bus = _event_bus()
+            bus.ensure_group(STREAM, GROUP, start_id="$")
+            db = SessionLocal()
+            try:
+                if needs_backfill(db):
+                    logger.info(f"Course prices backfilled from catalog: {backfill(db)}")
+            finally:
+                db.close()
+            events = bus.consume(stream=STREAM, group_name=GROUP, consumer_name=consumer,
+                                 auto_ack=False, reclaim_idle_ms=RECLAIM_IDLE_MS)
+            for msg_id, event_type, data in events:
+                db = SessionLocal()
+                try:
+                    handle_event(db, bus, msg_id, event_type, data)
+                finally:
+                    db.close()
+        except Exception as e:
+            logger.error(f"Course price consumer crashed: {e}. Restarting in 5s...")
+            time.sleep(5)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("usage: python -m app.services.price_replication backfill")
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"{backfill(session)} courses replicated")
+    finally:
+        session.close()
@@ -0,0 +1,103 @@
+"""
+Benchmark: GET /cart y POST /checkout/confirm con carritos de distinto tamaño.
+Imprime el tiempo por request y las consultas SQL de cada uno; que las consultas no
+dependan del número de ítems lo verifica tests/test_cart_pricing.py.
+
+Uso (desde microservices/services/transactions-service):
+    python benchmarks/bench_cart_pricing.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.database import Base, get_db
+from app.models import CoursePrice, CartItem
+from app.routers import cart, checkout
+
+CART_SIZES = [1, 10, 50]
+REPETITIONS = 20
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+def override_get_db():
+    db = TestingSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def auth_header(user_id: int) -> dict:
+    token = jwt.encode({"sub": str(user_id), "username": f"user{user_id}", "role": "ESTUDIANTE", "type": "access"},
+                       settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed() -> None:
+    db = TestingSession()
+    db.add_all([CoursePrice(course_id=c, title=f"Curso {c}", price=10.0 + c) for c in range(1, max(CART_SIZES) + 1)])
+    for user_id in CART_SIZES:
+        db.add_all([CartItem(user_id=user_id, course_id=c, quantity=1) for c in range(1, user_id + 1)])
+    db.commit()
+    db.close()
+
+
+def count_statements(fn) -> int:
+    statements.clear()
+    fn()
+    return len(statements)
+
+
+def main():
+    app = FastAPI()
+    app.include_router(cart.router, prefix="/api/transactions")
+    app.include_router(checkout.router, prefix="/api/transactions")
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    seed()
+
+    print(f"{'ítems':>6} {'consultas cart':>15} {'ms/req':>8} {'consultas checkout':>19}")
+    for size in CART_SIZES:
+        headers = auth_header(size)
+
+        def get_cart():
+            response = client.get("/api/transactions/cart", headers=headers)
+            assert response.status_code == 200, response.text
+            assert response.json()["count"] == size
+
+        cart_queries = count_statements(get_cart)
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            get_cart()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / REPETITIONS
+
+        def confirm():
+            response = client.post("/api/transactions/checkout/confirm", headers=headers)
+            assert response.status_code == 201, response.text
+
+        checkout_queries = count_statements(confirm)
+        print(f"{size:>6} {cart_queries:>15} {elapsed_ms:>8.2f} {checkout_queries:>19}")
+
+
+if __name__ == "__main__":
+    main()
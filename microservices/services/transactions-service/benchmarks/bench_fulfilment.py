@@ -0,0 +1,119 @@
+"""
+Benchmark: confirmación de órdenes (retorno del checkout y webhook de Wompi) con
+distinto número de ítems. Verifica que la cantidad de consultas SQL sea constante
+(inscripciones existentes en una consulta y las nuevas en un solo INSERT).
+
+Uso (desde microservices/services/transactions-service):
+    python benchmarks/bench_fulfilment.py
+"""
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.database import Base, get_db
+from app.models import CoursePrice, Enrollment, Order, OrderItem
+from app.routers import checkout
+
+ORDER_SIZES = [2, 5, 20]
+# Cursos en los que el usuario ya estaba inscrito antes de pagar (no se duplican)
+PREVIOUSLY_ENROLLED = 1
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+def override_get_db():
+    db = TestingSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def auth_header(user_id: int) -> dict:
+    token = jwt.encode({"sub": str(user_id), "username": f"user{user_id}", "role": "ESTUDIANTE", "type": "access"},
+                       settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_order(user_id: int, size: int) -> str:
+    db = TestingSession()
+    order = Order(number=f"BENCH-{user_id}", user_id=user_id, status="PENDING", total=10.0 * size)
+    db.add(order)
+    db.flush()
+    db.add_all([OrderItem(order_id=order.id, course_id=c, price=10.0, quantity=1) for c in range(1, size + 1)])
+    db.add_all([Enrollment(user_id=user_id, course_id=c, status="ACTIVA") for c in range(1, PREVIOUSLY_ENROLLED + 1)])
+    db.commit()
+    db.close()
+    return f"BENCH-{user_id}"
+
+
+def enrollments(user_id: int) -> list[int]:
+    db = TestingSession()
+    try:
+        return sorted(course_id for (course_id,) in db.query(Enrollment.course_id).filter(Enrollment.user_id == user_id))
+    finally:
+        db.close()
+
+
+def main():
+    app = FastAPI()
+    app.include_router(checkout.router, prefix="/api/transactions")
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    db = TestingSession()
+    db.add_all([CoursePrice(course_id=c, title=f"Curso {c}", price=10.0) for c in range(1, max(ORDER_SIZES) + 1)])
+    db.commit()
+    db.close()
+
+    def confirm_return(user_id, number):
+        response = client.post("/api/transactions/checkout/return", headers=auth_header(user_id),
+                               json={"order_number": number, "result": "success"})
+        assert response.status_code == 200 and response.json()["status"] == "CONFIRMED", response.text
+
+    def confirm_webhook(user_id, number):
+        payload = {"event": "transaction.updated", "data": {"transaction": {"reference": number, "status": "APPROVED"}}}
+        response = client.post("/api/transactions/checkout/wompi-webhook", json=payload)
+        assert response.status_code == 200 and response.json()["order_status"] == "CONFIRMED", response.text
+
+    counts = {}
+    print(f"{'flujo':<8} {'ítems':>6} {'consultas':>10}")
+    # Las notificaciones van al outbox (mismas consultas); el relay no corre aquí
+    with mock.patch.object(checkout.WompiPaymentGateway, "validate_webhook_signature", return_value=True):
+        for name, confirm, offset in (("retorno", confirm_return, 0), ("webhook", confirm_webhook, 100)):
+            for size in ORDER_SIZES:
+                user_id = offset + size
+                number = seed_order(user_id, size)
+                statements.clear()
+                confirm(user_id, number)
+                counts[(name, size)] = len(statements)
+                assert enrollments(user_id) == list(range(1, size + 1)), enrollments(user_id)
+                print(f"{name:<8} {size:>6} {counts[(name, size)]:>10}")
+
+    for name in ("retorno", "webhook"):
+        per_size = {size: counts[(name, size)] for size in ORDER_SIZES}
+        assert len(set(per_size.values())) == 1, f"{name}: query count depends on order size: {per_size}"
+    print("OK: consultas por confirmación independientes del número de ítems.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Fixtures comunes: una BD SQLite temporal y sin hilos de fondo (réplica de precios ni
+relay del outbox); las pruebas llaman a esas funciones directamente.
+
+Uso (desde microservices/services/transactions-service):
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+# settings se lee al importar app: la configuración de prueba va antes de cualquier import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'transactions-test.db')}"
+os.environ["REDIS_URL"] = "redis://transactions-test"
+os.environ["PRICE_REPLICATION_ENABLED"] = "false"
+os.environ["OUTBOX_RELAY_ENABLED"] = "false"
+
+import fakeredis
+import pytest
+
+from app.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def bus():
+    """RedisEventBus sobre un Redis en memoria."""
+    from shared.event_bus import RedisEventBus
+
+    bus = RedisEventBus("redis://transactions-test")
+    bus.redis = fakeredis.FakeRedis(decode_responses=True)
+    return bus
@@ -0,0 +1,76 @@
+"""
+El carrito y el checkout ejecutan el mismo número de sentencias SQL con 1, 10 o 50
+ítems: los precios se leen con un solo JOIN, sin una consulta por ítem.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine
+from app.main import app
+from app.models import CartItem, CoursePrice
+
+CART_SIZES = [1, 10, 50]
+
+
+def auth_header(user_id: int) -> dict:
+    token = jwt.encode({"sub": str(user_id), "username": f"user{user_id}", "role": "ESTUDIANTE", "type": "access"},
+                       settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def carts(db):
+    """Un usuario por tamaño de carrito (user_id == número de ítems)."""
+    db.add_all([CoursePrice(course_id=c, title=f"Curso {c}", price=10.0 + c) for c in range(1, max(CART_SIZES) + 1)])
+    for user_id in CART_SIZES:
+        db.add_all([CartItem(user_id=user_id, course_id=c, quantity=1) for c in range(1, user_id + 1)])
+    db.commit()
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def count_per_size(statements, request) -> dict:
+    counts = {}
+    for size in CART_SIZES:
+        statements.clear()
+        request(size)
+        counts[size] = len(statements)
+    return counts
+
+
+def test_get_cart_query_count_does_not_depend_on_cart_size(carts, statements):
+    client = TestClient(app)
+
+    def get_cart(size):
+        response = client.get("/api/transactions/cart", headers=auth_header(size))
+        assert response.status_code == 200, response.text
+        assert response.json()["count"] == size
+
+    counts = count_per_size(statements, get_cart)
+
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_checkout_confirm_query_count_does_not_depend_on_cart_size(carts, statements):
+    client = TestClient(app)
+
+    def confirm(size):
+        response = client.post("/api/transactions/checkout/confirm", headers=auth_header(size))
+        assert response.status_code == 201, response.text
+
+    counts = count_per_size(statements, confirm)
+
+    assert len(set(counts.values())) == 1, counts
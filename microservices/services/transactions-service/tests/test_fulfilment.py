@@ -0,0 +1,96 @@
+"""
+fulfil_order es idempotente: el retorno del checkout y el webhook pueden confirmar la
+misma orden y sólo el primero inscribe, vacía el carrito y encola los mensajes.
+"""
+import pytest
+
+from app.database import SessionLocal
+from app.models import CartItem, CoursePrice, Enrollment, Order, OrderItem, OutboxMessage
+from app.services import fulfilment
+from app.services.fulfilment import fulfil_order
+from app.services.order_numbers import insert_order
+
+
+@pytest.fixture(params=["on_conflict", "plain_insert"])
+def insert_path(request, monkeypatch):
+    if request.param == "plain_insert":
+        # Motores sin ON CONFLICT DO NOTHING usan un INSERT simple
+        monkeypatch.setattr(fulfilment, "_INSERT_DIALECTS", {})
+    return request.param
+
+
+@pytest.fixture
+def order(db):
+    """Orden PENDING de tres cursos; el usuario ya estaba inscrito en el tercero."""
+    db.add_all([CoursePrice(course_id=course_id, title=f"Curso {course_id}", price=10.0) for course_id in (1, 2, 3)])
+    db.flush()
+    row = insert_order(db, user_id=5, status="PENDING", total=30.0)
+    db.add_all([OrderItem(order_id=row.id, course_id=course_id, price=10.0) for course_id in (1, 2, 3)])
+    db.add_all([CartItem(user_id=5, course_id=1, quantity=1), CartItem(user_id=5, course_id=2, quantity=1)])
+    db.add(Enrollment(user_id=5, course_id=3, status="ACTIVA"))
+    db.commit()
+    return db.get(Order, row.id)
+
+
+def snapshot(db) -> dict:
+    db.expire_all()
+    return {
+        "enrollments": sorted((e.course_id, e.order_id) for e in db.query(Enrollment).filter(Enrollment.user_id == 5)),
+        "cart": db.query(CartItem).filter(CartItem.user_id == 5).count(),
+        "outbox": db.query(OutboxMessage).count(),
+    }
+
+
+def test_first_call_fulfils_the_order(db, order, insert_path):
+    assert fulfil_order(db, order, "ana@example.com", "Ana") == [1, 2, 3]
+    db.commit()
+
+    assert db.get(Order, order.id).status == "CONFIRMED"
+    assert snapshot(db) == {
+        "enrollments": [(1, order.id), (2, order.id), (3, None)],
+        "cart": 0,
+        "outbox": 4,  # email de confirmación y un orden.completada por curso
+    }
+
+
+def test_second_call_changes_nothing(db, order, insert_path):
+    fulfil_order(db, order, "ana@example.com", "Ana")
+    db.commit()
+    before = snapshot(db)
+    db.add(CartItem(user_id=5, course_id=2, quantity=1))
+    db.commit()
+
+    assert fulfil_order(db, order, "ana@example.com", "Ana") is None
+    db.commit()
+
+    assert snapshot(db) == {**before, "cart": 1}
+
+
+def test_stale_order_from_a_concurrent_caller_is_not_fulfilled_twice(db, order, insert_path):
+    # El webhook leyó la orden (PENDING) antes de que el retorno del checkout la confirmara
+    other = SessionLocal()
+    try:
+        stale = other.get(Order, order.id)
+        assert stale.status == "PENDING"
+        other.rollback()
+
+        assert fulfil_order(db, order, "ana@example.com", "Ana") is not None
+        db.commit()
+
+        assert fulfil_order(other, stale, "ana@example.com", "Ana") is None
+        other.commit()
+    finally:
+        other.close()
+
+    assert snapshot(db)["outbox"] == 4
+    assert len(snapshot(db)["enrollments"]) == 3
+
+
+def test_cancelled_order_is_not_fulfilled(db, order, insert_path):
+    order.status = "CANCELLED"
+    db.commit()
+
+    assert fulfil_order(db, order, "ana@example.com", "Ana") is None
+    db.commit()
+
+    assert snapshot(db) == {"enrollments": [(3, None)], "cart": 2, "outbox": 0}
@@ -0,0 +1,69 @@
+"""
+Checkouts concurrentes no repiten número de orden y los de cada hilo son crecientes
+(camino sin secuencias: SQLite). La corrida grande y la de PostgreSQL están en
+benchmarks/bench_order_numbers.py.
+"""
+import threading
+from collections import defaultdict
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.dependencies.auth import UserPayload
+from app.models import CartItem, CoursePrice, Order
+from app.routers import checkout
+
+CHECKOUTS = 200
+THREADS = 20
+
+
+def test_concurrent_checkouts_get_unique_increasing_numbers(db):
+    db.add(CoursePrice(course_id=1, title="Curso", price=10.0))
+    db.flush()
+    # Un carrito por checkout: cada llamada confirma el de un usuario distinto
+    db.add_all([CartItem(user_id=user_id, course_id=1, quantity=1) for user_id in range(CHECKOUTS)])
+    db.commit()
+
+    # Motor propio con espera larga: SQLite admite un solo escritor a la vez
+    engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False, "timeout": 60},
+                           pool_size=THREADS, max_overflow=0)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    users = iter(range(CHECKOUTS))
+    lock = threading.Lock()
+    numbers = defaultdict(list)
+    errors = []
+
+    def worker(n: int):
+        while True:
+            with lock:
+                user_id = next(users, None)
+            if user_id is None:
+                return
+            session = Session()
+            try:
+                order = checkout.checkout_confirm(
+                    db=session, current_user=UserPayload(id=user_id, username=f"user{user_id}", role="ESTUDIANTE")
+                )
+                numbers[n].append(int(order.number.removeprefix("SF-")))
+            except Exception as e:
+                session.rollback()
+                errors.append(repr(e))
+            finally:
+                session.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    issued = [number for per_thread in numbers.values() for number in per_thread]
+    assert errors == []
+    assert len(issued) == CHECKOUTS
+    assert len(set(issued)) == CHECKOUTS
+    for per_thread in numbers.values():
+        assert per_thread == sorted(per_thread) and len(set(per_thread)) == len(per_thread)
+    db.expire_all()
+    assert db.query(Order).count() == CHECKOUTS
@@ -0,0 +1,104 @@
+"""
+Reintentos del relay del outbox: un mensaje que no se pudo publicar espera con backoff
+exponencial y, tras OUTBOX_MAX_ATTEMPTS fallos, queda muerto y el relay no lo vuelve a tomar.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models import OutboxMessage
+from app.services import outbox
+
+STREAM = "test_ordenes"
+
+
+class FlakyBus:
+    """Falla las primeras `failures` publicaciones y luego delega en el bus real."""
+
+    def __init__(self, bus, failures: int):
+        self.bus = bus
+        self.failures = failures
+        self.calls = 0
+
+    def publish_many(self, events: list) -> list:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("redis unavailable")
+        return self.bus.publish_many(events)
+
+
+@pytest.fixture
+def enqueued(db):
+    outbox.enqueue(db, [outbox.event_message(STREAM, "orden.completada", {"order_number": f"SF-{i}"}) for i in range(3)])
+    db.commit()
+
+
+def flaky_bus(monkeypatch, bus, failures: int) -> FlakyBus:
+    flaky = FlakyBus(bus, failures)
+    monkeypatch.setattr(outbox, "_event_bus", lambda: flaky)
+    return flaky
+
+
+def rows(db) -> list:
+    db.expire_all()
+    return db.query(OutboxMessage).order_by(OutboxMessage.id).all()
+
+
+def make_available(db) -> None:
+    for row in rows(db):
+        row.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+
+def test_failed_messages_wait_with_exponential_backoff(db, bus, enqueued, monkeypatch):
+    flaky = flaky_bus(monkeypatch, bus, failures=2)
+
+    before = datetime.utcnow()
+    assert outbox.relay_batch(db, 10) == 0
+    first = rows(db)
+    assert [row.attempts for row in first] == [1, 1, 1]
+    assert all(row.available_at >= before + timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS) for row in first)
+
+    # Aún en espera: el relay no los toma ni intenta publicar
+    assert outbox.relay_batch(db, 10) == 0
+    assert flaky.calls == 1
+
+    make_available(db)
+    before = datetime.utcnow()
+    assert outbox.relay_batch(db, 10) == 0
+    assert all(row.available_at >= before + timedelta(seconds=2 * settings.OUTBOX_RETRY_BASE_SECONDS) for row in rows(db))
+
+    make_available(db)
+    assert outbox.relay_batch(db, 10) == 3
+    assert rows(db) == []
+    assert bus.redis.xlen(STREAM) == 3
+
+
+def test_messages_are_marked_dead_after_max_attempts(db, bus, enqueued, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    flaky = flaky_bus(monkeypatch, bus, failures=3)
+
+    for _ in range(3):
+        outbox.relay_batch(db, 10)
+        make_available(db)
+
+    dead = rows(db)
+    assert [row.attempts for row in dead] == [3, 3, 3]
+    assert all(row.dead_at is not None for row in dead)
+
+    # Redis volvió, pero los mensajes muertos ya no se toman
+    assert outbox.relay_batch(db, 10) == 0
+    assert flaky.calls == 3
+    assert len(rows(db)) == 3
+
+
+def test_new_messages_are_not_held_back_by_waiting_ones(db, bus, enqueued, monkeypatch):
+    flaky_bus(monkeypatch, bus, failures=1)
+    outbox.relay_batch(db, 10)
+
+    outbox.enqueue(db, [outbox.event_message(STREAM, "orden.completada", {"order_number": "SF-9"})])
+    db.commit()
+
+    assert outbox.relay_batch(db, 10) == 1
+    assert len(rows(db)) == 3
@@ -0,0 +1,140 @@
+"""
+Consumo de eventos de precios: un evento se confirma sólo después de aplicarlo y los
+pendientes (propios o de un consumidor que murió) se vuelven a entregar.
+"""
+import os
+import socket
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.main import app
+from app.models import CoursePrice
+from app.services import price_replication
+from app.services.price_replication import GROUP, STREAM, handle_event, needs_backfill
+
+
+def publish(bus, course_id: int, price: float, status: str = "PUBLISHED") -> str:
+    return bus.publish(STREAM, "curso.actualizado", {"course_id": course_id, "title": f"Curso {course_id}",
+                                                     "price": price, "status": status})
+
+
+def consume(bus, consumer: str = "worker-a", **kwargs):
+    return bus.consume(STREAM, GROUP, consumer, block=1, auto_ack=False, **kwargs)
+
+
+def pending(bus) -> int:
+    return bus.redis.xpending(STREAM, GROUP)["pending"]
+
+
+@pytest.fixture
+def group(bus):
+    bus.ensure_group(STREAM, GROUP, start_id="$")
+
+
+def test_event_is_applied_then_acked(db, bus, group):
+    publish(bus, 7, 50.0)
+    msg_id, event_type, data = next(consume(bus))
+    assert pending(bus) == 1
+
+    handle_event(db, bus, msg_id, event_type, data)
+
+    assert pending(bus) == 0
+    row = db.get(CoursePrice, 7)
+    assert (row.price, row.published) == (50.0, True)
+
+
+def test_failed_apply_stays_pending_and_is_redelivered_first(db, bus, group, monkeypatch):
+    first = publish(bus, 7, 50.0)
+    second = publish(bus, 7, 60.0)
+
+    def unavailable(db, rows):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    events = consume(bus)
+    msg_id, event_type, data = next(events)
+    with monkeypatch.context() as patch:
+        patch.setattr(price_replication, "upsert_prices", unavailable)
+        with pytest.raises(OperationalError):
+            handle_event(db, bus, msg_id, event_type, data)
+    events.close()
+    # Se entregaron los dos eventos del lote y ninguno se confirmó
+    assert pending(bus) == 2
+
+    # Al reiniciar, el consumidor relee sus pendientes antes que los eventos nuevos
+    events = consume(bus)
+    delivered = []
+    for _ in range(2):
+        msg_id, event_type, data = next(events)
+        delivered.append(msg_id)
+        handle_event(db, bus, msg_id, event_type, data)
+
+    assert delivered == [first, second]
+    assert pending(bus) == 0
+    assert db.get(CoursePrice, 7).price == 60.0
+
+
+def test_pending_events_of_a_dead_consumer_are_reclaimed(db, bus, group):
+    msg_id = publish(bus, 8, 30.0, status="DRAFT")
+    next(consume(bus, "worker-dead"))
+
+    claimed_id, event_type, data = next(consume(bus, "worker-b", reclaim_idle_ms=0))
+    handle_event(db, bus, claimed_id, event_type, data)
+
+    assert claimed_id == msg_id
+    assert pending(bus) == 0
+    assert db.get(CoursePrice, 8).published is False
+
+
+def test_malformed_event_is_acked_without_applying(db, bus, group):
+    bus.publish(STREAM, "curso.creado", {"course_id": 9})
+    msg_id, event_type, data = next(consume(bus))
+
+    handle_event(db, bus, msg_id, event_type, data)
+
+    assert pending(bus) == 0
+    assert db.get(CoursePrice, 9) is None
+
+
+def test_backfill_depends_on_the_local_replica(db):
+    assert needs_backfill(db)
+    db.add(CoursePrice(course_id=1, title="Curso", price=10.0))
+    db.commit()
+    assert not needs_backfill(db)
+
+
+def test_consumer_name_is_unique_per_process():
+    assert price_replication.consumer_name().endswith(f"-{socket.gethostname()}-{os.getpid()}")
+
+
+class CatalogPage:
+    def __init__(self, courses: list):
+        self.courses = courses
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"results": self.courses, "next_cursor": None}
+
+
+def test_periodic_reconcile_repairs_lost_events(db, monkeypatch):
+    # El evento de creación del curso 2 se perdió y el de cambio de precio del 1 también
+    db.add(CoursePrice(course_id=1, title="Curso 1", price=10.0))
+    db.commit()
+    catalog = [{"id": 1, "title": "Curso 1", "price": 15.0, "status": "PUBLISHED"},
+               {"id": 2, "title": "Curso 2", "price": 20.0, "status": "PUBLISHED"}]
+    monkeypatch.setattr(requests, "get", lambda url, params, timeout: CatalogPage(catalog))
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal-test-token")
+    client = TestClient(app)
+
+    assert client.post("/api/transactions/internal/reconcile-prices").status_code == 403
+    response = client.post("/api/transactions/internal/reconcile-prices",
+                           headers={"X-Internal-Token": "internal-test-token"})
+
+    assert response.json() == {"status": "ok", "courses": 2}
+    db.expire_all()
+    assert [(row.course_id, row.price) for row in db.query(CoursePrice).order_by(CoursePrice.course_id)] == [(1, 15.0), (2, 20.0)]
@@ -32,6 +32,8 @@ app.conf.update(
         'shared.tasks.documents.dead_letter_task': {'queue': 'dead_letter'},
         'shared.tasks.backups.backup_databases_task': {'queue': 'reports'},
         'shared.tasks.periodic.revisar_certificados_pendientes': {'queue': 'reports'},
+        'shared.tasks.periodic.reconciliar_ratings_cursos': {'queue': 'reports'},
+        'shared.tasks.periodic.reconciliar_precios_cursos': {'queue': 'reports'},
     },
     beat_schedule={
         'revisar-certificados-pendientes-cada-30s': {
@@ -41,6 +43,14 @@ app.conf.update(
         'backup-bases-de-datos-diario': {
             'task': 'shared.tasks.backups.backup_databases_task',
             'schedule': 86400.0,  # Cada día
+        },
+        'reconciliar-ratings-cursos-cada-hora': {
+            'task': 'shared.tasks.periodic.reconciliar_ratings_cursos',
+            'schedule': 3600.0,
+        },
+        'reconciliar-precios-cursos-cada-15min': {
+            'task': 'shared.tasks.periodic.reconciliar_precios_cursos',
+            'schedule': 900.0,
         }
     }
 )
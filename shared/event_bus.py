@@ -23,21 +23,70 @@ class RedisEventBus:
         logger.info(f"Published event '{event_type}' to stream '{stream}', ID: {message_id}")
         return message_id
 
-    def consume(self, stream: str, group_name: str, consumer_name: str, block: int = 5000):
+    def publish_many(self, events: list) -> list:
         """
-        Consume eventos del stream. Si el grupo no existe, lo crea.
-        Generador que produce (message_id, event_type, data_dict).
+        Publica varios eventos (stream, event_type, data) en un solo pipeline de Redis,
+        sin transacción. Retorna los IDs de mensaje en el mismo orden.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for stream, event_type, data in events:
+            pipe.xadd(stream, {'event_type': event_type, 'data': json.dumps(data)})
+        message_ids = pipe.execute()
+        logger.info(f"Published {len(message_ids)} events in one pipeline")
+        return message_ids
+
+    def ensure_group(self, stream: str, group_name: str, start_id: str = '0') -> bool:
+        """
+        Crea el grupo de consumidores si no existe, leyendo desde `start_id` ('0' todo
+        el stream, '$' sólo eventos nuevos). Retorna True si lo creó.
         """
         try:
-            self.redis.xgroup_create(stream, group_name, id='0', mkstream=True)
+            self.redis.xgroup_create(stream, group_name, id=start_id, mkstream=True)
+            return True
         except redis.exceptions.ResponseError as e:
             if "BUSYGROUP Consumer Group name already exists" not in str(e):
                 raise
+            return False
+
+    def ack(self, stream: str, group_name: str, message_id: str) -> None:
+        """Confirma (XACK) un evento entregado por `consume` con auto_ack=False."""
+        self.redis.xack(stream, group_name, message_id)
+
+    def consume(self, stream: str, group_name: str, consumer_name: str, block: int = 5000,
+                auto_ack: bool = True, reclaim_idle_ms: int = None):
+        """
+        Consume eventos del stream. Si el grupo no existe, lo crea.
+        Generador que produce (message_id, event_type, data_dict).
+
+        Con auto_ack (por defecto) cada evento se confirma cuando el llamador pide el
+        siguiente, aunque haya fallado al procesarlo. Con auto_ack=False el llamador
+        confirma con `ack` sólo los que aplicó: los demás quedan pendientes y se
+        entregan de nuevo, primero los de este consumidor al volver a llamar a
+        `consume`, y con `reclaim_idle_ms` también los de cualquier consumidor que
+        lleven ese tiempo sin confirmar (XAUTOCLAIM), p. ej. de un proceso que murió.
+        """
+        self.ensure_group(stream, group_name)
+        # '0' relee los pendientes de este consumidor; cuando no quedan se pasa a '>'
+        read_id = '>' if auto_ack else '0'
 
         while True:
-            # '>' lee mensajes nuevos que nunca se han entregado a otros consumidores de este grupo
             try:
-                messages = self.redis.xreadgroup(group_name, consumer_name, {stream: '>'}, count=10, block=block)
+                messages = []
+                if reclaim_idle_ms is not None:
+                    _, claimed, *_ = self.redis.xautoclaim(
+                        stream, group_name, consumer_name, min_idle_time=reclaim_idle_ms, start_id='0-0', count=10
+                    )
+                    messages = [(stream, claimed)] if claimed else []
+                if not messages:
+                    # '>' lee mensajes nuevos que nunca se han entregado a otros consumidores de este grupo
+                    messages = self.redis.xreadgroup(group_name, consumer_name, {stream: read_id}, count=10,
+                                                     block=None if read_id != '>' else block)
+                    if read_id != '>':
+                        if not any(msg_list for _, msg_list in messages):
+                            read_id = '>'
+                            continue
+                        # Siguiente lectura del historial: después del último pendiente entregado
+                        read_id = messages[0][1][-1][0]
             except redis.exceptions.ConnectionError as e:
                 logger.warning(f"Redis connection error during consume: {e}. Retrying...")
                 import time
@@ -51,8 +100,13 @@ class RedisEventBus:
                     try:
                         event_type = payload.get('event_type')
                         data_dict = json.loads(payload.get('data', '{}'))
-                        yield message_id, event_type, data_dict
                     except Exception as e:
+                        # Un evento que no se puede leer no se reintenta
                         logger.error(f"Error parsing event {message_id} from {stream}: {e}")
-                    finally:
                         self.redis.xack(stream, group_name, message_id)
+                        continue
+                    try:
+                        yield message_id, event_type, data_dict
+                    finally:
+                        if auto_ack:
+                            self.redis.xack(stream, group_name, message_id)
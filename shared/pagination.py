@@ -0,0 +1,170 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Callable, Optional
+from fastapi import HTTPException, Query, Request, status
+from sqlalchemy import Select, and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as SAQuery
+
+# Rutas bajo estos prefijos exponen `next_cursor`; el prefijo legado /api conserva
+# exactamente el contrato page/page_size/count/next/previous.
+CURSOR_PREFIXES = ("/api/catalog/", "/api/transactions/")
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+
+
+class PageParams:
+    """Parámetros de paginación comunes a todos los endpoints de listado."""
+
+    def __init__(
+        self,
+        request: Request,
+        page: int = Query(1, ge=1),
+        page_size: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="Token opaco `next_cursor` de la respuesta anterior."),
+        count: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
+    ):
+        self.legacy = not request.url.path.startswith(CURSOR_PREFIXES)
+        self.page = page
+        self.page_size = page_size
+        # `?cursor=` vacío pide la primera página en modo cursor (sin OFFSET ni `page`)
+        self.cursor = None if self.legacy or cursor is None else cursor.strip()
+        if self.legacy:
+            self.count = COUNT_EXACT
+        else:
+            self.count = count or (COUNT_NONE if cursor is not None else COUNT_EXACT)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    """Valor de un cursor: escalar JSON o {"dt": iso}; cualquier otra cosa es un cursor inválido."""
+    if isinstance(value, dict) and value.keys() == {"dt"} and isinstance(value["dt"], str):
+        return datetime.fromisoformat(value["dt"])
+    if value is None or (isinstance(value, (int, float, str)) and not isinstance(value, bool)):
+        return value
+    raise ValueError("unsupported cursor value")
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("wrong cursor size")
+        return [_decode_value(v) for v in values]
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+
+def _after(keys: list, values: list):
+    """Condición lexicográfica "fila posterior a `values`" para claves (expr, desc)."""
+    clauses = []
+    for i, (expr, desc) in enumerate(keys):
+        equal_prefix = [k == v for (k, _), v in zip(keys[:i], values[:i])]
+        step = expr < values[i] if desc else expr > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def _explain(dialect, statement):
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return text(f"EXPLAIN (FORMAT JSON) {compiled}")
+
+
+def _plan_rows(plan) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(query: SAQuery) -> int:
+    """
+    Estimación del total sin recorrer la tabla: en PostgreSQL se toman las filas
+    previstas por el planificador; en otros motores se hace un COUNT exacto.
+    """
+    session = query.session
+    if session.get_bind().dialect.name != "postgresql":
+        return query.order_by(None).count()
+    return _plan_rows(session.execute(_explain(session.get_bind().dialect, query.order_by(None).statement)).scalar())
+
+
+def _window(query, params: PageParams, keys: list):
+    """
+    Ordena por `keys` y aplica cursor u OFFSET. Sirve igual para Query y para select().
+    Retorna (consulta ordenada, consulta de la página con las claves como columnas).
+    """
+    labeled = [expr.label(f"_page_key_{i}") for i, (expr, _) in enumerate(keys)]
+    query = query.order_by(None).order_by(*[expr.desc() if desc else expr.asc() for expr, desc in keys])
+
+    page_query = query.add_columns(*labeled)
+    if params.cursor is None:
+        page_query = page_query.offset((params.page - 1) * params.page_size)
+    elif params.cursor:
+        page_query = page_query.filter(_after(keys, decode_cursor(params.cursor, len(keys))))
+    return query, page_query.limit(params.page_size + 1)
+
+
+def _page_response(rows: list, params: PageParams, total: Optional[int], serialize: Callable) -> dict:
+    has_more = len(rows) > params.page_size
+    rows = rows[: params.page_size]
+
+    response = {
+        "count": total,
+        "next": None,
+        "previous": None,
+        "results": [serialize(row[0]) for row in rows],
+    }
+    if params.cursor is None:
+        response["next"] = params.page + 1 if has_more else None
+        response["previous"] = params.page - 1 if params.page > 1 else None
+    if not params.legacy:
+        response["next_cursor"] = encode_cursor(list(rows[-1][1:])) if has_more and rows else None
+    return response
+
+
+def paginate(query: SAQuery, params: PageParams, keys: list, serialize: Callable) -> dict:
+    """
+    Pagina `query` según `keys`, una lista de (expresión, desc) que debe terminar en
+    una columna única (normalmente el id). Con `cursor` se usa keyset (WHERE sobre
+    las claves, sin OFFSET); sin él se conserva la paginación por número de página.
+    """
+    query, page_query = _window(query, params, keys)
+
+    if params.count == COUNT_EXACT:
+        total = query.order_by(None).count()
+    elif params.count == COUNT_ESTIMATED:
+        total = estimate_count(query)
+    else:
+        total = None
+
+    return _page_response(page_query.all(), params, total, serialize)
+
+
+async def paginate_async(db: AsyncSession, statement: Select, params: PageParams, keys: list, serialize: Callable) -> dict:
+    """Como `paginate`, para un select() ejecutado con una sesión async."""
+    statement, page_statement = _window(statement, params, keys)
+
+    unordered = statement.order_by(None)
+    dialect = db.get_bind().dialect
+    if params.count == COUNT_ESTIMATED and dialect.name == "postgresql":
+        total = _plan_rows(await db.scalar(_explain(dialect, unordered)))
+    elif params.count in (COUNT_EXACT, COUNT_ESTIMATED):
+        total = await db.scalar(select(func.count()).select_from(unordered.subquery()))
+    else:
+        total = None
+
+    return _page_response((await db.execute(page_statement)).all(), params, total, serialize)
@@ -1,9 +1,15 @@
 import logging
+import os
 import urllib.request
 from celery import shared_task
 
 logger = logging.getLogger('shared.tasks.periodic')
 
+
+def _internal_headers() -> dict:
+    """Token que exigen las rutas /internal/* expuestas detrás de nginx (INTERNAL_API_TOKEN)."""
+    return {"X-Internal-Token": os.environ.get("INTERNAL_API_TOKEN", "")}
+
 @shared_task
 def revisar_certificados_pendientes():
     """
@@ -21,3 +27,37 @@ def revisar_certificados_pendientes():
     except Exception as exc:
         logger.error(f"Error calling check-pending-tasks: {exc}")
         raise
+
+@shared_task
+def reconciliar_ratings_cursos():
+    """
+    Tarea periódica que pide al catalog-service recalcular los agregados de ratings
+    (rating_count, rating_sum, histograma) y corregir los cursos con deriva.
+    """
+    url = "http://catalog-service:8000/api/catalog/internal/reconcile-ratings"
+    req = urllib.request.Request(url, method="POST", headers=_internal_headers())
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            res_data = response.read().decode("utf-8")
+            logger.info(f"Reconciled course ratings: {res_data}")
+            return {'status': 'ok'}
+    except Exception as exc:
+        logger.error(f"Error calling reconcile-ratings: {exc}")
+        raise
+
+@shared_task
+def reconciliar_precios_cursos():
+    """
+    Tarea periódica que pide al transactions-service volver a copiar los precios y el
+    estado de los cursos del catálogo, por si se perdió algún evento `curso.*`.
+    """
+    url = "http://transactions-service:8000/api/transactions/internal/reconcile-prices"
+    req = urllib.request.Request(url, method="POST", headers=_internal_headers())
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            res_data = response.read().decode("utf-8")
+            logger.info(f"Reconciled course prices: {res_data}")
+            return {'status': 'ok'}
+    except Exception as exc:
+        logger.error(f"Error calling reconcile-prices: {exc}")
+        raise